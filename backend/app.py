@@ -1,21 +1,26 @@
 import os
-import threading
-import time
 from datetime import datetime
 from email.message import EmailMessage
-import smtplib
-import ssl
 
 from flask import Flask, jsonify, request
 from flask_cors import CORS
 from dotenv import load_dotenv
 
+from nexanote.smtp_pool import get_pool
+from nexanote.timer_queue import TimerQueue
+
 
 load_dotenv()
 
 app = Flask(__name__)
 CORS(app)
 
+# One dispatcher thread for every scheduled email; sends run on a small pool
+email_timers = TimerQueue(
+    max_workers=int(os.getenv("EMAIL_SEND_WORKERS", "4")),
+    name="email-timers",
+)
+
 
 def _bool_env(name: str, default: bool) -> bool:
     value = os.getenv(name)
@@ -51,34 +56,58 @@ def send_email(
     message["Subject"] = subject
     message.set_content(body)
 
-    if ssl_enabled:
-        context = ssl.create_default_context()
-        with smtplib.SMTP_SSL(host, port, context=context, timeout=timeout) as server:
-            server.login(sender_email, sender_password)
-            server.send_message(message)
-    else:
-        with smtplib.SMTP(host, port, timeout=timeout) as server:
-            if starttls_enabled:
-                context = ssl.create_default_context()
-                server.starttls(context=context)
-            server.login(sender_email, sender_password)
-            server.send_message(message)
+    # Reuse a warm, authenticated session instead of connecting per message
+    pool = get_pool(
+        host,
+        port,
+        sender_email,
+        sender_password,
+        use_ssl=ssl_enabled,
+        use_starttls=starttls_enabled,
+        timeout=timeout,
+    )
+    pool.send_message(message)
 
 
-def schedule_email(run_at: datetime, target_kwargs: dict):
-    delay_seconds = max(0, (run_at - datetime.now()).total_seconds())
+def _smtp_kwargs_from_env() -> dict:
+    return {
+        "sender_email": os.getenv("EMAIL_SENDER"),
+        "sender_password": os.getenv("EMAIL_PASSWORD"),
+        "smtp_host": os.getenv("SMTP_HOST", "smtp.gmail.com"),
+        "smtp_port": int(os.getenv("SMTP_PORT", "587")),
+        "use_ssl": _bool_env("SMTP_USE_SSL", False),
+        "use_starttls": _bool_env("SMTP_USE_STARTTLS", True),
+        "timeout_seconds": int(os.getenv("SMTP_TIMEOUT_SECONDS", "30")),
+    }
 
-    def worker():
-        try:
-            time.sleep(delay_seconds)
-            send_email(**target_kwargs)
-        except Exception as exc:
-            # For a simple demo API, we only log to console
-            print(f"Scheduled email failed: {exc}")
 
-    thread = threading.Thread(target=worker, daemon=True)
-    thread.start()
-    return delay_seconds
+def _send_scheduled_email(receiver_email: str, subject: str, body: str):
+    try:
+        send_email(
+            receiver_email=receiver_email,
+            subject=subject,
+            body=body,
+            **_smtp_kwargs_from_env(),
+        )
+    except Exception as exc:
+        # For a simple demo API, we only log to console
+        print(f"Scheduled email failed: {exc}")
+
+
+def _delay_until(run_at: datetime) -> float:
+    if run_at.tzinfo is not None:
+        # Times with an offset are compared in the server's local time, like naive ones
+        run_at = run_at.astimezone().replace(tzinfo=None)
+    return max(0, (run_at - datetime.now()).total_seconds())
+
+
+def schedule_email(run_at: datetime, receiver_email: str, subject: str, body: str):
+    # Pending emails only hold their own fields; SMTP settings are read at send time
+    delay_seconds = _delay_until(run_at)
+    job_id = email_timers.schedule(
+        delay_seconds, _send_scheduled_email, (receiver_email, subject, body)
+    )
+    return job_id, delay_seconds
 
 
 @app.route("/api/health", methods=["GET"])
@@ -165,26 +194,46 @@ def api_schedule_email():
         return jsonify({"error": "runAtIso must be ISO 8601, e.g. 2025-09-19T14:30:00"}), 400
 
     try:
-        delay = schedule_email(
-            run_at,
-            {
-                "sender_email": sender_email,
-                "sender_password": sender_password,
-                "receiver_email": receiver_email,
-                "subject": subject,
-                "body": body,
-                "smtp_host": os.getenv("SMTP_HOST", "smtp.gmail.com"),
-                "smtp_port": int(os.getenv("SMTP_PORT", "587")),
-                "use_ssl": _bool_env("SMTP_USE_SSL", False),
-                "use_starttls": _bool_env("SMTP_USE_STARTTLS", True),
-                "timeout_seconds": int(os.getenv("SMTP_TIMEOUT_SECONDS", "30")),
-            },
-        )
-        return jsonify({"status": "scheduled", "runInSeconds": delay})
+        job_id, delay = schedule_email(run_at, receiver_email, subject, body)
+        return jsonify({"status": "scheduled", "jobId": job_id, "runInSeconds": delay})
     except Exception as exc:
         return jsonify({"error": str(exc)}), 500
 
 
+@app.route("/api/email/cancel", methods=["POST"])
+def api_cancel_email():
+    data = request.get_json(force=True)
+    job_id = data.get("jobId")
+
+    if not job_id:
+        return jsonify({"error": "Missing required field: jobId"}), 400
+
+    if not email_timers.cancel(job_id):
+        return jsonify({"error": "Scheduled email not found or already sent"}), 404
+
+    return jsonify({"status": "cancelled", "jobId": job_id})
+
+
+@app.route("/api/email/reschedule", methods=["POST"])
+def api_reschedule_email():
+    data = request.get_json(force=True)
+    job_id = data.get("jobId")
+    run_at_iso = data.get("runAtIso")
+
+    if not job_id or not run_at_iso:
+        return jsonify({"error": "Missing required fields: jobId/runAtIso"}), 400
+
+    try:
+        delay = _delay_until(datetime.fromisoformat(run_at_iso))
+    except Exception:
+        return jsonify({"error": "runAtIso must be ISO 8601, e.g. 2025-09-19T14:30:00"}), 400
+
+    if not email_timers.reschedule(job_id, delay):
+        return jsonify({"error": "Scheduled email not found or already sent"}), 404
+
+    return jsonify({"status": "scheduled", "jobId": job_id, "runInSeconds": delay})
+
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=int(os.getenv("PORT", "5000")))
 
@@ -0,0 +1,7 @@
+"""
+Load benchmarks for the NexaNote backend
+
+Run from the backend directory, e.g. ``python -m benchmarks.asgi_vs_wsgi``.
+Benchmarks use their own throwaway SQLite database (see benchmarks/settings.py)
+and a simulated Gemini model, so they never touch db.sqlite3 or call real APIs.
+"""
@@ -0,0 +1,121 @@
+"""
+Concurrent-request throughput of the sync (WSGI) and async (ASGI) views
+
+Both modes drive POST /api/reminders/schedule through Django's full request
+stack against a simulated Gemini model that sleeps for ``--latency`` seconds,
+which is what dominates a real request. WSGI is modelled as a pool of
+``--workers`` threads (one request per thread, like gunicorn's gthread
+worker); ASGI runs ``--concurrency`` requests as tasks on one event loop.
+Each mode runs in its own subprocess so URL routing is set up from
+ASYNC_VIEWS exactly as in production.
+
+Usage:
+    python -m benchmarks.asgi_vs_wsgi --requests 400 --latency 0.5 --workers 16 --concurrency 200
+
+Prints one JSON document with throughput and latency percentiles per mode.
+"""
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .support import FakeGeminiModel, install_fake_gemini, latency_summary, run_child, setup_django
+
+
+def summarize(mode: str, parallelism: int, latencies, failures: int, elapsed: float) -> dict:
+    return {
+        'mode': mode,
+        'parallelism': parallelism,
+        'requests': len(latencies) + failures,
+        'failures': failures,
+        'elapsed_seconds': round(elapsed, 3),
+        'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        'latency_ms': latency_summary(latencies),
+    }
+
+
+def schedule_payload(i: int) -> str:
+    return json.dumps({
+        'userInput': f'Benchmark sync #{i} next month on Zoom',
+        'receiverEmail': 'bench@example.com',
+    })
+
+
+def run_wsgi(args) -> dict:
+    from django.test import Client
+
+    def one(i):
+        client = Client()
+        start = time.perf_counter()
+        response = client.post('/api/reminders/schedule', schedule_payload(i), content_type='application/json')
+        return response.status_code, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(one, range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = [latency for status, latency in results if status == 201]
+    return summarize('wsgi', args.workers, latencies, len(results) - len(latencies), elapsed)
+
+
+def run_asgi(args) -> dict:
+    from django.test import AsyncClient
+
+    async def main():
+        client = AsyncClient()
+        slots = asyncio.Semaphore(args.concurrency)
+
+        async def one(i):
+            async with slots:
+                start = time.perf_counter()
+                response = await client.post(
+                    '/api/reminders/schedule', schedule_payload(i), content_type='application/json'
+                )
+                return response.status_code, time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(one(i) for i in range(args.requests)))
+        return results, time.perf_counter() - start
+
+    results, elapsed = asyncio.run(main())
+    latencies = [latency for status, latency in results if status == 201]
+    return summarize('asgi', args.concurrency, latencies, len(results) - len(latencies), elapsed)
+
+
+def run_mode(args) -> dict:
+    """Set up Django for one mode in this process and run it"""
+    setup_django(ASYNC_VIEWS='true' if args.mode == 'asgi' else 'false')
+    install_fake_gemini(FakeGeminiModel(args.latency))
+
+    return run_asgi(args) if args.mode == 'asgi' else run_wsgi(args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--requests', type=int, default=400, help='Requests per mode')
+    parser.add_argument('--latency', type=float, default=0.5, help='Simulated Gemini latency in seconds')
+    parser.add_argument('--workers', type=int, default=16, help='WSGI worker threads')
+    parser.add_argument('--concurrency', type=int, default=200, help='ASGI requests in flight')
+    parser.add_argument('--mode', choices=('wsgi', 'asgi'), help='Run a single mode in this process')
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args)))
+        return
+
+    results = [
+        run_child(
+            'benchmarks.asgi_vs_wsgi', '--mode', mode,
+            '--requests', args.requests, '--latency', args.latency,
+            '--workers', args.workers, '--concurrency', args.concurrency,
+        )
+        for mode in ('wsgi', 'asgi')
+    ]
+
+    print(json.dumps({'latency_seconds': args.latency, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
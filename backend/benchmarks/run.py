@@ -0,0 +1,462 @@
+"""
+Offline benchmark suite
+
+Runs without network access or credentials: Gemini is replaced by a fake
+model with configurable latency and error rate, mail goes to an in-process
+SMTP sink, and every suite gets its own throwaway SQLite database and
+subprocess (so memory numbers and settings don't leak between suites).
+
+Suites:
+    schedule          POST /api/reminders/schedule throughput and p50/p99
+    list              GET /api/reminders/list latency at each --list-sizes table size
+    dispatcher        run_dispatcher send throughput into the SMTP sink
+    scheduler_memory  memory and time to load --pending-jobs jobs into the embedded scheduler
+    search            GET /api/reminders/search latency over --search-rows reminders
+    contention        concurrent delivery-outcome writes and list reads per DB_PROFILE, with and without write coalescing
+
+Usage:
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --suites list --list-sizes 10000,100000
+    python -m benchmarks.run --suites search --search-rows 1000000
+
+The result is one JSON document (run metadata plus one entry per suite),
+written to --output and printed, so runs can be diffed across commits.
+"""
+import argparse
+import json
+import resource
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+
+from .support import (
+    FakeGeminiModel,
+    SMTPSink,
+    install_fake_gemini,
+    latency_summary,
+    run_child,
+    run_metadata,
+    setup_django,
+)
+
+
+SUITES = ('schedule', 'list', 'dispatcher', 'scheduler_memory', 'search', 'contention')
+# (DB_PROFILE, WRITE_COALESCE_ENABLED) pairs the contention suite compares
+CONTENTION_CONFIGS = (('default', False), ('default', True), ('tuned', False), ('tuned', True))
+
+
+# Meeting kinds (each in a tenth of the rows) and topics (each in about one in a thousand)
+SEARCH_KINDS = ('sync', 'review', 'standup', 'planning', 'retro', 'interview', 'demo', 'onboarding', 'workshop', 'briefing')
+_SYLLABLES = ('ka', 'lo', 'mi', 'ne', 'su', 'ta', 'vo', 'ri', 'pe', 'du', 'zan', 'mor', 'tel', 'qui', 'bra', 'fen', 'gol', 'hix', 'jor', 'wel')
+SEARCH_TOPICS = tuple(f'{a}{b}{c}' for a in _SYLLABLES[:10] for b in _SYLLABLES for c in _SYLLABLES[10:15])
+
+
+def _insert_reminders(
+    count: int, due_in_past: bool = False, some_sent: bool = False, varied_text: bool = False, chunk_size: int = 50000
+):
+    """
+    Fill the Reminder table quickly with raw multi-row inserts
+
+    Rows spread over 1000 receivers and a year of scheduled times; created_at
+    increases with the id like real traffic.
+
+    Args:
+        count: Rows to insert
+        due_in_past: Schedule every row in the past so it is due right away
+        some_sent: Mark every third row as already sent
+        varied_text: Give rows searchable text (a SEARCH_TOPICS topic, a
+            SEARCH_KINDS kind and a code q<i> unique to the row)
+            instead of one shared name
+    """
+    from django.db import connection, transaction
+    from django.utils import timezone
+
+    now = timezone.now()
+    start = now - timedelta(seconds=count)
+    columns = (
+        'name', 'scheduled_time', 'mode', 'applications', 'link', 'receiver_email',
+        'created_at', 'json_data', 'job_id', 'sent', 'status', 'attempts',
+    )
+    sql = f"INSERT INTO reminders_reminder ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+    json_data = json.dumps({'name': 'Benchmark sync', 'mode': 'online', 'applications': 'Zoom'})
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        for offset in range(0, count, chunk_size):
+            rows = []
+            for i in range(offset, min(count, offset + chunk_size)):
+                if due_in_past:
+                    scheduled = now - timedelta(seconds=i + 1)
+                else:
+                    scheduled = now + timedelta(minutes=10 + (i * 7919) % 525600)
+                sent = some_sent and i % 3 == 0
+                name = f'Benchmark sync #{i}'
+                if varied_text:
+                    topic = SEARCH_TOPICS[(i * 7919) % len(SEARCH_TOPICS)]
+                    name = f'{topic.title()} {SEARCH_KINDS[i % len(SEARCH_KINDS)]}'
+                    json_data = json.dumps({'name': name, 'notes': f'Agenda for {topic}, code q{i}'})
+                rows.append((
+                    name, scheduled, 'online', 'Zoom', 'https://zoom.us/j/123456789',
+                    f'user{i % 1000}@example.com', start + timedelta(seconds=i), json_data,
+                    f'reminder_bench_{i}', sent, 'sent' if sent else 'pending', int(sent),
+                ))
+            cursor.executemany(sql, rows)
+
+
+def _time_requests(client, path: str, params: dict, samples: int) -> dict:
+    # Warm-up request: URL resolution and first-import costs aren't list latency
+    client.get(path, params)
+    durations = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        response = client.get(path, params)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        durations.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            raise RuntimeError(f"GET {path} {params} returned {response.status_code}")
+    return latency_summary(durations)
+
+
+def bench_schedule(args) -> dict:
+    setup_django()
+    model = FakeGeminiModel(args.gemini_latency, args.gemini_error_rate)
+    install_fake_gemini(model)
+
+    from django.test import Client
+    from .asgi_vs_wsgi import schedule_payload
+
+    def one(i):
+        started = time.perf_counter()
+        response = Client().post('/api/reminders/schedule', schedule_payload(i), content_type='application/json')
+        return response.status_code, time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(one, range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    ok = [duration for status, duration in results if status == 201]
+    return {
+        'requests': len(results),
+        'workers': args.workers,
+        'gemini_latency_seconds': args.gemini_latency,
+        'gemini_error_rate': args.gemini_error_rate,
+        'succeeded': len(ok),
+        'failed': len(results) - len(ok),
+        'throughput_rps': round(len(ok) / elapsed, 2),
+        'latency_ms': latency_summary(ok),
+        'gemini_calls': model.calls,
+        'gemini_prompt_chars': model.prompt_chars,
+    }
+
+
+def bench_list(args) -> dict:
+    setup_django()
+
+    from django.test import Client
+    from reminders.listing import encode_cursor
+    from reminders.models import Reminder
+
+    started = time.perf_counter()
+    _insert_reminders(args.rows, some_sent=True)
+    load_seconds = time.perf_counter() - started
+
+    middle = Reminder.objects.order_by('-created_at', '-id').values('created_at', 'id')[args.rows // 2]
+    deep_cursor = encode_cursor(middle['created_at'], middle['id'])
+    client = Client()
+    path = '/api/reminders/list'
+    samples = args.samples
+
+    return {
+        'rows': args.rows,
+        'load_seconds': round(load_seconds, 2),
+        'latency_ms': {
+            'first_page': _time_requests(client, path, {'limit': 50}, samples),
+            'first_page_projected': _time_requests(
+                client, path, {'limit': 50, 'fields': 'id,name,scheduledTime'}, samples
+            ),
+            'deep_page': _time_requests(client, path, {'limit': 50, 'cursor': deep_cursor}, samples),
+            'receiver_filter': _time_requests(
+                client, path, {'limit': 50, 'receiverEmail': 'user7@example.com', 'sent': 'false'}, samples
+            ),
+            'stream_10k_rows': _time_requests(
+                client, path, {'stream': 'true', 'limit': 10000, 'fields': 'id,name,scheduledTime'},
+                max(1, samples // 10)
+            ),
+        },
+    }
+
+
+def bench_search(args) -> dict:
+    setup_django()
+
+    from django.test import Client
+    from reminders.search import decode_cursor, encode_cursor
+
+    started = time.perf_counter()
+    _insert_reminders(args.search_rows, some_sent=True, varied_text=True)
+    load_seconds = time.perf_counter() - started
+
+    client = Client()
+    path = '/api/reminders/search'
+    samples = args.samples
+    topic = SEARCH_TOPICS[len(SEARCH_TOPICS) // 2]
+    first_page = client.get(path, {'q': 'standup'}).json()
+    low, high, _ = decode_cursor(first_page['nextCursor'])
+
+    return {
+        'rows': args.search_rows,
+        'load_seconds': round(load_seconds, 2),
+        'latency_ms': {
+            # One matching row
+            'rare_term': _time_requests(client, path, {'q': f'q{args.search_rows // 2}'}, samples),
+            # About one row in a thousand
+            'topic': _time_requests(client, path, {'q': topic}, samples),
+            'topic_prefix': _time_requests(client, path, {'q': f'{topic[:4]}*'}, samples),
+            'topic_and_kind': _time_requests(client, path, {'q': f'{topic} review'}, samples),
+            # A tenth of the table
+            'common_term': _time_requests(client, path, {'q': 'standup'}, samples),
+            'common_term_page_10': _time_requests(
+                client, path, {'q': 'standup', 'cursor': encode_cursor(low, high, 450)}, samples
+            ),
+            # One receiver's thousand rows, all of them matching
+            'receiver_filter': _time_requests(
+                client, path, {'q': 'onboarding', 'receiverEmail': 'user7@example.com'}, samples
+            ),
+            'receiver_and_sent_filter': _time_requests(
+                client, path, {'q': 'onboarding', 'receiverEmail': 'user7@example.com', 'sent': 'false'}, samples
+            ),
+        },
+    }
+
+
+def bench_dispatcher(args) -> dict:
+    sink = SMTPSink().start()
+    setup_django(SMTP_RATE_PER_MINUTE=0, **sink.env())
+
+    from reminders.dispatcher import dispatch_batch
+
+    _insert_reminders(args.reminders, due_in_past=True)
+
+    batches = 0
+    started = time.perf_counter()
+    while dispatch_batch(args.batch_size)['claimed']:
+        batches += 1
+    elapsed = time.perf_counter() - started
+
+    return {
+        'reminders': args.reminders,
+        'batch_size': args.batch_size,
+        'batches': batches,
+        'delivered': sink.messages,
+        'elapsed_seconds': round(elapsed, 3),
+        'messages_per_second': round(sink.messages / elapsed, 1) if elapsed else None,
+    }
+
+
+def bench_scheduler_memory(args) -> dict:
+    setup_django(SCHEDULER_MODE='embedded')
+
+    from nexanote.scheduler import jobstores
+    from reminders.scheduling import rehydrate_scheduler
+
+    _insert_reminders(args.pending_jobs)
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    counts = rehydrate_scheduler()
+    elapsed = time.perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    jobs = len(jobstores['default'].get_all_jobs())
+    retained = current - baseline
+    return {
+        'pending_reminders': counts['scheduled'] + counts['caught_up'],
+        'jobs': jobs,
+        'rehydrate_seconds': round(elapsed, 3),
+        'retained_mb': round(retained / 2 ** 20, 2),
+        'peak_mb': round((peak - baseline) / 2 ** 20, 2),
+        'bytes_per_job': round(retained / jobs) if jobs else None,
+        # ru_maxrss is in KiB on Linux
+        'max_rss_growth_mb': round((rss_after - rss_before) / 1024, 2),
+    }
+
+
+def bench_contention(args) -> dict:
+    setup_django(
+        DB_PROFILE=args.db_profile,
+        SQLITE_JOURNAL_MODE='WAL' if args.db_profile == 'tuned' else '',
+        WRITE_COALESCE_ENABLED=str(args.coalesce).lower(),
+    )
+
+    import queue
+    import threading
+    from django.db import OperationalError, connection, connections
+    from django.test import Client
+    from reminders.delivery import DELIVERY_FIELDS, mark_sent
+    from reminders.models import Reminder
+
+    _insert_reminders(args.reminders, due_in_past=True)
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode')
+        journal_mode = cursor.fetchone()[0]
+    pending = queue.Queue()
+    for reminder_id in Reminder.objects.values_list('id', flat=True):
+        pending.put(reminder_id)
+
+    write_durations = []
+    write_errors = []
+    read_durations = []
+    read_errors = []
+    writers_done = threading.Event()
+
+    def writer():
+        # The database side of a scheduler job (see send_reminder_job): re-read the
+        # row and record it sent. Sending mail is left out; the dispatcher suite covers it.
+        while True:
+            try:
+                reminder_id = pending.get_nowait()
+            except queue.Empty:
+                break
+            started = time.perf_counter()
+            try:
+                reminder = Reminder.objects.unsent().filter(pk=reminder_id).only(*DELIVERY_FIELDS).first()
+                mark_sent([reminder], coalesce=True)
+            except OperationalError as e:
+                # "database is locked" once the busy timeout runs out
+                write_errors.append(str(e))
+            write_durations.append(time.perf_counter() - started)
+        connections.close_all()
+
+    def reader():
+        # A web worker listing reminders while the scheduler writes
+        client = Client()
+        while not writers_done.is_set():
+            started = time.perf_counter()
+            try:
+                response = client.get('/api/reminders/list', {'limit': 50, 'fields': 'id,name,sent'})
+                if response.status_code != 200:
+                    read_errors.append(response.status_code)
+            except OperationalError as e:
+                read_errors.append(str(e))
+            read_durations.append(time.perf_counter() - started)
+        connections.close_all()
+
+    # Warm-up request: importing the views must not happen inside the measured run
+    Client().get('/api/reminders/list', {'limit': 1})
+    readers = [threading.Thread(target=reader) for _ in range(args.readers)]
+    writers = [threading.Thread(target=writer) for _ in range(args.writers)]
+    for thread in readers:
+        thread.start()
+    started = time.perf_counter()
+    for thread in writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    writers_done.set()
+    for thread in readers:
+        thread.join()
+
+    recorded = Reminder.objects.filter(sent=True).count()
+    return {
+        'db_profile': args.db_profile,
+        'journal_mode': journal_mode,
+        'write_coalescing': args.coalesce,
+        'writers': args.writers,
+        'readers': args.readers,
+        'recorded_sent': recorded,
+        'elapsed_seconds': round(elapsed, 3),
+        'writes_per_second': round(recorded / elapsed, 1) if elapsed else None,
+        'write_errors': len(write_errors),
+        'write_latency_ms': latency_summary(write_durations),
+        'reads': len(read_durations),
+        'read_errors': len(read_errors),
+        'read_latency_ms': latency_summary(read_durations),
+    }
+
+
+def run_suite(args) -> dict:
+    if args.child == 'schedule':
+        return bench_schedule(args)
+    if args.child == 'list':
+        return bench_list(args)
+    if args.child == 'dispatcher':
+        return bench_dispatcher(args)
+    if args.child == 'search':
+        return bench_search(args)
+    if args.child == 'contention':
+        return bench_contention(args)
+    return bench_scheduler_memory(args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--suites', default=','.join(SUITES), help='Comma-separated suites to run')
+    parser.add_argument('--output', help='Write the JSON result to this file')
+    parser.add_argument('--requests', type=int, default=200, help='schedule: requests to send')
+    parser.add_argument('--workers', type=int, default=16, help='schedule: concurrent client threads')
+    parser.add_argument('--gemini-latency', type=float, default=0.2, help='schedule: fake Gemini latency (s)')
+    parser.add_argument('--gemini-error-rate', type=float, default=0.0, help='schedule: fake Gemini error rate')
+    parser.add_argument('--list-sizes', default='10000,100000,1000000', help='list: table sizes to test')
+    parser.add_argument('--samples', type=int, default=50, help='list: requests per measurement')
+    parser.add_argument('--reminders', type=int, default=5000, help='dispatcher, contention: due reminders to send')
+    parser.add_argument('--batch-size', type=int, default=100, help='dispatcher: rows claimed per batch')
+    parser.add_argument('--pending-jobs', type=int, default=100000, help='scheduler_memory: pending reminders')
+    parser.add_argument('--search-rows', type=int, default=1000000, help='search: reminders to index')
+    parser.add_argument('--writers', type=int, default=16, help='contention: concurrent scheduler threads')
+    parser.add_argument('--readers', type=int, default=4, help='contention: concurrent list readers')
+    parser.add_argument('--child', choices=SUITES, help=argparse.SUPPRESS)
+    parser.add_argument('--rows', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--db-profile', help=argparse.SUPPRESS)
+    parser.add_argument('--coalesce', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_suite(args)))
+        return
+
+    suites = [s.strip() for s in args.suites.split(',') if s.strip()]
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(sorted(unknown))}")
+
+    shared = [
+        '--requests', args.requests, '--workers', args.workers,
+        '--gemini-latency', args.gemini_latency, '--gemini-error-rate', args.gemini_error_rate,
+        '--samples', args.samples, '--reminders', args.reminders, '--batch-size', args.batch_size,
+        '--pending-jobs', args.pending_jobs, '--search-rows', args.search_rows,
+        '--writers', args.writers, '--readers', args.readers,
+    ]
+    results = {}
+    for suite in suites:
+        if suite == 'list':
+            results[suite] = [
+                run_child('benchmarks.run', '--child', suite, '--rows', int(size), *shared)
+                for size in args.list_sizes.split(',') if size.strip()
+            ]
+        elif suite == 'contention':
+            results[suite] = [
+                run_child(
+                    'benchmarks.run', '--child', suite, '--db-profile', profile,
+                    *(['--coalesce'] if coalesce else []), *shared
+                )
+                for profile, coalesce in CONTENTION_CONFIGS
+            ]
+        else:
+            results[suite] = run_child('benchmarks.run', '--child', suite, *shared)
+
+    document = json.dumps({'meta': run_metadata(), 'results': results}, indent=2)
+    if args.output:
+        Path(args.output).write_text(document + '\n')
+    print(document)
+
+
+if __name__ == '__main__':
+    main()
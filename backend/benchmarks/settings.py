@@ -0,0 +1,20 @@
+"""
+Django settings for benchmarks: the project settings with a throwaway database
+"""
+import os
+import tempfile
+from pathlib import Path
+
+from nexanote.settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        **DATABASES['default'],  # noqa: F405 (keeps the DB_PROFILE options)
+        'NAME': os.getenv('BENCHMARK_DB') or Path(tempfile.gettempdir()) / 'nexanote_benchmark.sqlite3',
+    }
+}
+
+# Every request should reach the (simulated) LLM and be answered inline
+PARSE_CACHE_ENABLED = False
+FAST_PARSER_ENABLED = False
+SCHEDULE_ASYNC_DEFAULT = False
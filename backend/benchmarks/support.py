@@ -0,0 +1,278 @@
+"""
+Shared pieces for the offline benchmarks: an in-process SMTP sink, a fake
+Gemini model, Django setup against a throwaway database and result helpers
+"""
+import asyncio
+import atexit
+import json
+import os
+import platform
+import random
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from pathlib import Path
+
+
+class _SinkHandler(socketserver.StreamRequestHandler):
+    """Just enough ESMTP for smtplib: EHLO, AUTH, MAIL/RCPT/DATA, NOOP, QUIT"""
+
+    def _reply(self, line: str):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self._reply('220 benchmark-sink ESMTP')
+        in_data = False
+        for raw in self.rfile:
+            line = raw.rstrip(b'\r\n')
+            if in_data:
+                if line == b'.':
+                    in_data = False
+                    self.server.record_message()
+                    self._reply('250 OK queued')
+                continue
+            command = line[:4].upper()
+            if command == b'EHLO':
+                self._reply('250-benchmark-sink')
+                self._reply('250-AUTH PLAIN LOGIN')
+                self._reply('250 OK')
+            elif command == b'AUTH':
+                self._reply('235 Authentication successful')
+            elif command == b'DATA':
+                in_data = True
+                self._reply('354 End data with <CR><LF>.<CR><LF>')
+            elif command == b'QUIT':
+                self._reply('221 Bye')
+                return
+            else:
+                self._reply('250 OK')
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """
+    Local SMTP server that accepts and counts every message
+
+    Binds an ephemeral port on 127.0.0.1; use ``env()`` to point the app's
+    SMTP settings at it (plain connection, no TLS).
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _SinkHandler)
+        self.messages = 0
+        self._lock = threading.Lock()
+
+    def record_message(self):
+        with self._lock:
+            self.messages += 1
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name='smtp-sink', daemon=True).start()
+        return self
+
+    def env(self) -> dict:
+        return {
+            'EMAIL_SENDER': 'benchmark@localhost',
+            'EMAIL_PASSWORD': 'benchmark',
+            'SMTP_HOST': '127.0.0.1',
+            'SMTP_PORT': str(self.port),
+            'SMTP_USE_SSL': 'false',
+            'SMTP_USE_STARTTLS': 'false',
+        }
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+        self.usage_metadata = None
+
+
+class FakeGeminiError(Exception):
+    pass
+
+
+class FakeGeminiModel:
+    """
+    Stand-in for genai.GenerativeModel that answers after a fixed delay
+
+    Batch prompts (see gemini_service.build_batch_prompt) get a JSON array
+    with one answer per input. Streamed answers arrive as a fenced code
+    block in chunks spread over ``latency``. ``calls`` and ``prompt_chars`` count what a
+    run would have sent to Gemini.
+
+    Args:
+        latency: Seconds each call takes
+        error_rate: Fraction of calls (0-1) that raise instead of answering
+    """
+
+    def __init__(self, latency: float, error_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.calls = 0
+        self.prompt_chars = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _record(self, prompt) -> bool:
+        """Count the call; returns True if it should fail"""
+        with self._lock:
+            self.calls += 1
+            self.prompt_chars += len(prompt)
+            return self._random.random() < self.error_rate
+
+    def _meeting(self) -> dict:
+        # Far in the future so the scheduled reminders never fire during a run
+        meeting_time = datetime.now(dt_timezone.utc) + timedelta(days=30)
+        return {
+            'name': 'Benchmark sync',
+            'time': meeting_time.isoformat(),
+            'mode': 'online',
+            'applications': 'Zoom',
+            'location': None,
+            'link': 'https://zoom.us/j/123456789',
+        }
+
+    def _response(self, prompt) -> FakeResponse:
+        marker = 'User Inputs: '
+        if marker in prompt:
+            inputs = json.loads(prompt[prompt.index(marker) + len(marker):])
+            return FakeResponse(json.dumps([self._meeting() for _ in inputs]))
+        return FakeResponse(json.dumps(self._meeting()))
+
+    def _chunks(self, response: FakeResponse, parts: int = 10) -> list:
+        """The answer as a fenced code block, split into ``parts`` streamed chunks"""
+        text = f"```json\n{response.text}\n```"
+        size = -(-len(text) // parts)
+        return [FakeResponse(text[i:i + size]) for i in range(0, len(text), size)]
+
+    def _stream(self, prompt):
+        if self._record(prompt):
+            raise FakeGeminiError("simulated Gemini failure")
+        chunks = self._chunks(self._response(prompt))
+        for chunk in chunks:
+            time.sleep(self.latency / len(chunks))
+            yield chunk
+
+    async def _astream(self, prompt):
+        if self._record(prompt):
+            raise FakeGeminiError("simulated Gemini failure")
+        chunks = self._chunks(self._response(prompt))
+        for chunk in chunks:
+            await asyncio.sleep(self.latency / len(chunks))
+            yield chunk
+
+    def generate_content(self, prompt, stream=False, request_options=None):
+        if stream:
+            return self._stream(prompt)
+        time.sleep(self.latency)
+        if self._record(prompt):
+            raise FakeGeminiError("simulated Gemini failure")
+        return self._response(prompt)
+
+    async def generate_content_async(self, prompt, stream=False, request_options=None):
+        if stream:
+            return self._astream(prompt)
+        await asyncio.sleep(self.latency)
+        if self._record(prompt):
+            raise FakeGeminiError("simulated Gemini failure")
+        return self._response(prompt)
+
+
+def install_fake_gemini(model: FakeGeminiModel):
+    """Route every Gemini call in this process to ``model``"""
+    from reminders import gemini_service
+    gemini_service.get_gemini_model = lambda *args, **kwargs: model
+
+
+def _remove_database(db_path):
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        try:
+            os.unlink(f"{db_path}{suffix}")
+        except FileNotFoundError:
+            pass
+
+
+def setup_django(db_path=None, **env):
+    """
+    Configure Django with benchmarks.settings in this process and migrate
+
+    Args:
+        db_path: SQLite file to use (by default a temporary file removed at exit)
+        env: Extra environment variables, applied before settings load
+    """
+    if db_path is None:
+        handle, db_path = tempfile.mkstemp(prefix='nexanote-bench-', suffix='.sqlite3')
+        os.close(handle)
+        os.unlink(db_path)
+        atexit.register(_remove_database, db_path)
+    os.environ['BENCHMARK_DB'] = str(db_path)
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'benchmarks.settings'
+    os.environ.update({key: str(value) for key, value in env.items()})
+
+    import django
+    from django.core.management import call_command
+
+    # Look like a management command so app startup doesn't start the
+    # embedded scheduler or resume parse jobs; benchmarks drive those directly
+    argv, sys.argv = sys.argv, ['manage.py', 'benchmark']
+    try:
+        django.setup()
+    finally:
+        sys.argv = argv
+    call_command('migrate', verbosity=0)
+    return db_path
+
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def latency_summary(samples) -> dict:
+    """p50/p99/max of durations in seconds, reported in milliseconds"""
+    if not samples:
+        return {'p50': None, 'p99': None, 'max': None}
+    return {
+        'p50': round(percentile(samples, 50) * 1000, 2),
+        'p99': round(percentile(samples, 99) * 1000, 2),
+        'max': round(max(samples) * 1000, 2),
+    }
+
+
+def run_child(module: str, *args) -> dict:
+    """Run ``python -m module *args`` and parse the JSON document on its last output line"""
+    command = [sys.executable, '-m', module, *[str(a) for a in args]]
+    completed = subprocess.run(
+        command, capture_output=True, text=True, cwd=Path(__file__).resolve().parent.parent
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"{' '.join(command)} failed:\n{completed.stderr[-2000:]}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run_metadata() -> dict:
+    """Where and on what code a run happened, for comparing results across commits"""
+    backend = Path(__file__).resolve().parent.parent
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, cwd=backend
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.now(dt_timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
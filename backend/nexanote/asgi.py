@@ -7,6 +7,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'nexanote.settings')
+# Serve the reminder endpoints with their native async views
+os.environ.setdefault('ASYNC_VIEWS', 'true')
 
 application = get_asgi_application()
 
@@ -0,0 +1,73 @@
+"""
+Circuit breaker for calls to a flaky upstream
+"""
+import threading
+import time
+
+
+class CircuitBreaker:
+    """
+    Thread-safe closed / open / half-open circuit breaker
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    ``allow()`` refuses calls for ``reset_seconds``. It then goes half-open:
+    a single probe call is let through; its success closes the breaker and
+    its failure opens it for another ``reset_seconds``.
+
+    Args:
+        failure_threshold: Consecutive failures that open the breaker
+        reset_seconds: How long the breaker stays open before probing
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """True if a call may go ahead now (in half-open state, only the one probe)"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_seconds:
+                    return False
+                self._state = self.HALF_OPEN
+                self._probing = False
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_neutral(self):
+        """End a call without counting it either way; a half-open breaker may probe again"""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probing = False
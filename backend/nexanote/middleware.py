@@ -0,0 +1,75 @@
+"""
+Request and database instrumentation for nexanote.metrics
+"""
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from . import metrics
+
+
+REQUEST_SECONDS = metrics.histogram(
+    'nexanote_http_request_seconds', 'Time to produce a response, by view', ('view', 'method', 'status')
+)
+DB_QUERY_SECONDS = metrics.histogram(
+    'nexanote_db_query_seconds', 'Database query time', ('kind',)
+)
+# Any other method is labelled "other", so arbitrary verbs can't create new label sets
+HTTP_METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+_read_timer = DB_QUERY_SECONDS.labels('read')
+_write_timer = DB_QUERY_SECONDS.labels('write')
+
+
+def _view_name(request) -> str:
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.url_name or match.view_name or 'unnamed'
+
+
+class RequestMetricsMiddleware:
+    """Observe per-view latency for both sync (WSGI) and async (ASGI) requests"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self._observe(request, response, started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self._observe(request, response, started)
+        return response
+
+    @staticmethod
+    def _observe(request, response, started):
+        method = request.method if request.method in HTTP_METHODS else 'other'
+        REQUEST_SECONDS.labels(_view_name(request), method, response.status_code).observe(
+            time.perf_counter() - started
+        )
+
+
+def _query_timer(execute, sql, params, many, context):
+    timer = _read_timer if sql.lstrip()[:6].upper() == 'SELECT' else _write_timer
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timer.observe(time.perf_counter() - started)
+
+
+def install_query_metrics(sender, connection, **kwargs):
+    """connection_created receiver: time every query run on the new connection"""
+    if _query_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_query_timer)
@@ -0,0 +1,50 @@
+"""
+Token-bucket rate limiter for outbound calls
+"""
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket that makes callers wait instead of failing
+
+    Tokens refill continuously at ``rate`` per second up to ``capacity``, so
+    up to ``capacity`` calls go through back to back and a sustained burst is
+    smoothed out to ``rate``. Waiting callers reserve their token up front,
+    which serves them in arrival order.
+
+    Args:
+        rate: Tokens added per second
+        capacity: Largest burst allowed after an idle period
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: float) -> float:
+        """Take ``tokens`` (possibly into debt); returns how long the caller must wait"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Block until ``tokens`` are available
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
@@ -5,17 +5,55 @@ from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.jobstores.memory import MemoryJobStore
 from apscheduler.executors.pool import ThreadPoolExecutor
 
+from . import metrics
+
+
+class ReminderJobStore(MemoryJobStore):
+    """
+    In-memory job index whose durable source of truth is the Reminder table.
+
+    Pending reminders are rebuilt from the database on boot, so the store only
+    needs to be fast, not persistent. ``add_jobs`` loads a whole batch with a
+    single sort instead of one bisect-and-insert per job.
+
+    This reaches into MemoryJobStore's ``_jobs`` list and ``_jobs_index``
+    dict, which is why APScheduler is pinned in requirements.txt (see
+    reminders.tests.ReminderJobStoreTests).
+    """
+
+    def add_jobs(self, jobs):
+        """Add many jobs at once; a later job replaces an earlier one with the same id"""
+        entries = {}
+        for job, timestamp in jobs:
+            entries[job.id] = (job, timestamp)
+        for job_id in entries.keys() & self._jobs_index.keys():
+            self.remove_job(job_id)
+
+        self._jobs_index.update(entries)
+        self._jobs.extend(entries.values())
+        # Timsort is linear when the batch is already ordered by run time
+        self._jobs.sort(key=lambda entry: (
+            float('inf') if entry[1] is None else entry[1], entry[0].id
+        ))
+
+
 jobstores = {
-    'default': MemoryJobStore()
+    'default': ReminderJobStore()
 }
 
+metrics.gauge(
+    'nexanote_scheduler_jobs', 'Jobs held by the embedded scheduler'
+).set_function(lambda: len(jobstores['default']._jobs))
+
 executors = {
     'default': ThreadPoolExecutor(20)
 }
 
 job_defaults = {
     'coalesce': False,
-    'max_instances': 3
+    'max_instances': 3,
+    # Reminders are durable: a late send beats a silently dropped one
+    'misfire_grace_time': None,
 }
 
 scheduler = BackgroundScheduler(
@@ -25,7 +63,5 @@ scheduler = BackgroundScheduler(
     timezone='Asia/Kolkata'  # IST
 )
 
-# Start scheduler when Django starts (only if not already running)
-if not scheduler.running:
-    scheduler.start()
-
+# The scheduler is started by RemindersConfig.ready() once pending reminders
+# have been loaded back from the database.
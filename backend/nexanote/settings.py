@@ -32,6 +32,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'nexanote.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -62,6 +63,12 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'nexanote.wsgi.application'
 
+# Expose Prometheus metrics at /api/metrics
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+
+# Route the reminder endpoints to their async views (set by nexanote/asgi.py)
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'false').lower() == 'true'
+
 # Database
 DATABASES = {
     'default': {
@@ -70,6 +77,29 @@ DATABASES = {
     }
 }
 
+# SQLite performance profile: "tuned" applies the SQLITE_* settings to every connection and
+# keeps connections open for DB_CONN_MAX_AGE seconds; "default" leaves SQLite's own settings
+DB_PROFILE = os.getenv('DB_PROFILE') or 'tuned'
+# Stored in the database file, so it is only changed when set (WAL in deployments)
+SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE') or ''
+SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS') or 'NORMAL'
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS') or '5000')
+SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE') or '268435456')
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE') or '600')
+if DB_PROFILE == 'tuned':
+    DATABASES['default'].update({
+        # Under ASGI each request may run on a different thread, so persistent connections would pile up
+        'CONN_MAX_AGE': 0 if ASYNC_VIEWS else DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {'timeout': SQLITE_BUSY_TIMEOUT_MS / 1000},
+    })
+
+# Delivery outcomes recorded by scheduler threads are coalesced into one transaction:
+# up to this many writes, collected for at most this many milliseconds (false writes each alone)
+WRITE_COALESCE_ENABLED = os.getenv('WRITE_COALESCE_ENABLED', 'true').lower() == 'true'
+WRITE_COALESCE_MAX_SIZE = int(os.getenv('WRITE_COALESCE_MAX_SIZE') or '500')
+WRITE_COALESCE_WAIT_MS = float(os.getenv('WRITE_COALESCE_WAIT_MS') or '5')
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -98,6 +128,18 @@ STATIC_URL = 'static/'
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Application logs (scheduler, dispatcher, Gemini and cache warnings) go to the console
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'reminders': {'handlers': ['console'], 'level': os.getenv('LOG_LEVEL') or 'INFO'},
+    },
+}
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -114,10 +156,118 @@ SMTP_PORT = int(os.getenv('SMTP_PORT') or '587')
 SMTP_USE_SSL = os.getenv('SMTP_USE_SSL', 'false').lower() == 'true'
 SMTP_USE_STARTTLS = os.getenv('SMTP_USE_STARTTLS', 'true').lower() == 'true'
 SMTP_TIMEOUT_SECONDS = int(os.getenv('SMTP_TIMEOUT_SECONDS') or '30')
+# Authenticated SMTP sessions are pooled and reused across sends
+SMTP_POOL_SIZE = int(os.getenv('SMTP_POOL_SIZE') or '4')
+SMTP_POOL_IDLE_SECONDS = float(os.getenv('SMTP_POOL_IDLE_SECONDS') or '60')
+SMTP_POOL_MAX_MESSAGES = int(os.getenv('SMTP_POOL_MAX_MESSAGES') or '100')
+SMTP_POOL_NOOP_SECONDS = float(os.getenv('SMTP_POOL_NOOP_SECONDS') or '5')
+# Outbound rate limit per process (token bucket; 0 disables): sustained messages/minute and burst size
+SMTP_RATE_PER_MINUTE = float(os.getenv('SMTP_RATE_PER_MINUTE') or '60')
+SMTP_RATE_BURST = float(os.getenv('SMTP_RATE_BURST') or '20')
 
 # Gemini API Configuration
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', '')
 GEMINI_MODEL_NAME = os.getenv('GEMINI_MODEL_NAME') or 'gemini-1.5-flash'  # Options: gemini-1.5-pro, gemini-1.5-flash, gemini-pro
 GEMINI_TEMPERATURE = float(os.getenv('GEMINI_TEMPERATURE') or '0.7')  # 0.0 to 1.0
 GEMINI_MAX_TOKENS = int(os.getenv('GEMINI_MAX_TOKENS') or '2048')  # Maximum response length
+GEMINI_MODEL_INFO_TTL_SECONDS = float(os.getenv('GEMINI_MODEL_INFO_TTL_SECONDS') or '3600')  # Cache for /api/gemini/info
+# Concurrent parses are micro-batched into one prompt: up to this many inputs (1 disables),
+# collected for at most this many milliseconds. Off by default: a batch mixes different users' text
+GEMINI_BATCH_MAX_SIZE = int(os.getenv('GEMINI_BATCH_MAX_SIZE') or '1')
+GEMINI_BATCH_WAIT_MS = float(os.getenv('GEMINI_BATCH_WAIT_MS') or '5')
+# Stream single-input answers and stop reading once a valid object has arrived
+GEMINI_STREAMING = os.getenv('GEMINI_STREAMING', 'true').lower() == 'true'
+# Fallback ladder: models tried after GEMINI_MODEL_NAME (comma-separated), then the
+# rule-based parser; each model step gets the next deadline from GEMINI_STEP_TIMEOUT_SECONDS
+GEMINI_FALLBACK_MODELS = [m.strip() for m in (os.getenv('GEMINI_FALLBACK_MODELS') or '').split(',') if m.strip()]
+GEMINI_STEP_TIMEOUT_SECONDS = [float(t) for t in (os.getenv('GEMINI_STEP_TIMEOUT_SECONDS') or '10,5').split(',')]
+GEMINI_RULES_FALLBACK = os.getenv('GEMINI_RULES_FALLBACK', 'true').lower() == 'true'
+# Per-model circuit breaker: consecutive failures that open it, and seconds before a probe
+GEMINI_BREAKER_FAILURES = int(os.getenv('GEMINI_BREAKER_FAILURES') or '5')
+GEMINI_BREAKER_RESET_SECONDS = float(os.getenv('GEMINI_BREAKER_RESET_SECONDS') or '30')
+# Hedging: a duplicate request goes out once the first has taken the model's p95 latency
+# (GEMINI_HEDGE_DELAY_MS until enough calls are seen, never under GEMINI_HEDGE_MIN_MS)
+GEMINI_HEDGE_ENABLED = os.getenv('GEMINI_HEDGE_ENABLED', 'true').lower() == 'true'
+GEMINI_HEDGE_DELAY_MS = float(os.getenv('GEMINI_HEDGE_DELAY_MS') or '3000')
+GEMINI_HEDGE_MIN_MS = float(os.getenv('GEMINI_HEDGE_MIN_MS') or '250')
+# Threads making Gemini calls for the sync views (lets a caller stop waiting at its deadline)
+GEMINI_CALL_WORKERS = int(os.getenv('GEMINI_CALL_WORKERS') or '32')
+
+# Uploaded invite screenshots: largest accepted upload and decoded size, longest side sent
+# to Gemini, JPEG quality when JPEG beats PNG, and worker processes that preprocess images
+IMAGE_UPLOAD_MAX_BYTES = int(os.getenv('IMAGE_UPLOAD_MAX_BYTES') or '10485760')
+IMAGE_MAX_PIXELS = int(os.getenv('IMAGE_MAX_PIXELS') or '40000000')
+IMAGE_MAX_SIDE = int(os.getenv('IMAGE_MAX_SIDE') or '1536')
+IMAGE_JPEG_QUALITY = int(os.getenv('IMAGE_JPEG_QUALITY') or '85')
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS') or '2')
+
+# Rule-based fast path: inputs it resolves with at least this confidence skip Gemini
+FAST_PARSER_ENABLED = os.getenv('FAST_PARSER_ENABLED', 'true').lower() == 'true'
+FAST_PARSER_MIN_CONFIDENCE = float(os.getenv('FAST_PARSER_MIN_CONFIDENCE') or '0.8')
+
+# Asynchronous schedule requests (202 + job id) are parsed by this many worker threads
+PARSE_WORKERS = int(os.getenv('PARSE_WORKERS') or '8')
+# Seconds before an unfinished parse job counts as abandoned and is run again
+PARSE_JOB_LEASE_SECONDS = float(os.getenv('PARSE_JOB_LEASE_SECONDS') or '600')
+SCHEDULE_ASYNC_DEFAULT = os.getenv('SCHEDULE_ASYNC_DEFAULT', 'false').lower() == 'true'
+
+# Idempotency-Key on the schedule endpoint: how long a finished request is replayed,
+# how long a running one holds its key, and how long a repeat waits for it to finish
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv('IDEMPOTENCY_TTL_SECONDS') or '86400')
+IDEMPOTENCY_LOCK_SECONDS = float(os.getenv('IDEMPOTENCY_LOCK_SECONDS') or '120')
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv('IDEMPOTENCY_WAIT_SECONDS') or '30')
+
+# Bulk schedule requests: threads parsing items in parallel (shared by all requests), and the largest accepted batch
+BULK_PARSE_CONCURRENCY = int(os.getenv('BULK_PARSE_CONCURRENCY') or '8')
+BULK_MAX_ITEMS = int(os.getenv('BULK_MAX_ITEMS') or '100')
+
+# Reminder list: default and maximum page size, and rows fetched per chunk when streaming
+LIST_PAGE_SIZE = int(os.getenv('LIST_PAGE_SIZE') or '50')
+LIST_MAX_PAGE_SIZE = int(os.getenv('LIST_MAX_PAGE_SIZE') or '500')
+LIST_STREAM_CHUNK_SIZE = int(os.getenv('LIST_STREAM_CHUNK_SIZE') or '2000')
+
+# Full-text search ranks only the newest this-many matches, so common words stay fast
+SEARCH_RANK_WINDOW = int(os.getenv('SEARCH_RANK_WINDOW') or '1000')
+
+# iCalendar import: largest accepted file, rows inserted per batch, how far ahead recurring
+# events are expanded, and the most occurrences taken from one event
+ICS_IMPORT_MAX_BYTES = int(os.getenv('ICS_IMPORT_MAX_BYTES') or '104857600')
+ICS_IMPORT_BATCH_SIZE = int(os.getenv('ICS_IMPORT_BATCH_SIZE') or '1000')
+ICS_EXPAND_DAYS = int(os.getenv('ICS_EXPAND_DAYS') or '365')
+ICS_MAX_OCCURRENCES = int(os.getenv('ICS_MAX_OCCURRENCES') or '1000')
+
+# Gemini parse-result cache: in-process LRU backed by a SQLite file
+PARSE_CACHE_ENABLED = os.getenv('PARSE_CACHE_ENABLED', 'true').lower() == 'true'
+PARSE_CACHE_PATH = os.getenv('PARSE_CACHE_PATH') or BASE_DIR / 'parse_cache.sqlite3'
+PARSE_CACHE_MAX_ENTRIES = int(os.getenv('PARSE_CACHE_MAX_ENTRIES') or '1024')
+PARSE_CACHE_TTL_SECONDS = float(os.getenv('PARSE_CACHE_TTL_SECONDS') or '86400')
+
 
+# Scheduler Configuration
+# 'dispatcher': reminders are sent by `manage.py run_dispatcher` worker processes
+# that poll the Reminder table; 'embedded': every web process runs APScheduler
+SCHEDULER_MODE = os.getenv('SCHEDULER_MODE') or 'dispatcher'
+# Dispatcher: rows claimed per poll, idle poll interval, and how long a claim is held
+DISPATCHER_BATCH_SIZE = int(os.getenv('DISPATCHER_BATCH_SIZE') or '100')
+DISPATCHER_POLL_SECONDS = float(os.getenv('DISPATCHER_POLL_SECONDS') or '1')
+DISPATCHER_LEASE_SECONDS = float(os.getenv('DISPATCHER_LEASE_SECONDS') or '300')
+# Port for the dispatcher's Prometheus endpoint (0 = off)
+DISPATCHER_METRICS_PORT = int(os.getenv('DISPATCHER_METRICS_PORT') or '0')
+# Failed sends are retried with exponential backoff and jitter, then dead-lettered
+REMINDER_MAX_ATTEMPTS = int(os.getenv('REMINDER_MAX_ATTEMPTS') or '5')
+REMINDER_RETRY_BASE_SECONDS = float(os.getenv('REMINDER_RETRY_BASE_SECONDS') or '30')
+REMINDER_RETRY_MAX_SECONDS = float(os.getenv('REMINDER_RETRY_MAX_SECONDS') or '3600')
+# Digest mode (opt-in): when a reminder is sent, the receiver's other reminders
+# due within the next DIGEST_WINDOW_SECONDS go out with it as one email
+DIGEST_ENABLED = os.getenv('DIGEST_ENABLED', 'false').lower() == 'true'
+DIGEST_WINDOW_SECONDS = float(os.getenv('DIGEST_WINDOW_SECONDS') or '900')
+# Embedded mode only:
+# Overdue reminders found at startup are replayed at most this many per second
+SCHEDULER_CATCHUP_PER_SECOND = float(os.getenv('SCHEDULER_CATCHUP_PER_SECOND') or '5')
+# Rows fetched per round trip while rebuilding the job store on startup
+SCHEDULER_REHYDRATE_CHUNK_SIZE = int(os.getenv('SCHEDULER_REHYDRATE_CHUNK_SIZE') or '5000')
+# 'single' runs one job per reminder; 'batch' sends every reminder due in the
+# same window over one SMTP session and marks them sent with one UPDATE
+REMINDER_DISPATCH_MODE = os.getenv('REMINDER_DISPATCH_MODE') or 'single'
+REMINDER_BATCH_WINDOW_SECONDS = float(os.getenv('REMINDER_BATCH_WINDOW_SECONDS') or '5')
+REMINDER_BATCH_MAX_SIZE = int(os.getenv('REMINDER_BATCH_MAX_SIZE') or '500')
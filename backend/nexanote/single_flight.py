@@ -0,0 +1,97 @@
+"""
+Single-flight call coalescing
+
+Concurrent calls with the same key share one execution: the first caller
+runs the function and every caller that arrives while it is in flight waits
+for, and gets, the same result or exception. Nothing is kept once the call
+finishes (caching is a separate concern).
+"""
+import asyncio
+import threading
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical calls across threads
+
+    Returns from ``do`` are shared between callers, so they must not be
+    mutated in place.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Run ``fn(*args, **kwargs)`` unless a call for ``key`` is already in flight
+
+        Returns:
+            tuple: (result, True if this caller shared another caller's execution)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+
+class AsyncSingleFlight:
+    """
+    Coalesce concurrent identical coroutine calls
+
+    Calls are only shared between callers on the same event loop. Callers
+    wait on the leader's task through ``asyncio.shield``, so one cancelled
+    caller doesn't cancel the call for the others.
+    """
+
+    def __init__(self):
+        self._tasks = {}
+
+    async def do(self, key, fn, *args, **kwargs):
+        """
+        Await ``fn(*args, **kwargs)`` unless a call for ``key`` is already in flight
+
+        Returns:
+            tuple: (result, True if this caller shared another caller's execution)
+        """
+        slot = (asyncio.get_running_loop(), key)
+        task = self._tasks.get(slot)
+        shared = task is not None
+        if not shared:
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+            self._tasks[slot] = task
+            task.add_done_callback(lambda done: self._finished(slot, done))
+        return await asyncio.shield(task), shared
+
+    def _finished(self, slot, task):
+        self._tasks.pop(slot, None)
+        if not task.cancelled():
+            # Mark the exception retrieved even if every caller was cancelled
+            task.exception()
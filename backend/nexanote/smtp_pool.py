@@ -0,0 +1,275 @@
+"""
+Pooled, long-lived SMTP connections shared by the Django and Flask senders
+
+Opening a connection costs a TCP connect, a TLS handshake and an AUTH round
+trip, and Gmail throttles how often an account may log in. The pool keeps
+authenticated sessions open, probes them with NOOP before reuse and replaces
+them after an idle timeout or a fixed number of messages.
+
+A send that loses its session is retried on a fresh one only if the
+message never reached DATA. Once DATA has begun, the server may have
+accepted the message, so the error is raised as SMTPDataInterrupted
+instead of risking a second copy.
+
+This module has no Django dependency so app.py can import it as well.
+"""
+import os
+import smtplib
+import ssl
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from . import metrics
+
+
+# Errors that mean the session is gone; a send that fails with one before DATA may be retried
+DISCONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+class SMTPDataInterrupted(smtplib.SMTPException):
+    """The session dropped after DATA began, so the message may or may not have been delivered"""
+
+
+class _DataTracking:
+    """Records whether the current message got as far as DATA"""
+    data_started = False
+
+    def data(self, msg):
+        self.data_started = True
+        return super().data(msg)
+
+
+class _SMTP(_DataTracking, smtplib.SMTP):
+    pass
+
+
+class _SMTP_SSL(_DataTracking, smtplib.SMTP_SSL):
+    pass
+
+
+SMTP_SECONDS = metrics.histogram(
+    'nexanote_smtp_seconds', 'Time spent in SMTP operations', ('op',)
+)
+_connect_timer = SMTP_SECONDS.labels('connect')
+_login_timer = SMTP_SECONDS.labels('login')
+_send_timer = SMTP_SECONDS.labels('send')
+
+
+class PooledSMTPConnection:
+    """An authenticated SMTP session plus the bookkeeping used to recycle it"""
+
+    __slots__ = ('server', 'created_at', 'last_used', 'messages_sent')
+
+    def __init__(self, server):
+        now = time.monotonic()
+        self.server = server
+        self.created_at = now
+        self.last_used = now
+        self.messages_sent = 0
+
+    def send_message(self, message):
+        """
+        Raises:
+            SMTPDataInterrupted: The session was lost after DATA began
+        """
+        self.server.data_started = False
+        try:
+            with _send_timer.time():
+                self.server.send_message(message)
+        except DISCONNECT_ERRORS as e:
+            if self.server.data_started:
+                raise SMTPDataInterrupted(f"connection lost during DATA: {e}") from e
+            raise
+        self.messages_sent += 1
+
+
+class SMTPConnectionPool:
+    """
+    Thread-safe pool of authenticated SMTP sessions for one server and account
+
+    Args:
+        host, port: SMTP server address
+        username, password: Credentials passed to ``login()``
+        use_ssl: Connect with implicit TLS (SMTP_SSL)
+        use_starttls: Upgrade a plain connection with STARTTLS (ignored with use_ssl)
+        timeout: Socket timeout in seconds
+        max_size: Maximum number of open sessions; extra callers wait
+        idle_timeout: Close sessions that sat unused longer than this (seconds)
+        max_messages: Close a session after it has sent this many messages
+        noop_after: Probe a session with NOOP before reuse once it has been idle this long
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: str,
+        password: str,
+        use_ssl: bool = False,
+        use_starttls: bool = True,
+        timeout: float = 30,
+        max_size: int = 4,
+        idle_timeout: float = 60,
+        max_messages: int = 100,
+        noop_after: float = 5,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_ssl = use_ssl
+        self.use_starttls = use_starttls
+        self.timeout = timeout
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_messages = max_messages
+        self.noop_after = noop_after
+
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._ssl_context = None
+
+    def _connect(self) -> PooledSMTPConnection:
+        if self._ssl_context is None and (self.use_ssl or self.use_starttls):
+            self._ssl_context = ssl.create_default_context()
+
+        with _connect_timer.time():
+            if self.use_ssl:
+                server = _SMTP_SSL(
+                    self.host, self.port, context=self._ssl_context, timeout=self.timeout
+                )
+            else:
+                server = _SMTP(self.host, self.port, timeout=self.timeout)
+                if self.use_starttls:
+                    server.starttls(context=self._ssl_context)
+        try:
+            with _login_timer.time():
+                server.login(self.username, self.password)
+        except Exception:
+            self._close(server)
+            raise
+        return PooledSMTPConnection(server)
+
+    @staticmethod
+    def _close(server):
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def _is_reusable(self, conn: PooledSMTPConnection) -> bool:
+        now = time.monotonic()
+        if now - conn.last_used > self.idle_timeout:
+            return False
+        if conn.messages_sent >= self.max_messages:
+            return False
+        if now - conn.last_used > self.noop_after:
+            try:
+                return conn.server.noop()[0] == 250
+            except Exception:
+                return False
+        return True
+
+    def _checkout(self) -> PooledSMTPConnection:
+        while True:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                return self._connect()
+            if self._is_reusable(conn):
+                return conn
+            self._close(conn.server)
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow an authenticated session as a ``PooledSMTPConnection``.
+
+        The session goes back to the pool when the block exits normally and
+        is closed if the block raises, so a half-finished SMTP dialogue is
+        never handed to the next caller.
+        """
+        self._slots.acquire()
+        try:
+            conn = self._checkout()
+            try:
+                yield conn
+            except BaseException:
+                self._close(conn.server)
+                raise
+            conn.last_used = time.monotonic()
+            with self._lock:
+                self._idle.append(conn)
+        finally:
+            self._slots.release()
+
+    def send_message(self, message):
+        """Send one message, reconnecting once if the session dropped before DATA"""
+        for attempt in range(2):
+            try:
+                with self.connection() as conn:
+                    conn.send_message(message)
+                return
+            except DISCONNECT_ERRORS:
+                if attempt:
+                    raise
+
+    def close_all(self):
+        """Close every idle session (borrowed sessions close when returned)"""
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for conn in idle:
+            self._close(conn.server)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _env_number(name: str, default, cast=int):
+    value = os.getenv(name)
+    return cast(value) if value else default
+
+
+def get_pool(
+    host: str,
+    port: int,
+    username: str,
+    password: str,
+    use_ssl: bool = False,
+    use_starttls: bool = True,
+    timeout: float = 30,
+    **options,
+) -> SMTPConnectionPool:
+    """
+    Return the process-wide pool for a server/account, creating it on first use.
+
+    Pool options default to the ``SMTP_POOL_SIZE``, ``SMTP_POOL_IDLE_SECONDS``,
+    ``SMTP_POOL_MAX_MESSAGES`` and ``SMTP_POOL_NOOP_SECONDS`` environment
+    variables unless passed explicitly.
+    """
+    key = (host, port, username, password, use_ssl, use_starttls, timeout)
+    pool = _pools.get(key)
+    if pool is not None:
+        return pool
+
+    options.setdefault('max_size', _env_number('SMTP_POOL_SIZE', 4))
+    options.setdefault('idle_timeout', _env_number('SMTP_POOL_IDLE_SECONDS', 60, float))
+    options.setdefault('max_messages', _env_number('SMTP_POOL_MAX_MESSAGES', 100))
+    options.setdefault('noop_after', _env_number('SMTP_POOL_NOOP_SECONDS', 5, float))
+
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = SMTPConnectionPool(
+                host, port, username, password,
+                use_ssl=use_ssl, use_starttls=use_starttls, timeout=timeout, **options
+            )
+            _pools[key] = pool
+    return pool
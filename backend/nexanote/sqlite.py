@@ -0,0 +1,27 @@
+"""
+SQLite connection tuning for DB_PROFILE=tuned
+
+WAL journaling (SQLITE_JOURNAL_MODE=WAL) lets readers (web requests) carry on while a writer (the
+scheduler recording deliveries) holds the write lock, and synchronous=NORMAL
+only syncs at checkpoints instead of on every commit: a power loss can undo
+the last commits but never corrupts the database. Reads go through a memory
+map of up to SQLITE_MMAP_SIZE bytes. The busy timeout is set with the
+connection's ``timeout`` option (see settings.DATABASES).
+"""
+from django.conf import settings
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """connection_created receiver: apply the tuned profile to SQLite connections"""
+    if connection.vendor != 'sqlite' or settings.DB_PROFILE != 'tuned':
+        return
+    with connection.cursor() as cursor:
+        journal_mode = settings.SQLITE_JOURNAL_MODE
+        if journal_mode:
+            # The journal mode is stored in the database file. Setting it waits for the
+            # write lock even when nothing changes, so only do it when it differs
+            cursor.execute("PRAGMA journal_mode")
+            if cursor.fetchone()[0].lower() != journal_mode.lower():
+                cursor.execute(f"PRAGMA journal_mode={journal_mode}")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
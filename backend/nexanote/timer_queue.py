@@ -0,0 +1,113 @@
+"""
+Single-thread timer queue for delayed callbacks
+
+One dispatcher thread sleeps until the earliest deadline in a binary heap and
+hands due callbacks to a bounded worker pool, so the number of threads stays
+fixed no matter how many timers are pending. Used by app.py.
+"""
+import heapq
+import itertools
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TimerQueue:
+    """
+    Priority-queue timer scheduler with cancel and reschedule
+
+    Each pending timer costs one heap entry ``(deadline, seq, timer_id)`` plus
+    one ``timer_id -> (deadline, seq, callback, args)`` index entry. Cancelled
+    or rescheduled timers leave their old heap entry behind; it is recognised
+    by its stale ``seq`` and dropped when it reaches the top, and the heap is
+    compacted once stale entries outnumber live ones.
+
+    Args:
+        max_workers: Size of the pool that runs due callbacks
+        name: Prefix for the dispatcher and worker thread names
+    """
+
+    def __init__(self, max_workers: int = 4, name: str = 'timer-queue'):
+        self.name = name
+        self._heap = []
+        self._timers = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._thread = None
+
+    def __len__(self):
+        return len(self._timers)
+
+    def _ensure_started(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"{self.name}-dispatcher", daemon=True)
+            self._thread.start()
+
+    def _push(self, timer_id, deadline, callback, args):
+        seq = next(self._seq)
+        self._timers[timer_id] = (deadline, seq, callback, args)
+        heapq.heappush(self._heap, (deadline, seq, timer_id))
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._timers):
+            self._compact()
+        # Only wake the dispatcher if this timer is now the earliest one
+        if self._heap[0][1] == seq:
+            self._cond.notify()
+
+    def _compact(self):
+        self._heap = [(deadline, seq, timer_id) for timer_id, (deadline, seq, _, _) in self._timers.items()]
+        heapq.heapify(self._heap)
+
+    def schedule(self, delay_seconds: float, callback, args: tuple = (), timer_id: str = None) -> str:
+        """Run ``callback(*args)`` after ``delay_seconds``; returns the timer id"""
+        timer_id = timer_id or uuid.uuid4().hex
+        deadline = time.monotonic() + max(0.0, delay_seconds)
+        with self._cond:
+            self._ensure_started()
+            self._push(timer_id, deadline, callback, args)
+        return timer_id
+
+    def cancel(self, timer_id: str) -> bool:
+        """Cancel a pending timer; returns False if it is unknown or already fired"""
+        with self._cond:
+            return self._timers.pop(timer_id, None) is not None
+
+    def reschedule(self, timer_id: str, delay_seconds: float) -> bool:
+        """Move a pending timer to fire ``delay_seconds`` from now"""
+        with self._cond:
+            timer = self._timers.get(timer_id)
+            if timer is None:
+                return False
+            _, _, callback, args = timer
+            self._push(timer_id, time.monotonic() + max(0.0, delay_seconds), callback, args)
+            return True
+
+    def remaining(self, timer_id: str):
+        """Seconds until a pending timer fires, or None if it is not pending"""
+        with self._cond:
+            timer = self._timers.get(timer_id)
+        if timer is None:
+            return None
+        return max(0.0, timer[0] - time.monotonic())
+
+    def _run(self):
+        while True:
+            due = []
+            with self._cond:
+                while not due:
+                    now = time.monotonic()
+                    while self._heap and self._heap[0][0] <= now:
+                        deadline, seq, timer_id = heapq.heappop(self._heap)
+                        timer = self._timers.get(timer_id)
+                        if timer is not None and timer[1] == seq:
+                            del self._timers[timer_id]
+                            due.append(timer)
+                    if due:
+                        break
+                    # Sleep until the next deadline, or until a sooner timer is pushed
+                    timeout = self._heap[0][0] - now if self._heap else None
+                    self._cond.wait(timeout)
+
+            for _, _, callback, args in due:
+                self._executor.submit(callback, *args)
@@ -0,0 +1,86 @@
+"""
+Group commit for small writes from many threads
+
+SQLite takes one write lock for the whole database, so threads that each
+commit a one-row update queue up behind each other, paying a lock handoff
+and a commit apiece. A WriteCoalescer gathers the writes that arrive
+together and applies them with one ``flush`` call (one transaction).
+
+The first writer to arrive leads a batch. It waits up to ``max_wait``
+seconds for company, then for the previous batch to finish flushing; writers
+keep joining the batch all that time, so under load batches grow on their
+own while an idle writer is delayed by ``max_wait`` at most. The leader
+flushes from its own thread, and every writer returns once its batch is
+applied (or raises the flush's exception).
+"""
+import threading
+import time
+
+
+class _Batch:
+    __slots__ = ('writes', 'done', 'error')
+
+    def __init__(self, write):
+        self.writes = [write]
+        self.done = threading.Event()
+        self.error = None
+
+
+class WriteCoalescer:
+    """
+    Apply concurrent writes in batches, one batch at a time
+
+    Args:
+        flush: Callable taking a list of writes and applying them together
+        max_size: Largest batch
+        max_wait: Seconds the leader waits for more writes before flushing
+        on_flush: Optional callable given the size of each flushed batch
+    """
+
+    def __init__(self, flush, max_size: int, max_wait: float, on_flush=None):
+        self.flush = flush
+        self.max_size = max_size
+        self.max_wait = max_wait
+        self.on_flush = on_flush
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._open = None
+
+    def submit(self, write):
+        """Queue one write and block until its batch has been flushed"""
+        with self._cond:
+            batch = self._open
+            if batch is not None and len(batch.writes) < self.max_size:
+                batch.writes.append(write)
+                if len(batch.writes) >= self.max_size:
+                    self._cond.notify_all()
+                leader = False
+            else:
+                batch = self._open = _Batch(write)
+                leader = True
+                deadline = time.monotonic() + self.max_wait
+                while len(batch.writes) < self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+        if not leader:
+            batch.done.wait()
+        else:
+            # The batch stays open while the previous one flushes
+            with self._flush_lock:
+                with self._cond:
+                    if self._open is batch:
+                        self._open = None
+                try:
+                    self.flush(batch.writes)
+                    if self.on_flush is not None:
+                        self.on_flush(len(batch.writes))
+                except Exception as e:
+                    batch.error = e
+                finally:
+                    batch.done.set()
+
+        if batch.error is not None:
+            raise batch.error
@@ -1,11 +1,32 @@
 from django.contrib import admin
-from .models import Reminder
+from django.db.models import Q
+from .models import Reminder, ParseJob
+from .search import matching_ids
 
 
 @admin.register(Reminder)
 class ReminderAdmin(admin.ModelAdmin):
-    list_display = ['name', 'scheduled_time', 'receiver_email', 'sent', 'created_at']
-    list_filter = ['sent', 'mode', 'created_at']
+    list_display = ['name', 'scheduled_time', 'receiver_email', 'status', 'attempts', 'created_at']
+    list_filter = ['status', 'sent', 'mode', 'created_at']
     search_fields = ['name', 'receiver_email']
-    readonly_fields = ['created_at', 'json_data']
+    readonly_fields = ['created_at', 'json_data', 'last_error']
 
+    def get_search_results(self, request, queryset, search_term):
+        """Match the full-text index or an exact receiver email instead of LIKE scans over search_fields"""
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        matches = Q(receiver_email=search_term)
+        try:
+            matches |= Q(id__in=matching_ids(search_term))
+        except ValueError:
+            # No words to look up, only the receiver email can match
+            pass
+        return queryset.filter(matches), False
+
+
+@admin.register(ParseJob)
+class ParseJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'status', 'parser', 'receiver_email', 'created_at', 'updated_at']
+    list_filter = ['status', 'parser']
+    readonly_fields = ['created_at', 'updated_at']
@@ -1,4 +1,23 @@
+import logging
+import os
+import sys
+
 from django.apps import AppConfig
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+def _is_serving_process() -> bool:
+    """True for servers loading nexanote.wsgi/asgi and the runserver child, False for anything else"""
+    if 'nexanote.wsgi' in sys.modules or 'nexanote.asgi' in sys.modules:
+        return True
+    argv = sys.argv
+    if len(argv) > 1 and argv[0].endswith('manage.py') and argv[1] == 'runserver':
+        # The autoreloader parent only watches files; its child serves requests
+        return os.environ.get('RUN_MAIN') == 'true' or '--noreload' in argv
+    return False
 
 
 class RemindersConfig(AppConfig):
@@ -6,11 +25,38 @@ class RemindersConfig(AppConfig):
     name = 'reminders'
     
     def ready(self):
-        # Import scheduler to ensure it starts when Django is ready
+        from django.db.backends.signals import connection_created
+        from nexanote.middleware import install_query_metrics
+        from nexanote.sqlite import configure_sqlite
+        connection_created.connect(configure_sqlite, dispatch_uid='nexanote_sqlite_profile')
+        connection_created.connect(install_query_metrics, dispatch_uid='nexanote_query_metrics')
+
+        if not _is_serving_process():
+            return
+
+        if settings.SCHEDULER_MODE == 'embedded':
+            self._start_scheduler()
+
+        from .parse_jobs import start_parse_job_recovery
+        start_parse_job_recovery()
+
+    def _start_scheduler(self):
         try:
-            from nexanote import scheduler
-            if not scheduler.running:
-                scheduler.start()
-        except Exception as e:
-            print(f"Warning: Could not start scheduler: {e}")
+            from nexanote.scheduler import scheduler
+            from .scheduling import rehydrate_scheduler
+            if scheduler.running:
+                return
+
+            # Reload pending reminders so restarts and deploys don't drop them
+            try:
+                counts = rehydrate_scheduler()
+                logger.info(
+                    "Scheduler restored %d pending reminders, %d overdue queued for catch-up",
+                    counts['scheduled'], counts['caught_up']
+                )
+            except Exception:
+                logger.exception("Could not restore pending reminders")
 
+            scheduler.start()
+        except Exception:
+            logger.exception("Could not start scheduler")
@@ -0,0 +1,274 @@
+"""
+Reminder delivery state transitions
+
+Shared by the dispatcher and the embedded scheduler. A failed send is
+retried after an exponential backoff with jitter and dead-lettered once it
+has used up REMINDER_MAX_ATTEMPTS; dead reminders stay out of every
+dispatch query until they are requeued.
+
+With DIGEST_ENABLED, ``deliver`` merges reminders for the same receiver into
+one digest email; the reminders in a digest succeed or fail together.
+
+Outcomes recorded with ``coalesce=True`` (the embedded scheduler's one-job-
+per-reminder sends) go through a WriteCoalescer, so concurrent scheduler
+threads share one transaction instead of taking the write lock in turn.
+"""
+import logging
+import random
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from nexanote import metrics
+from nexanote.smtp_pool import SMTPDataInterrupted
+from nexanote.write_coalescer import WriteCoalescer
+
+from .models import Reminder
+from .email_service import build_digest_message, build_reminder_message, send_messages
+
+
+logger = logging.getLogger(__name__)
+
+
+# Columns needed to render and record a delivery
+DELIVERY_FIELDS = ('id', 'name', 'scheduled_time', 'link', 'receiver_email', 'created_at', 'attempts')
+
+
+SEND_LAG = metrics.histogram(
+    'nexanote_reminder_send_lag_seconds',
+    'How late reminders are delivered (send time minus scheduled_time)',
+    buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 900, 3600),
+)
+DELIVERIES = metrics.counter(
+    'nexanote_reminder_deliveries_total', 'Reminder delivery attempts by outcome', ('outcome',)
+)
+EMAILS = metrics.counter(
+    'nexanote_reminder_emails_total', 'Reminder emails sent, single or digest', ('kind',)
+)
+WRITE_BATCH_SIZE = metrics.histogram(
+    'nexanote_db_write_batch_size', 'Coalesced delivery outcome writes applied per transaction',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512),
+)
+metrics.gauge(
+    'nexanote_reminders_pending', 'Unsent reminders that are not dead-lettered'
+).set_function(lambda: Reminder.objects.unsent().count())
+metrics.gauge(
+    'nexanote_reminders_dead', 'Dead-lettered reminders'
+).set_function(lambda: Reminder.objects.dead().count())
+
+
+def retry_delay(attempts: int) -> float:
+    """
+    Backoff before retry number ``attempts``, in seconds
+
+    Doubles from REMINDER_RETRY_BASE_SECONDS up to REMINDER_RETRY_MAX_SECONDS;
+    the delay is drawn from the upper half of that range so reminders that
+    failed together don't all retry at the same instant.
+    """
+    ceiling = min(
+        settings.REMINDER_RETRY_MAX_SECONDS,
+        settings.REMINDER_RETRY_BASE_SECONDS * 2 ** max(0, attempts - 1)
+    )
+    return random.uniform(ceiling / 2, ceiling)
+
+
+def _claimed(ids, claim_token=None):
+    queryset = Reminder.objects.filter(pk__in=ids)
+    if claim_token is not None:
+        # Only the holder of the lease may record the outcome
+        queryset = queryset.filter(claim_token=claim_token)
+    return queryset
+
+
+def _apply_writes(writes):
+    """
+    Coalescer flush: apply queued ``(ids, claim_token, values)`` updates in one transaction
+
+    Updates that set the same values (every sent=True, say) are merged into one UPDATE.
+    """
+    merged = OrderedDict()
+    for ids, claim_token, values in writes:
+        merged.setdefault((claim_token, tuple(sorted(values.items()))), []).extend(ids)
+    with transaction.atomic():
+        for (claim_token, values), ids in merged.items():
+            _claimed(ids, claim_token).update(**dict(values))
+
+
+_coalescer = None
+_coalescer_lock = threading.Lock()
+
+
+def _get_coalescer() -> WriteCoalescer:
+    global _coalescer
+    if _coalescer is None:
+        with _coalescer_lock:
+            if _coalescer is None:
+                _coalescer = WriteCoalescer(
+                    _apply_writes,
+                    settings.WRITE_COALESCE_MAX_SIZE,
+                    settings.WRITE_COALESCE_WAIT_MS / 1000.0,
+                    on_flush=WRITE_BATCH_SIZE.observe,
+                )
+    return _coalescer
+
+
+def _write(ids, claim_token, values: dict, coalesce: bool) -> int:
+    """Update the claimed rows now, or with the next coalesced batch when ``coalesce`` is set"""
+    if coalesce and settings.WRITE_COALESCE_ENABLED:
+        _get_coalescer().submit((ids, claim_token, values))
+        return len(ids)
+    return _claimed(ids, claim_token).update(**values)
+
+
+def mark_sent(reminders, claim_token: str = None, coalesce: bool = False) -> int:
+    """
+    Record successful deliveries and their lag
+
+    Returns:
+        int: Rows updated (rows submitted, when coalesced)
+    """
+    now = timezone.now()
+    for reminder in reminders:
+        SEND_LAG.observe(max(0.0, (now - reminder.scheduled_time).total_seconds()))
+    DELIVERIES.labels('sent').inc(len(reminders))
+    
+    return _write([r.pk for r in reminders], claim_token, {
+        'sent': True,
+        'status': Reminder.STATUS_SENT,
+        'attempts': F('attempts') + 1,
+        'next_attempt_at': None,
+        'claim_token': None,
+        'lease_expires_at': None,
+    }, coalesce)
+
+
+def mark_failed(reminder: Reminder, error, claim_token: str = None, coalesce: bool = False):
+    """
+    Record a failed delivery and schedule its retry
+
+    A send interrupted after DATA began (SMTPDataInterrupted) may have been
+    delivered, so it is dead-lettered straight away rather than sent again;
+    requeue_dead retries it once someone has checked.
+
+    Returns:
+        datetime: When the reminder may be retried, or None if it was dead-lettered
+    """
+    attempts = reminder.attempts + 1
+    if isinstance(error, SMTPDataInterrupted) or attempts >= settings.REMINDER_MAX_ATTEMPTS:
+        status, retry_at = Reminder.STATUS_DEAD, None
+    else:
+        status = Reminder.STATUS_RETRYING
+        retry_at = timezone.now() + timedelta(seconds=retry_delay(attempts))
+
+    DELIVERIES.labels(status).inc()
+    _write([reminder.pk], claim_token, {
+        'status': status,
+        'attempts': attempts,
+        'last_error': str(error),
+        'next_attempt_at': retry_at,
+        'claim_token': None,
+        'lease_expires_at': None,
+    }, coalesce)
+    reminder.attempts = attempts
+    reminder.status = status
+    reminder.next_attempt_at = retry_at
+    return retry_at
+
+
+def digest_cutoff(now):
+    """Latest scheduled_time a reminder may have to join a digest sent at ``now``"""
+    return now + timedelta(seconds=settings.DIGEST_WINDOW_SECONDS)
+
+
+def group_reminders(reminders) -> list:
+    """
+    Split reminders into the groups that are each sent as one email
+
+    Without DIGEST_ENABLED every reminder is its own group. With it, reminders
+    are grouped by receiver, each group in scheduled order, and the groups
+    ordered by their earliest reminder.
+    """
+    if not settings.DIGEST_ENABLED:
+        return [[reminder] for reminder in reminders]
+    groups = OrderedDict()
+    for reminder in sorted(reminders, key=lambda r: r.scheduled_time):
+        groups.setdefault(reminder.receiver_email, []).append(reminder)
+    return list(groups.values())
+
+
+def _render(group):
+    if len(group) > 1:
+        return build_digest_message(group[0].receiver_email, group)
+    reminder = group[0]
+    return build_reminder_message(
+        receiver_email=reminder.receiver_email,
+        reminder_name=reminder.name,
+        scheduled_time=reminder.scheduled_time,
+        meeting_link=reminder.link,
+        created_at=reminder.created_at
+    )
+
+
+def deliver(reminders, claim_token: str = None) -> dict:
+    """
+    Send a batch of reminders over one SMTP session and record each outcome
+
+    Returns:
+        dict: Counts of sent, failed and dead-lettered reminders, the number
+        of emails sent, and ``retries``: the retry time of each failed reminder
+        that will be tried again
+    """
+    groups = group_reminders(reminders)
+    failures = send_messages([_render(group) for group in groups])
+
+    sent = []
+    emails = 0
+    for index, group in enumerate(groups):
+        if index not in failures:
+            sent.extend(group)
+            emails += 1
+            EMAILS.labels('digest' if len(group) > 1 else 'single').inc()
+    if sent:
+        mark_sent(sent, claim_token=claim_token)
+
+    failed = 0
+    dead = 0
+    retries = []
+    for index, error in failures.items():
+        for reminder in groups[index]:
+            logger.warning("Error sending reminder email for %s: %s", reminder.id, error)
+            failed += 1
+            retry_at = mark_failed(reminder, error, claim_token=claim_token)
+            if retry_at is None:
+                dead += 1
+            else:
+                retries.append(retry_at)
+
+    return {'sent': len(sent), 'failed': failed, 'dead': dead, 'emails': emails, 'retries': retries}
+
+
+def requeue_dead(ids=None) -> list:
+    """
+    Move dead-lettered reminders back to pending with a fresh attempt budget
+
+    Args:
+        ids: Reminder ids to requeue; None requeues every dead reminder
+
+    Returns:
+        list: The requeued Reminder rows
+    """
+    queryset = Reminder.objects.dead()
+    if ids is not None:
+        queryset = queryset.filter(pk__in=ids)
+    requeued = list(queryset.only('id', 'job_id', 'scheduled_time'))
+    if requeued:
+        Reminder.objects.filter(pk__in=[r.pk for r in requeued], status=Reminder.STATUS_DEAD).update(
+            status=Reminder.STATUS_PENDING,
+            attempts=0,
+            next_attempt_at=None,
+        )
+    return requeued
@@ -0,0 +1,175 @@
+"""
+Database-polling reminder dispatcher (``manage.py run_dispatcher``)
+
+The Reminder table is the queue. Each poll claims up to a batch of due,
+unsent rows by stamping them with a random claim token and a lease expiry in
+one conditional UPDATE, so any number of dispatcher processes can run side
+by side: a row is only ever held by one claim at a time. Claimed reminders
+are sent over one SMTP session (throttled by the SMTP rate limiter) and
+their outcome is recorded, guarded by the claim token: failed sends are
+released for a retry after their backoff (see delivery.py). A claim is sent
+in chunks that fit a quarter of the lease at the SMTP rate, and the lease is
+renewed before each chunk, so a slow batch is never reclaimed mid-send. If a
+dispatcher dies mid-batch its rows become claimable again once the lease
+expires; if sending fails outright the claim is released straight away.
+In digest mode a claim also pulls in the same receivers' reminders that are
+due soon (see delivery.deliver).
+"""
+import logging
+import threading
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Case, Value, When
+from django.utils import timezone
+
+from .models import Reminder
+from .delivery import DELIVERY_FIELDS, deliver, digest_cutoff, group_reminders
+from .email_service import _check_email_configured
+
+
+logger = logging.getLogger(__name__)
+
+
+def claim_due_reminders(batch_size: int, lease_seconds: float):
+    """
+    Lease up to ``batch_size`` due reminders to a new claim
+
+    With DIGEST_ENABLED the claim also takes every other reminder of the same
+    receivers due within DIGEST_WINDOW_SECONDS, so they go out in one digest.
+
+    Returns:
+        tuple: (claim token, list of claimed Reminder rows in scheduled order)
+    """
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    candidates = list(
+        Reminder.objects.claimable(now).values_list('id', flat=True)[:batch_size]
+    )
+    if not candidates:
+        return token, []
+
+    lease = {
+        'status': Reminder.STATUS_IN_FLIGHT,
+        'claim_token': token,
+        'lease_expires_at': now + timedelta(seconds=lease_seconds),
+    }
+    # The lease condition is re-checked by the UPDATE itself, so when two
+    # dispatchers pick the same candidates only one of them gets each row
+    Reminder.objects.claimable(now).filter(id__in=candidates).update(**lease)
+
+    if settings.DIGEST_ENABLED:
+        receivers = set(
+            Reminder.objects.filter(claim_token=token).values_list('receiver_email', flat=True)
+        )
+        Reminder.objects.claimable(now, due_by=digest_cutoff(now)).filter(
+            receiver_email__in=receivers
+        ).update(**lease)
+
+    claimed = list(
+        Reminder.objects
+        .filter(claim_token=token, sent=False)
+        .order_by('scheduled_time')
+        .only(*DELIVERY_FIELDS)
+    )
+    return token, claimed
+
+
+def renew_lease(token: str, reminders: list, lease_seconds: float) -> list:
+    """
+    Extend the lease on ``reminders`` from now
+
+    Returns:
+        list: The reminders still held by ``token`` (any others were reclaimed)
+    """
+    ids = [reminder.pk for reminder in reminders]
+    Reminder.objects.filter(claim_token=token, id__in=ids, sent=False).update(
+        lease_expires_at=timezone.now() + timedelta(seconds=lease_seconds)
+    )
+    held = set(Reminder.objects.filter(claim_token=token, id__in=ids, sent=False).values_list('id', flat=True))
+    return [reminder for reminder in reminders if reminder.pk in held]
+
+
+def release_claim(token: str) -> int:
+    """Hand the unsent rows of a claim back to the queue, as they were before it"""
+    return Reminder.objects.filter(claim_token=token, sent=False).update(
+        status=Case(
+            When(attempts=0, then=Value(Reminder.STATUS_PENDING)),
+            default=Value(Reminder.STATUS_RETRYING),
+        ),
+        claim_token=None,
+        lease_expires_at=None,
+    )
+
+
+def _chunks(reminders: list, lease_seconds: float):
+    """Split a claim into whole emails (digest groups), as many as the SMTP rate sends in a quarter lease"""
+    groups = group_reminders(reminders)
+    if settings.SMTP_RATE_PER_MINUTE > 0:
+        per_chunk = max(1, int(lease_seconds / 4 * settings.SMTP_RATE_PER_MINUTE / 60))
+    else:
+        # Unthrottled, nothing slows the claim down: send it as one chunk
+        per_chunk = len(groups)
+    for start in range(0, len(groups), per_chunk):
+        yield [reminder for group in groups[start:start + per_chunk] for reminder in group]
+
+
+def dispatch_batch(batch_size: int = None, lease_seconds: float = None) -> dict:
+    """
+    Claim, send and record one batch of due reminders
+
+    Returns:
+        dict: Counts of claimed, sent, failed and dead-lettered reminders and of emails sent
+
+    Raises:
+        ValueError: Email is not configured (checked before anything is claimed)
+    """
+    batch_size = batch_size or settings.DISPATCHER_BATCH_SIZE
+    lease_seconds = lease_seconds or settings.DISPATCHER_LEASE_SECONDS
+    _check_email_configured()
+
+    token, reminders = claim_due_reminders(batch_size, lease_seconds)
+    totals = {'claimed': len(reminders), 'sent': 0, 'failed': 0, 'dead': 0, 'emails': 0}
+    if not reminders:
+        return totals
+
+    try:
+        for index, chunk in enumerate(_chunks(reminders, lease_seconds)):
+            if index:
+                chunk = renew_lease(token, chunk, lease_seconds)
+                if not chunk:
+                    continue
+            counts = deliver(chunk, claim_token=token)
+            for key in ('sent', 'failed', 'dead', 'emails'):
+                totals[key] += counts[key]
+    except Exception:
+        release_claim(token)
+        raise
+    return totals
+
+
+def run_dispatcher(stop_event: threading.Event = None, batch_size: int = None,
+                   lease_seconds: float = None, poll_seconds: float = None, once: bool = False):
+    """
+    Dispatch due reminders until ``stop_event`` is set
+
+    Full batches are followed straight away by the next claim, so a backlog
+    drains as fast as SMTP allows; otherwise the loop waits ``poll_seconds``.
+    """
+    stop_event = stop_event or threading.Event()
+    batch_size = batch_size or settings.DISPATCHER_BATCH_SIZE
+    poll_seconds = settings.DISPATCHER_POLL_SECONDS if poll_seconds is None else poll_seconds
+
+    while not stop_event.is_set():
+        close_old_connections()
+        try:
+            counts = dispatch_batch(batch_size, lease_seconds)
+        except Exception:
+            logger.exception("Error dispatching reminders")
+            counts = {'claimed': 0}
+        if once:
+            return
+        if counts['claimed'] < batch_size:
+            stop_event.wait(poll_seconds)
@@ -1,15 +1,18 @@
 """
 SMTP Email service for sending reminders
 """
-import os
 import smtplib
-import ssl
+import threading
+from collections import deque
 from email.message import EmailMessage
 from datetime import datetime
 from django.conf import settings
 from django.utils import timezone
 import pytz
 
+from nexanote.rate_limit import TokenBucket
+from nexanote.smtp_pool import get_pool, DISCONNECT_ERRORS, SMTPDataInterrupted
+
 
 def convert_utc_to_ist(utc_datetime: datetime) -> datetime:
     """Convert UTC datetime to IST (Indian Standard Time)"""
@@ -22,22 +25,70 @@ def convert_utc_to_ist(utc_datetime: datetime) -> datetime:
     return ist_datetime
 
 
-def send_reminder_email(
+def get_smtp_pool():
+    """Shared SMTP connection pool for the configured sender account"""
+    return get_pool(
+        settings.SMTP_HOST,
+        settings.SMTP_PORT,
+        settings.EMAIL_SENDER,
+        settings.EMAIL_PASSWORD,
+        use_ssl=settings.SMTP_USE_SSL,
+        use_starttls=settings.SMTP_USE_STARTTLS,
+        timeout=settings.SMTP_TIMEOUT_SECONDS,
+        max_size=settings.SMTP_POOL_SIZE,
+        idle_timeout=settings.SMTP_POOL_IDLE_SECONDS,
+        max_messages=settings.SMTP_POOL_MAX_MESSAGES,
+        noop_after=settings.SMTP_POOL_NOOP_SECONDS,
+    )
+
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_smtp_rate_limiter():
+    """
+    Process-wide outbound SMTP rate limiter, or None when SMTP_RATE_PER_MINUTE is 0
+    
+    Every reminder send takes a token first, so bursts are spread out to the
+    provider's sustainable rate instead of being rejected.
+    """
+    global _rate_limiter
+    if settings.SMTP_RATE_PER_MINUTE <= 0:
+        return None
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = TokenBucket(
+                    settings.SMTP_RATE_PER_MINUTE / 60.0,
+                    settings.SMTP_RATE_BURST
+                )
+    return _rate_limiter
+
+
+def _throttle():
+    limiter = get_smtp_rate_limiter()
+    if limiter is not None:
+        limiter.acquire()
+
+
+def _check_email_configured():
+    if not settings.EMAIL_SENDER or not settings.EMAIL_PASSWORD:
+        raise ValueError("Email configuration not set. Please configure EMAIL_SENDER and EMAIL_PASSWORD")
+
+
+def build_reminder_message(
     receiver_email: str,
     reminder_name: str,
     scheduled_time: datetime,
     meeting_link: str = None,
     created_at: datetime = None
-):
+) -> EmailMessage:
     """
-    Send email reminder using SMTP
+    Render a reminder email
     Format: "You scheduled a reminder [name] at [created_at], it is going to be conducted on [link]"
     """
     sender_email = settings.EMAIL_SENDER
-    sender_password = settings.EMAIL_PASSWORD
-    
-    if not sender_email or not sender_password:
-        raise ValueError("Email configuration not set. Please configure EMAIL_SENDER and EMAIL_PASSWORD")
     
     # Convert times to IST for display
     if created_at:
@@ -75,28 +126,123 @@ Created At: {created_at_ist.strftime('%Y-%m-%d %H:%M:%S IST')}
     message["Subject"] = subject
     message.set_content(body)
     
-    # Send email
-    host = settings.SMTP_HOST
-    port = settings.SMTP_PORT
-    use_ssl = settings.SMTP_USE_SSL
-    use_starttls = settings.SMTP_USE_STARTTLS
-    timeout = settings.SMTP_TIMEOUT_SECONDS
-    
-    try:
-        if use_ssl:
-            context = ssl.create_default_context()
-            with smtplib.SMTP_SSL(host, port, context=context, timeout=timeout) as server:
-                server.login(sender_email, sender_password)
-                server.send_message(message)
-        else:
-            with smtplib.SMTP(host, port, timeout=timeout) as server:
-                if use_starttls:
-                    context = ssl.create_default_context()
-                    server.starttls(context=context)
-                server.login(sender_email, sender_password)
-                server.send_message(message)
-        
-        return True
-    except Exception as e:
-        raise Exception(f"Failed to send email: {str(e)}")
+    return message
+
+
+def build_digest_message(receiver_email: str, reminders: list) -> EmailMessage:
+    """
+    Render one email covering several reminders for the same receiver
+
+    Args:
+        receiver_email: Recipient of every reminder in the digest
+        reminders: Objects with ``name``, ``scheduled_time`` and ``link``, in the order to list them
+    """
+    times_ist = []
+    for reminder in reminders:
+        scheduled_time = reminder.scheduled_time
+        if scheduled_time.tzinfo is None:
+            scheduled_time = pytz.UTC.localize(scheduled_time)
+        times_ist.append(convert_utc_to_ist(scheduled_time))
+
+    subject = (
+        f"You have {len(reminders)} upcoming reminders from "
+        f"{times_ist[0].strftime('%Y-%m-%d %H:%M IST')}"
+    )
+
+    body = "Hello,\n\nYour upcoming reminders:\n"
+    for reminder, time_ist in zip(reminders, times_ist):
+        body += f"\n- {reminder.name}\n  Scheduled Time: {time_ist.strftime('%Y-%m-%d %H:%M:%S IST')}\n"
+        if reminder.link:
+            body += f"  Link: {reminder.link}\n"
+
+    body += "\nThis is an automated reminder from NexaNote."
+
+    message = EmailMessage()
+    message["From"] = settings.EMAIL_SENDER
+    message["To"] = receiver_email
+    message["Subject"] = subject
+    message.set_content(body)
+
+    return message
+
+
+def send_reminder_email(
+    receiver_email: str,
+    reminder_name: str,
+    scheduled_time: datetime,
+    meeting_link: str = None,
+    created_at: datetime = None
+):
+    """
+    Send email reminder using SMTP
+    Format: "You scheduled a reminder [name] at [created_at], it is going to be conducted on [link]"
+    """
+    _check_email_configured()
+    
+    message = build_reminder_message(
+        receiver_email=receiver_email,
+        reminder_name=reminder_name,
+        scheduled_time=scheduled_time,
+        meeting_link=meeting_link,
+        created_at=created_at
+    )
+    
+    # Send email over a pooled, already-authenticated session. Errors are raised
+    # as they are, so callers can tell SMTPDataInterrupted from other failures
+    _throttle()
+    get_smtp_pool().send_message(message)
+    
+    return True
+
+
+def send_messages(messages: list) -> dict:
+    """
+    Send many messages over a single pooled SMTP session
+    
+    A message the server rejects is recorded and the session moves on to the
+    next one. If the session drops, the batch resumes on a fresh session and
+    the interrupted message is retried once, unless it had reached DATA (the
+    server may have accepted it): then it is recorded as failed.
+    
+    Returns:
+        dict: Index of each failed message -> the exception it raised
+    """
+    _check_email_configured()
+    
+    pool = get_smtp_pool()
+    queue = deque(enumerate(messages))
+    failures = {}
+    interrupted = None
+    
+    while queue:
+        session_open = False
+        try:
+            with pool.connection() as conn:
+                session_open = True
+                while queue:
+                    index, message = queue[0]
+                    _throttle()
+                    try:
+                        conn.send_message(message)
+                    except (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException) as e:
+                        failures[index] = e
+                    queue.popleft()
+        except Exception as e:
+            if isinstance(e, SMTPDataInterrupted):
+                failures[queue.popleft()[0]] = e
+                continue
+            if session_open and isinstance(e, DISCONNECT_ERRORS):
+                index = queue[0][0]
+                if interrupted == index:
+                    failures[index] = e
+                    queue.popleft()
+                interrupted = index
+                continue
+            # No session could be opened (bad credentials, DNS, ...) or it
+            # failed in an unexpected way: give up on the rest of the batch
+            for index, _ in queue:
+                failures[index] = e
+            queue.clear()
+    
+    return failures
 
@@ -0,0 +1,266 @@
+"""
+Deterministic rule-based parser for short, structured meeting inputs
+
+Handles inputs like a meeting link plus "tomorrow 5pm", or
+"Standup today 10:30 am", without a round trip to Gemini. Known meeting
+providers are recognised from their URLs, dates and times are resolved
+against the current time in IST, and every result carries a confidence score
+so anything ambiguous can still be sent to the LLM.
+"""
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta, time as dt_time
+from typing import Optional
+
+import pytz
+
+from .schemas import MeetingReminderSchema
+
+
+IST = pytz.timezone('Asia/Kolkata')
+
+# (application name, URL pattern) for providers we can recognise from a link alone
+PROVIDER_PATTERNS = (
+    ('Zoom', re.compile(r'https?://(?:[\w-]+\.)?zoom\.us/(?:j|my|w|s)/[^\s<>"\']+', re.I)),
+    ('Google Meet', re.compile(r'https?://meet\.google\.com/[a-z]{3}-[a-z]{4}-[a-z]{3}[^\s<>"\']*', re.I)),
+    ('Microsoft Teams', re.compile(r'https?://teams\.(?:microsoft|live)\.com/(?:l/meetup-join|meet)/[^\s<>"\']+', re.I)),
+    ('Webex', re.compile(r'https?://[\w-]+\.webex\.com/[^\s<>"\']+', re.I)),
+)
+GENERIC_URL = re.compile(r'https?://[^\s<>"\']+', re.I)
+
+# Provider names mentioned in plain text ("on zoom", "via Teams")
+APPLICATION_WORDS = re.compile(r'\b(zoom|google meet|gmeet|microsoft teams|ms teams|teams|webex)\b', re.I)
+APPLICATION_NAMES = {
+    'zoom': 'Zoom',
+    'google meet': 'Google Meet',
+    'gmeet': 'Google Meet',
+    'microsoft teams': 'Microsoft Teams',
+    'ms teams': 'Microsoft Teams',
+    'teams': 'Microsoft Teams',
+    'webex': 'Webex',
+}
+
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12,
+}
+_MONTH = r'(?P<month>jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sept?(?:ember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?'
+WEEKDAYS = {
+    'mon': 0, 'tue': 1, 'wed': 2, 'thu': 3, 'fri': 4, 'sat': 5, 'sun': 6,
+}
+_WEEKDAY = r'(?P<weekday>mon(?:day)?|tue(?:s|sday)?|wed(?:nesday)?|thu(?:r|rs|rsday)?|fri(?:day)?|sat(?:urday)?|sun(?:day)?)'
+
+DATE_PATTERNS = (
+    ('iso', re.compile(r'\b(?P<year>\d{4})-(?P<month>\d{1,2})-(?P<day>\d{1,2})\b')),
+    # Day-first numeric dates, as written in India
+    ('dmy', re.compile(r'\b(?P<day>\d{1,2})[/.](?P<month>\d{1,2})[/.](?P<year>\d{2}|\d{4})\b')),
+    ('day_month', re.compile(r'\b(?P<day>\d{1,2})(?:st|nd|rd|th)?\s+(?:of\s+)?' + _MONTH + r'(?:,?\s+(?P<year>\d{4}))?\b', re.I)),
+    ('month_day', re.compile(r'\b' + _MONTH + r'\s+(?P<day>\d{1,2})(?:st|nd|rd|th)?(?:,?\s+(?P<year>\d{4}))?\b', re.I)),
+    ('relative', re.compile(r'\b(?P<relative>day after tomorrow|tomorrow|today|tonight)\b', re.I)),
+    ('weekday', re.compile(r'\b(?:(?P<qualifier>next|this|on|coming)\s+)?' + _WEEKDAY + r'\b', re.I)),
+)
+
+TIME_PATTERNS = (
+    ('ampm', re.compile(r'(?:\b(?:at|by|from)\s+|@\s*)?\b(?P<hour>1[0-2]|0?[1-9])(?:[:.](?P<minute>[0-5]\d))?\s*(?P<meridiem>[ap])\.?\s?m\b\.?', re.I)),
+    ('clock', re.compile(r'(?:\b(?:at|by|from)\s+|@\s*)?\b(?P<hour>[01]?\d|2[0-3]):(?P<minute>[0-5]\d)\b(?!\s*[ap]\.?\s?m\b)(?:\s*(?:hrs|hours|ist)\b)?', re.I)),
+    ('named', re.compile(r'(?:\b(?:at)\s+)?\b(?P<named>noon|midday|midnight)\b', re.I)),
+)
+
+# Connector words left dangling at the edges once dates, times and links are removed
+EDGE_FILLER = re.compile(
+    r'^(?:[\s,;:\-–|@]+|(?:at|on|for|by|from|via|in|and|the|link|join|is|scheduled)\b)+'
+    r'|(?:[\s,;:\-–|@]+|\b(?:at|on|for|by|from|via|in|and|the|link|join|is|scheduled))+$',
+    re.I
+)
+# The zone times are resolved in, so naming it adds nothing to the meeting name
+IST_WORDS = re.compile(r'\b(?:ist|india(?:n)? standard time)\b', re.I)
+OFFLINE_WORDS = re.compile(r'\b(offline|in[- ]person|office|room|cafeteria|venue|hall)\b', re.I)
+
+# Left in the name, these mean part of the input went unread: a time zone other than
+# IST, a relative date, a recurrence or a cancellation. Such results go to the LLM
+UNRESOLVED_WORDS = re.compile(
+    r'\b(utc|gmt|[pmce][sd]t|[pmce]t|bst|cest?|eet|aest|jst|sgt|'
+    r'next|last|weeks?|weekend|months?|years?|fortnight|later|ago|'
+    r'every|each|daily|weekly|monthly|yearly|annually|recurring|alternate|'
+    r'cancel(?:l?ed)?|postponed?|rescheduled?|called off|moved)\b',
+    re.I
+)
+# Confidence given to results with unread parts, below any sensible FAST_PARSER_MIN_CONFIDENCE
+UNRESOLVED_CONFIDENCE = 0.4
+
+
+@dataclass
+class FastParseResult:
+    """Outcome of the rule-based parser; ``data`` is None when nothing usable was found"""
+    data: Optional[dict]
+    confidence: float
+
+
+def _find_single(patterns, text: str):
+    """
+    Find the one date/time expression in ``text``.
+
+    Returns (kind, match) for a single match, (None, None) when there is no
+    match and ('ambiguous', None) when more than one expression is present.
+    """
+    found = []
+    for kind, pattern in patterns:
+        for match in pattern.finditer(text):
+            if not any(match.start() < m.end() and m.start() < match.end() for _, m in found):
+                found.append((kind, match))
+    if not found:
+        return None, None
+    if len(found) > 1:
+        return 'ambiguous', None
+    return found[0]
+
+
+def _strip(text: str, match) -> str:
+    return f"{text[:match.start()]} {text[match.end():]}"
+
+
+def _resolve_date(kind: str, match, now: datetime):
+    """Resolve a date match to a calendar date, relative to ``now`` in IST"""
+    today = now.date()
+    if kind == 'relative':
+        word = match.group('relative').lower()
+        offset = {'today': 0, 'tonight': 0, 'tomorrow': 1, 'day after tomorrow': 2}[word]
+        return today + timedelta(days=offset)
+    if kind == 'weekday':
+        target = WEEKDAYS[match.group('weekday')[:3].lower()]
+        days_ahead = (target - today.weekday()) % 7
+        qualifier = (match.group('qualifier') or '').lower()
+        if days_ahead == 0 and qualifier == 'next':
+            days_ahead = 7
+        return today + timedelta(days=days_ahead)
+
+    month = match.group('month')
+    month = int(month) if month.isdigit() else MONTHS[month[:3].lower()]
+    day = int(match.group('day'))
+    year = match.group('year')
+    if year:
+        year = int(year)
+        if year < 100:
+            year += 2000
+        return datetime(year, month, day).date()
+
+    # No year: the next time this day comes round
+    candidate = datetime(today.year, month, day).date()
+    if candidate < today:
+        candidate = datetime(today.year + 1, month, day).date()
+    return candidate
+
+
+def _resolve_time(kind: str, match) -> dt_time:
+    if kind == 'named':
+        return dt_time(0, 0) if match.group('named').lower() == 'midnight' else dt_time(12, 0)
+    hour = int(match.group('hour'))
+    minute = int(match.group('minute') or 0)
+    if kind == 'ampm':
+        hour %= 12
+        if match.group('meridiem').lower() == 'p':
+            hour += 12
+    return dt_time(hour, minute)
+
+
+def fast_parse(user_input: str, now: datetime = None) -> FastParseResult:
+    """
+    Try to extract a meeting from ``user_input`` without the LLM
+
+    Args:
+        user_input: Raw text or link from the user
+        now: Reference time (defaults to the current time); relative dates resolve in IST
+
+    Returns:
+        FastParseResult: Validated meeting data (or None) with a 0-1 confidence
+    """
+    now = (now or datetime.now(IST)).astimezone(IST)
+    text = ' '.join(user_input.split())
+
+    # Links first, so their digits and slashes are never read as dates or times
+    link = None
+    applications = None
+    for name, pattern in PROVIDER_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            link, applications = match.group(0).rstrip('.,;)'), name
+            break
+    if link is None:
+        match = GENERIC_URL.search(text)
+        if match:
+            link = match.group(0).rstrip('.,;)')
+    text = GENERIC_URL.sub(' ', text)
+
+    date_kind, date_match = _find_single(DATE_PATTERNS, text)
+    if date_kind == 'ambiguous':
+        return FastParseResult(None, 0.0)
+    if date_match:
+        text = _strip(text, date_match)
+
+    time_kind, time_match = _find_single(TIME_PATTERNS, text)
+    if time_kind is None or time_kind == 'ambiguous':
+        # Without exactly one explicit time there is nothing safe to schedule
+        return FastParseResult(None, 0.0)
+    text = _strip(text, time_match)
+
+    try:
+        meeting_time = _resolve_time(time_kind, time_match)
+        if date_match:
+            meeting_date = _resolve_date(date_kind, date_match, now)
+            if date_kind == 'weekday' and datetime.combine(meeting_date, meeting_time) <= now.replace(tzinfo=None):
+                # Today's weekday at an hour already gone means the same day next week
+                meeting_date += timedelta(days=7)
+        else:
+            meeting_date = now.date()
+            if meeting_time <= now.time().replace(tzinfo=None):
+                meeting_date += timedelta(days=1)
+        scheduled = IST.localize(datetime.combine(meeting_date, meeting_time))
+    except (ValueError, KeyError):
+        return FastParseResult(None, 0.0)
+
+    app_match = APPLICATION_WORDS.search(text)
+    if app_match:
+        if applications is None:
+            applications = APPLICATION_NAMES[app_match.group(1).lower()]
+        text = _strip(text, app_match)
+
+    mode = 'online' if (link or applications) else None
+    if mode is None and OFFLINE_WORDS.search(text):
+        mode = 'offline'
+    text = IST_WORDS.sub(' ', text)
+
+    # Whatever is left over, minus connector words, is the meeting name
+    name = ' '.join(text.split())
+    previous = None
+    while name != previous:
+        previous = name
+        name = EDGE_FILLER.sub('', name).strip()
+
+    confidence = 0.6
+    confidence += 0.2 if date_match else 0.1
+    if re.search(r'[A-Za-z]{2,}', name):
+        confidence += 0.2
+        if len(name.split()) > 8:
+            # Long free text usually hides details the rules can't see
+            confidence -= 0.4
+    elif applications:
+        name = f"{applications} meeting"
+        confidence += 0.1
+    else:
+        name = 'Meeting'
+    if re.search(r'\d', name) or UNRESOLVED_WORDS.search(name):
+        # Numbers left over are usually a date or time the patterns didn't recognise
+        confidence = min(confidence, UNRESOLVED_CONFIDENCE)
+    if scheduled <= now:
+        # "today 10am" said at 11am, or a date already gone: likely a misreading
+        confidence = min(confidence, UNRESOLVED_CONFIDENCE)
+
+    data = MeetingReminderSchema(
+        name=name,
+        time=scheduled,
+        mode=mode,
+        applications=applications,
+        location=None,
+        link=link,
+    ).model_dump()
+    return FastParseResult(data, round(min(confidence, 1.0), 2))
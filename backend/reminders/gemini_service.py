@@ -1,102 +1,908 @@
 """
 Gemini Multimodal LLM service for parsing meeting information
 """
-import os
+import asyncio
 import json
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
 import google.generativeai as genai
 from django.conf import settings
+from nexanote import metrics
+from nexanote.circuit_breaker import CircuitBreaker
 from .schemas import MeetingReminderSchema
+from .json_stream import JSONObjectStream
+from .parse_cache import get_parse_cache, is_cacheable
+
+
+logger = logging.getLogger(__name__)
+
+
+# The instruction block and schema never change at runtime, so they are
+# rendered once. Keeping the prefix byte-identical across requests (with the
+# user input last) also lets server-side prefix caching reuse it.
+_INSTRUCTIONS = f"""You are a meeting information parser. Extract meeting details from the user input (which can be text or a meeting link).
+
+Extract the following information:
+- name: Name/title of the meeting
+- time: Scheduled time (convert to ISO 8601 format, assume IST timezone if not specified)
+- mode: "online" or "offline" (optional)
+- applications: Applications/platforms used like Zoom, Google Meet, Teams, etc. (optional)
+- location: Physical location if offline, or URL if online (optional)
+- link: Meeting link/URL if available (optional)
+
+IMPORTANT: You MUST return ONLY valid JSON that matches this exact schema:
+{json.dumps(MeetingReminderSchema.model_json_schema(), indent=2)}
+
+"""
+
+PROMPT_PREFIX = f"""{_INSTRUCTIONS}Return ONLY the JSON object, no additional text or markdown formatting.
+
+"""
+
+# Several inputs in one call share the instruction block above
+BATCH_PROMPT_PREFIX = f"""{_INSTRUCTIONS}The user inputs below are a JSON array of independent inputs. Return ONLY a JSON array with exactly one object per input, in the same order, each matching the schema above, no additional text or markdown formatting.
+
+"""
+
+
+def build_prompt(user_input: str) -> str:
+    """Append the user input to the precompiled prompt prefix"""
+    return f"{PROMPT_PREFIX}User Input: {user_input}\n"
+
+
+def build_image_prompt(image_data: bytes, mime_type: str, note: str = '') -> list:
+    """Prompt parts for a screenshot of an invite: the shared prefix, then the image"""
+    caption = f"the attached image of a meeting invite. {note}" if note else "the attached image of a meeting invite"
+    return [f"{PROMPT_PREFIX}User Input: {caption}\n", {'mime_type': mime_type, 'data': image_data}]
+
+
+def build_batch_prompt(user_inputs: list) -> str:
+    """Prompt asking for one JSON object per input, as a JSON array in input order"""
+    return f"{BATCH_PROMPT_PREFIX}User Inputs: {json.dumps(user_inputs, ensure_ascii=False)}\n"
+
+
+GEMINI_SECONDS = metrics.histogram(
+    'nexanote_gemini_request_seconds', 'Gemini generate_content latency', ('mode', 'outcome')
+)
+GEMINI_TOKENS = metrics.counter(
+    'nexanote_gemini_tokens_total', 'Gemini tokens used', ('kind',)
+)
+GEMINI_STREAM_STOPS = metrics.counter(
+    'nexanote_gemini_stream_stops_total',
+    'Streamed single-input parses, by whether they stopped early on a valid object or read to the end',
+    ('how',)
+)
+GEMINI_HEDGES = metrics.counter(
+    'nexanote_gemini_hedged_total', 'Duplicate Gemini requests sent because the first was slower than the hedge delay'
+)
+GEMINI_LADDER = metrics.counter(
+    'nexanote_gemini_ladder_steps_total', 'Fallback ladder steps by model and outcome', ('model', 'outcome')
+)
+GEMINI_BATCH_SIZE = metrics.histogram(
+    'nexanote_gemini_batch_size', 'Parse requests sent per Gemini call', buckets=(1, 2, 4, 8, 16, 32)
+)
+GEMINI_BATCH_FALLBACKS = metrics.counter(
+    'nexanote_gemini_batch_fallbacks_total', 'Batched inputs re-parsed on their own after a bad batch answer'
+)
 
 
-def get_gemini_model():
+def _record_call(mode: str, started: float, response=None, error: bool = False):
+    GEMINI_SECONDS.labels(mode, 'error' if error else 'ok').observe(time.perf_counter() - started)
+    usage = getattr(response, 'usage_metadata', None)
+    if usage is not None:
+        GEMINI_TOKENS.labels('prompt').inc(getattr(usage, 'prompt_token_count', 0) or 0)
+        GEMINI_TOKENS.labels('output').inc(getattr(usage, 'candidates_token_count', 0) or 0)
+
+
+_models = {}
+_models_lock = threading.Lock()
+_configured_api_key = None
+
+
+def configure_gemini() -> str:
     """
-    Get configured Gemini model instance
+    Configure the Gemini SDK once per process (again only if the API key changes)
+    
+    Returns:
+        str: The configured API key
     """
+    global _configured_api_key
     api_key = settings.GEMINI_API_KEY
     
     if not api_key:
         raise ValueError("GEMINI_API_KEY not configured in environment variables")
     
-    # Configure Gemini
-    genai.configure(api_key=api_key)
+    if api_key != _configured_api_key:
+        with _models_lock:
+            if api_key != _configured_api_key:
+                genai.configure(api_key=api_key)
+                _models.clear()
+                _configured_api_key = api_key
+    
+    return api_key
+
+
+def get_gemini_model(model_name: str = None, temperature: float = None, max_tokens: int = None):
+    """
+    Get configured Gemini model instance
+    
+    Models are built once per (model, temperature, max_tokens) and shared by
+    every request thread; arguments default to the configured settings.
+    """
+    configure_gemini()
     
     # Get model configuration from settings
-    model_name = settings.GEMINI_MODEL_NAME
-    temperature = settings.GEMINI_TEMPERATURE
-    max_tokens = settings.GEMINI_MAX_TOKENS
+    model_name = model_name or settings.GEMINI_MODEL_NAME
+    temperature = settings.GEMINI_TEMPERATURE if temperature is None else temperature
+    max_tokens = max_tokens or settings.GEMINI_MAX_TOKENS
     
-    # Create generation config
-    generation_config = {
-        "temperature": temperature,
-        "max_output_tokens": max_tokens,
-    }
+    key = (model_name, temperature, max_tokens)
+    model = _models.get(key)
+    if model is not None:
+        return model
     
-    # Initialize model with configuration
-    model = genai.GenerativeModel(
-        model_name=model_name,
-        generation_config=generation_config
-    )
+    with _models_lock:
+        model = _models.get(key)
+        if model is None:
+            # Create generation config
+            generation_config = {
+                "temperature": temperature,
+                "max_output_tokens": max_tokens,
+            }
+            
+            # Initialize model with configuration
+            model = genai.GenerativeModel(
+                model_name=model_name,
+                generation_config=generation_config
+            )
+            _models[key] = model
     
     return model
 
 
-def parse_meeting_input(user_input: str) -> dict:
+def _cached_result(user_input: str):
+    """Look up a parse cached from the primary model; returns (cache or None, cached result or None)"""
+    cache = get_parse_cache()
+    if cache is None or not is_cacheable(user_input):
+        return None, None
+    return cache, cache.get(cache.make_key(user_input, settings.GEMINI_MODEL_NAME, settings.GEMINI_TEMPERATURE))
+
+
+def _cache_result(cache, user_input: str, model_name: str, result: dict):
+    """Store a parse under the model that answered, so fallback answers never pass for the primary's"""
+    if cache is not None:
+        cache.set(cache.make_key(user_input, model_name, settings.GEMINI_TEMPERATURE), result)
+
+
+def _strip_code_fence(response_text: str) -> str:
+    response_text = response_text.strip()
+    
+    # Remove markdown code blocks if present
+    if response_text.startswith('```'):
+        lines = response_text.split('\n')
+        response_text = '\n'.join(lines[1:-1]) if lines[-1].strip() == '```' else '\n'.join(lines[1:])
+        response_text = response_text.replace('```json', '').replace('```', '').strip()
+    
+    return response_text
+
+
+def parse_response_text(response_text: str) -> dict:
     """
-    Parse user input (text or link) using Gemini Multimodal LLM
-    Returns validated Pydantic JSON schema
+    Turn raw model output into validated meeting data
+    
+    Raises:
+        json.JSONDecodeError: The output is not JSON
+        pydantic.ValidationError: The JSON does not match MeetingReminderSchema
+    """
+    # Parse JSON
+    parsed_data = json.loads(_strip_code_fence(response_text))
+    
+    # Validate with Pydantic schema
+    validated_data = MeetingReminderSchema(**parsed_data)
+    return validated_data.model_dump()
+
+
+def parse_batch_response_text(response_text: str, count: int) -> list:
+    """
+    Turn the answer to a batch prompt into validated meeting data per input
+    
+    Returns:
+        list: ``count`` entries in input order; None where an element did not validate
+        
+    Raises:
+        ValueError: The output is not a JSON array of ``count`` elements
+    """
+    parsed = json.loads(_strip_code_fence(response_text))
+    if not isinstance(parsed, list) or len(parsed) != count:
+        raise ValueError(f"Expected a JSON array of {count} objects")
+    
+    results = []
+    for element in parsed:
+        try:
+            results.append(MeetingReminderSchema(**element).model_dump())
+        except Exception:
+            results.append(None)
+    return results
+
+
+class _PendingParse:
+    __slots__ = ('user_input', 'done', 'result', 'error')
+    
+    def __init__(self, user_input: str):
+        self.user_input = user_input
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """
+    Collects concurrent parse requests into one Gemini call
+    
+    The first request to arrive leads a batch: it waits up to ``max_wait``
+    seconds (or until ``max_size`` requests have joined), then runs
+    ``run_batch`` on every input in the batch from its own thread and hands
+    each waiting caller its element. Requests that arrive meanwhile start the
+    next batch, so at most one window of latency is added.
     
     Args:
-        user_input: Text description or meeting link
+        run_batch: Callable taking a list of inputs and returning one result per input
+        max_size: Largest batch
+        max_wait: Seconds the leader waits for more requests
+    """
+    
+    def __init__(self, run_batch, max_size: int, max_wait: float):
+        self.run_batch = run_batch
+        self.max_size = max_size
+        self.max_wait = max_wait
+        self._cond = threading.Condition()
+        self._open = None
+    
+    def submit(self, user_input: str):
+        """Queue one input and block until its batch has run; returns its result"""
+        item = _PendingParse(user_input)
+        with self._cond:
+            batch = self._open
+            leader = batch is None or len(batch) >= self.max_size
+            if leader:
+                batch = self._open = [item]
+                deadline = time.monotonic() + self.max_wait
+                while len(batch) < self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._open is batch:
+                    self._open = None
+            else:
+                batch.append(item)
+                if len(batch) >= self.max_size:
+                    self._cond.notify_all()
         
+        if leader:
+            try:
+                results = self.run_batch([pending.user_input for pending in batch])
+                for pending, result in zip(batch, results):
+                    pending.result = result
+            except Exception as e:
+                for pending in batch:
+                    pending.error = e
+            finally:
+                for pending in batch:
+                    pending.done.set()
+        else:
+            item.done.wait()
+        
+        if item.error is not None:
+            raise item.error
+        return item.result
+
+
+class AsyncMicroBatcher:
+    """
+    Event-loop counterpart of MicroBatcher for the async views
+    
+    Batches are collected per event loop and flushed by a separate task, so a
+    caller that gets cancelled never strands the others.
+    """
+    
+    def __init__(self, run_batch, max_size: int, max_wait: float):
+        self.run_batch = run_batch
+        self.max_size = max_size
+        self.max_wait = max_wait
+        self._open = {}
+    
+    async def submit(self, user_input: str):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._open.get(loop)
+        if batch is None:
+            batch = self._open[loop] = ([], asyncio.Event())
+            loop.create_task(self._flush(loop, batch))
+        items, full = batch
+        items.append((user_input, future))
+        if len(items) >= self.max_size:
+            # Later requests start a new batch
+            self._open.pop(loop, None)
+            full.set()
+        return await asyncio.shield(future)
+    
+    async def _flush(self, loop, batch):
+        items, full = batch
+        try:
+            await asyncio.wait_for(full.wait(), self.max_wait)
+        except asyncio.TimeoutError:
+            pass
+        if self._open.get(loop) is batch:
+            del self._open[loop]
+        
+        try:
+            results = await self.run_batch([user_input for user_input, _ in items])
+            for (_, future), result in zip(items, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+
+
+def _batch_results(response, count: int) -> list:
+    """Per-input results of a batch call; None marks inputs to re-parse on their own"""
+    try:
+        results = parse_batch_response_text(response.text, count)
+    except Exception:
+        results = [None] * count
+    fallbacks = sum(1 for result in results if result is None)
+    if fallbacks:
+        GEMINI_BATCH_FALLBACKS.inc(fallbacks)
+    return results
+
+
+def _generate_batch(user_inputs: list) -> list:
+    """
+    Parse several inputs with one call to the primary model
+    
     Returns:
-        dict: Validated meeting data matching MeetingReminderSchema
+        list: Validated meeting data per input, or None for inputs to parse on
+        their own (a lone input, an element that didn't validate, or every
+        input if the answer was malformed, the call failed or the model's
+        circuit is open); those go down the fallback ladder one by one
     """
-    # Get configured Gemini model
-    model = get_gemini_model()
+    GEMINI_BATCH_SIZE.observe(len(user_inputs))
+    model_name, timeout = _ladder()[0]
+    breaker = get_breaker(model_name)
+    if len(user_inputs) == 1 or not breaker.allow():
+        return [None] * len(user_inputs)
     
-    # Create the prompt with strict JSON schema requirement
-    schema = MeetingReminderSchema.model_json_schema()
+    started = time.perf_counter()
+    try:
+        model = get_gemini_model(model_name)
+        response = model.generate_content(
+            build_batch_prompt(user_inputs), request_options={'timeout': timeout}
+        )
+    except Exception as e:
+        _record_call('sync', started, error=True)
+        breaker.record_failure()
+        logger.warning("Gemini batch call failed, parsing inputs one by one: %s", e)
+        return [None] * len(user_inputs)
+    _record_call('sync', started, response)
+    breaker.record_success()
+    return _batch_results(response, len(user_inputs))
+
+
+async def _agenerate_batch(user_inputs: list) -> list:
+    """Async variant of _generate_batch"""
+    GEMINI_BATCH_SIZE.observe(len(user_inputs))
+    model_name, timeout = _ladder()[0]
+    breaker = get_breaker(model_name)
+    if len(user_inputs) == 1 or not breaker.allow():
+        return [None] * len(user_inputs)
     
-    prompt = f"""You are a meeting information parser. Extract meeting details from the user input (which can be text or a meeting link).
+    started = time.perf_counter()
+    try:
+        model = get_gemini_model(model_name)
+        response = await asyncio.wait_for(
+            model.generate_content_async(build_batch_prompt(user_inputs), request_options={'timeout': timeout}),
+            timeout
+        )
+    except Exception as e:
+        _record_call('async', started, error=True)
+        breaker.record_failure()
+        logger.warning("Gemini batch call failed, parsing inputs one by one: %s", e)
+        return [None] * len(user_inputs)
+    _record_call('async', started, response)
+    breaker.record_success()
+    return _batch_results(response, len(user_inputs))
 
-User Input: {user_input}
 
-Extract the following information:
-- name: Name/title of the meeting
-- time: Scheduled time (convert to ISO 8601 format, assume IST timezone if not specified)
-- mode: "online" or "offline" (optional)
-- applications: Applications/platforms used like Zoom, Google Meet, Teams, etc. (optional)
-- location: Physical location if offline, or URL if online (optional)
-- link: Meeting link/URL if available (optional)
+_batchers = {}
+
+
+def _get_batcher(kind):
+    """
+    Shared micro-batcher for sync or async callers, or None when batching is off
+    
+    GEMINI_BATCH_MAX_SIZE of 1 or less disables batching.
+    """
+    if settings.GEMINI_BATCH_MAX_SIZE <= 1:
+        return None
+    batcher = _batchers.get(kind)
+    if batcher is None:
+        with _models_lock:
+            batcher = _batchers.get(kind)
+            if batcher is None:
+                batcher = kind(
+                    _generate_batch if kind is MicroBatcher else _agenerate_batch,
+                    settings.GEMINI_BATCH_MAX_SIZE,
+                    settings.GEMINI_BATCH_WAIT_MS / 1000.0,
+                )
+                _batchers[kind] = batcher
+    return batcher
+
+
+def _chunk_text(chunk) -> str:
+    try:
+        return chunk.text
+    except ValueError:
+        # A chunk without text parts (e.g. only finish metadata)
+        return ''
+
+
+def _first_valid(objects):
+    for parsed in objects:
+        try:
+            return MeetingReminderSchema(**parsed).model_dump()
+        except Exception:
+            continue
+    return None
 
-IMPORTANT: You MUST return ONLY valid JSON that matches this exact schema:
-{json.dumps(schema, indent=2)}
 
-Return ONLY the JSON object, no additional text or markdown formatting."""
+def _stream_source(response):
+    """
+    The call behind a streamed response: a gRPC call with cancel(), or a generator
+
+    GenerateContentResponse keeps it in the private ``_iterator`` (checked
+    against google-generativeai 0.8); anything else is taken as the stream itself.
+    """
+    return getattr(response, '_iterator', response)
+
+
+def _read_stream(response):
+    """
+    Consume a streamed response until it holds a valid meeting object
+
+    The stream is cancelled once read, so the model stops generating and the
+    connection is released instead of being held until garbage collection.
+    
+    Returns:
+        tuple: (validated meeting data or None, the text received so far)
+    """
+    scanner = JSONObjectStream()
+    received = []
+    try:
+        for chunk in response:
+            text = _chunk_text(chunk)
+            received.append(text)
+            result = _first_valid(scanner.feed(text))
+            if result is not None:
+                # Stop reading: whatever follows (closing fence, commentary) isn't needed
+                GEMINI_STREAM_STOPS.labels('early').inc()
+                return result, ''.join(received)
+    finally:
+        source = _stream_source(response)
+        if hasattr(source, 'cancel'):
+            source.cancel()
+        elif hasattr(source, 'close'):
+            source.close()
+    GEMINI_STREAM_STOPS.labels('end').inc()
+    return None, ''.join(received)
+
 
+async def _aread_stream(response):
+    """Async variant of _read_stream"""
+    scanner = JSONObjectStream()
+    received = []
+    try:
+        async for chunk in response:
+            text = _chunk_text(chunk)
+            received.append(text)
+            result = _first_valid(scanner.feed(text))
+            if result is not None:
+                GEMINI_STREAM_STOPS.labels('early').inc()
+                return result, ''.join(received)
+    finally:
+        source = _stream_source(response)
+        if hasattr(source, 'cancel'):
+            source.cancel()
+        elif hasattr(source, 'aclose'):
+            await source.aclose()
+    GEMINI_STREAM_STOPS.labels('end').inc()
+    return None, ''.join(received)
+
+
+class GeminiUnavailable(ValueError):
+    """Every model on the fallback ladder failed, timed out or had its circuit open"""
+
+
+class _BadResponse(ValueError):
+    """The model answered, but not with valid meeting data"""
+
+
+def _ladder() -> list:
+    """
+    Models to try in order, each with its deadline in seconds
+    
+    GEMINI_MODEL_NAME first, then GEMINI_FALLBACK_MODELS; the deadlines come
+    from GEMINI_STEP_TIMEOUT_SECONDS, whose last value covers any further steps.
+    """
+    names = [settings.GEMINI_MODEL_NAME]
+    for name in settings.GEMINI_FALLBACK_MODELS:
+        if name not in names:
+            names.append(name)
+    timeouts = settings.GEMINI_STEP_TIMEOUT_SECONDS
+    return [(name, timeouts[min(i, len(timeouts) - 1)]) for i, name in enumerate(names)]
+
+
+_breakers = {}
+
+
+def get_breaker(model_name: str) -> CircuitBreaker:
+    """The circuit breaker guarding calls to ``model_name`` in this process"""
+    breaker = _breakers.get(model_name)
+    if breaker is None:
+        with _models_lock:
+            breaker = _breakers.get(model_name)
+            if breaker is None:
+                breaker = CircuitBreaker(
+                    settings.GEMINI_BREAKER_FAILURES, settings.GEMINI_BREAKER_RESET_SECONDS
+                )
+                _breakers[model_name] = breaker
+    return breaker
+
+
+# Recent successful call latencies per model, for the p95 hedge delay
+_latencies = {}
+_latencies_lock = threading.Lock()
+HEDGE_MIN_SAMPLES = 20
+
+
+def _observe_latency(model_name: str, seconds: float):
+    with _latencies_lock:
+        samples = _latencies.get(model_name)
+        if samples is None:
+            samples = _latencies[model_name] = deque(maxlen=256)
+        samples.append(seconds)
+
+
+def hedge_delay(model_name: str):
+    """
+    Seconds to wait for an answer before sending a hedged duplicate request
+    
+    The model's recent p95 latency (GEMINI_HEDGE_DELAY_MS until enough calls
+    have been seen), never below GEMINI_HEDGE_MIN_MS. None when hedging is off.
+    """
+    if not settings.GEMINI_HEDGE_ENABLED:
+        return None
+    with _latencies_lock:
+        samples = sorted(_latencies.get(model_name, ()))
+    if len(samples) < HEDGE_MIN_SAMPLES:
+        delay = settings.GEMINI_HEDGE_DELAY_MS / 1000.0
+    else:
+        delay = samples[int(0.95 * (len(samples) - 1))]
+    return max(delay, settings.GEMINI_HEDGE_MIN_MS / 1000.0)
+
+
+def _call_model(model_name: str, prompt, timeout: float) -> dict:
+    """
+    One request to one model; raises _BadResponse if the answer isn't valid meeting data
+    
+    ``prompt`` is the text from build_prompt, or a list of parts from
+    build_image_prompt.
+    """
+    # Get configured Gemini model
+    model = get_gemini_model(model_name)
+    request_options = {'timeout': timeout}
+    
+    started = time.perf_counter()
     try:
         # Generate content using Gemini model
-        response = model.generate_content(prompt)
-        
-        # Extract JSON from response
-        response_text = response.text.strip()
-        
-        # Remove markdown code blocks if present
-        if response_text.startswith('```'):
-            lines = response_text.split('\n')
-            response_text = '\n'.join(lines[1:-1]) if lines[-1].strip() == '```' else '\n'.join(lines[1:])
-            response_text = response_text.replace('```json', '').replace('```', '').strip()
-        
-        # Parse JSON
-        parsed_data = json.loads(response_text)
-        
-        # Validate with Pydantic schema
-        validated_data = MeetingReminderSchema(**parsed_data)
-        
-        return validated_data.model_dump()
-        
+        if settings.GEMINI_STREAMING:
+            response = model.generate_content(prompt, stream=True, request_options=request_options)
+            result, response_text = _read_stream(response)
+        else:
+            response = model.generate_content(prompt, request_options=request_options)
+            result, response_text = None, response.text
+    except Exception:
+        _record_call('sync', started, error=True)
+        raise
+    _record_call('sync', started, response)
+    _observe_latency(model_name, time.perf_counter() - started)
+    # Without streaming, or if the stream ended without a valid object,
+    # parse the whole text so errors read as before
+    return result if result is not None else _validated(model_name, response_text)
+
+
+async def _acall_model(model_name: str, prompt, timeout: float) -> dict:
+    model = get_gemini_model(model_name)
+    request_options = {'timeout': timeout}
+    
+    started = time.perf_counter()
+    try:
+        if settings.GEMINI_STREAMING:
+            response = await model.generate_content_async(prompt, stream=True, request_options=request_options)
+            result, response_text = await _aread_stream(response)
+        else:
+            response = await model.generate_content_async(prompt, request_options=request_options)
+            result, response_text = None, response.text
+    except Exception:
+        _record_call('async', started, error=True)
+        raise
+    _record_call('async', started, response)
+    _observe_latency(model_name, time.perf_counter() - started)
+    return result if result is not None else _validated(model_name, response_text)
+
+
+def _validated(model_name: str, response_text: str) -> dict:
+    try:
+        return parse_response_text(response_text)
     except json.JSONDecodeError as e:
-        raise ValueError(f"Failed to parse JSON from Gemini response: {e}. Response was: {response_text[:200]}")
+        raise _BadResponse(f"Failed to parse JSON from Gemini response: {e}. Response was: {response_text[:200]}")
     except Exception as e:
-        raise ValueError(f"Gemini API error ({settings.GEMINI_MODEL_NAME}): {str(e)}")
+        raise _BadResponse(f"Gemini API error ({model_name}): {str(e)}")
+
+
+_call_pool = None
+
+
+def _get_call_pool() -> ThreadPoolExecutor:
+    global _call_pool
+    if _call_pool is None:
+        with _models_lock:
+            if _call_pool is None:
+                _call_pool = ThreadPoolExecutor(
+                    max_workers=settings.GEMINI_CALL_WORKERS, thread_name_prefix='gemini-call'
+                )
+    return _call_pool
+
+
+def _hedged_call(model_name: str, prompt, timeout: float) -> dict:
+    """
+    Call ``model_name``, hedging with a duplicate request if it is slow
+    
+    Calls run on a shared thread pool so the caller can stop waiting at the
+    deadline; a request still running then is left to finish on its own.
+    
+    Raises:
+        TimeoutError: No answer within ``timeout`` seconds
+    """
+    pool = _get_call_pool()
+    started = time.monotonic()
+    deadline = started + timeout
+    hedge_at = hedge_delay(model_name)
+    pending = {pool.submit(_call_model, model_name, prompt, timeout)}
+    error = None
+    
+    while pending:
+        now = time.monotonic()
+        if now >= deadline:
+            break
+        wait_for = deadline - now
+        if hedge_at is not None:
+            wait_for = min(wait_for, max(0.0, started + hedge_at - now))
+        done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                return future.result()
+            except Exception as e:
+                error = e
+        if hedge_at is not None and pending and time.monotonic() >= started + hedge_at:
+            # Still waiting at the hedge delay: race a second request against the first
+            GEMINI_HEDGES.inc()
+            pending.add(pool.submit(_call_model, model_name, prompt, max(0.0, deadline - time.monotonic())))
+            hedge_at = None
+    
+    if error is not None and not pending:
+        raise error
+    raise TimeoutError(f"no answer within {timeout:g}s")
+
+
+async def _ahedged_call(model_name: str, prompt, timeout: float) -> dict:
+    """Async variant of _hedged_call; requests still running at the end are cancelled"""
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    deadline = started + timeout
+    hedge_at = hedge_delay(model_name)
+    pending = {asyncio.ensure_future(_acall_model(model_name, prompt, timeout))}
+    error = None
+    
+    try:
+        while pending:
+            now = loop.time()
+            if now >= deadline:
+                break
+            wait_for = deadline - now
+            if hedge_at is not None:
+                wait_for = min(wait_for, max(0.0, started + hedge_at - now))
+            done, pending = await asyncio.wait(pending, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                try:
+                    return task.result()
+                except Exception as e:
+                    error = e
+            if hedge_at is not None and pending and loop.time() >= started + hedge_at:
+                GEMINI_HEDGES.inc()
+                pending.add(asyncio.ensure_future(
+                    _acall_model(model_name, prompt, max(0.0, deadline - loop.time()))
+                ))
+                hedge_at = None
+    finally:
+        for task in pending:
+            task.cancel()
+    
+    if error is not None and not pending:
+        raise error
+    raise TimeoutError(f"no answer within {timeout:g}s")
+
+
+def _step_failed(model_name: str, breaker: CircuitBreaker, error: Exception) -> str:
+    """Record a failed ladder step; returns its description for the final error"""
+    if isinstance(error, _BadResponse):
+        # The model is up, it just answered badly: says nothing about its health
+        breaker.record_neutral()
+        GEMINI_LADDER.labels(model_name, 'invalid').inc()
+        return str(error)
+    breaker.record_failure()
+    GEMINI_LADDER.labels(model_name, 'timeout' if isinstance(error, TimeoutError) else 'error').inc()
+    return f"Gemini API error ({model_name}): {str(error)}"
+
+
+def _ladder_failed(errors: list, bad_response: bool) -> ValueError:
+    """Error for a ladder where no step succeeded"""
+    if bad_response:
+        # A model answered, so the input is the problem rather than an outage
+        return ValueError('; '.join(errors))
+    return GeminiUnavailable('; '.join(errors))
+
 
+def _generate_single(prompt):
+    """
+    Parse one prompt (see _call_model), walking the model ladder until a step succeeds
+    
+    Returns:
+        tuple: (validated meeting data, name of the model that answered)
+    
+    Raises:
+        ValueError: No step succeeded and at least one model answered with invalid data
+        GeminiUnavailable: Every step failed, timed out or had its circuit open
+    """
+    errors = []
+    bad_response = False
+    for model_name, timeout in _ladder():
+        breaker = get_breaker(model_name)
+        if not breaker.allow():
+            GEMINI_LADDER.labels(model_name, 'open').inc()
+            errors.append(f"Gemini API error ({model_name}): circuit open")
+            continue
+        try:
+            result = _hedged_call(model_name, prompt, timeout)
+        except Exception as e:
+            errors.append(_step_failed(model_name, breaker, e))
+            bad_response = bad_response or isinstance(e, _BadResponse)
+            continue
+        breaker.record_success()
+        GEMINI_LADDER.labels(model_name, 'ok').inc()
+        return result, model_name
+    raise _ladder_failed(errors, bad_response)
+
+
+async def _agenerate_single(prompt):
+    """Async variant of _generate_single"""
+    errors = []
+    bad_response = False
+    for model_name, timeout in _ladder():
+        breaker = get_breaker(model_name)
+        if not breaker.allow():
+            GEMINI_LADDER.labels(model_name, 'open').inc()
+            errors.append(f"Gemini API error ({model_name}): circuit open")
+            continue
+        try:
+            result = await _ahedged_call(model_name, prompt, timeout)
+        except Exception as e:
+            errors.append(_step_failed(model_name, breaker, e))
+            bad_response = bad_response or isinstance(e, _BadResponse)
+            continue
+        breaker.record_success()
+        GEMINI_LADDER.labels(model_name, 'ok').inc()
+        return result, model_name
+    raise _ladder_failed(errors, bad_response)
+
+
+def parse_meeting_input(user_input: str) -> dict:
+    """
+    Parse user input (text or link) using Gemini Multimodal LLM
+    Returns validated Pydantic JSON schema
+    
+    Concurrent calls are micro-batched into one Gemini prompt (see
+    MicroBatcher); an input the batch answer doesn't cover is sent on its own.
+    With GEMINI_STREAMING, a single-input answer is parsed as it streams in
+    and returned as soon as it holds a valid object.
+    
+    Single inputs go down the fallback ladder (GEMINI_MODEL_NAME, then
+    GEMINI_FALLBACK_MODELS), each step behind its model's circuit breaker,
+    bounded by its deadline and hedged after the model's p95 latency.
+    
+    Args:
+        user_input: Text description or meeting link
+        
+    Returns:
+        dict: Validated meeting data matching MeetingReminderSchema
+    """
+    # Identical inputs (re-pasted invites, recurring blurbs) skip the LLM call
+    cache, cached = _cached_result(user_input)
+    if cached is not None:
+        return cached
+    
+    batcher = _get_batcher(MicroBatcher)
+    result = batcher.submit(user_input) if batcher is not None else None
+    # Batches only go to the primary model
+    model_name = settings.GEMINI_MODEL_NAME
+    if result is None:
+        result, model_name = _generate_single(build_prompt(user_input))
+    
+    _cache_result(cache, user_input, model_name, result)
+    return result
+
+
+async def aparse_meeting_input(user_input: str) -> dict:
+    """
+    Async variant of parse_meeting_input for ASGI views
+    
+    Uses the SDK's native async generation call, so the event loop can keep
+    many Gemini requests in flight without a thread per request.
+    """
+    cache, cached = _cached_result(user_input)
+    if cached is not None:
+        return cached
+    
+    batcher = _get_batcher(AsyncMicroBatcher)
+    result = await batcher.submit(user_input) if batcher is not None else None
+    model_name = settings.GEMINI_MODEL_NAME
+    if result is None:
+        result, model_name = await _agenerate_single(build_prompt(user_input))
+    
+    _cache_result(cache, user_input, model_name, result)
+    return result
+
+
+def parse_meeting_image(image_data: bytes, mime_type: str, image_hash: str, note: str = '') -> dict:
+    """
+    Parse a preprocessed invite screenshot using Gemini Multimodal LLM
+    
+    The parse is cached under the normalized image's digest, so the same
+    screenshot uploaded again (losslessly re-saved or with other margins) doesn't reach
+    the model. Images are not micro-batched; they go straight down the
+    fallback ladder.
+    
+    Args:
+        image_data: Encoded image from image_ingest.preprocess_image
+        mime_type: MIME type of image_data
+        image_hash: Digest of the normalized image
+        note: Optional text sent along with the image
+        
+    Returns:
+        dict: Validated meeting data matching MeetingReminderSchema
+    """
+    cache_input = f"image:{image_hash} {note}"
+    cache, cached = _cached_result(cache_input)
+    if cached is not None:
+        return cached
+    
+    result, model_name = _generate_single(build_image_prompt(image_data, mime_type, note))
+    
+    _cache_result(cache, cache_input, model_name, result)
+    return result
@@ -1,21 +1,27 @@
 """
 Utility functions for Gemini LLM operations
 """
+import threading
+import time
+
 import google.generativeai as genai
 from django.conf import settings
 
+from .gemini_service import configure_gemini
+
+
+# model name -> (expires_at, info); model metadata changes rarely, so remote
+# lookups are cached for GEMINI_MODEL_INFO_TTL_SECONDS
+_model_info_cache = {}
+_model_info_lock = threading.Lock()
+
 
 def list_available_models():
     """
     List all available Gemini models for the configured API key
     Returns list of model names
     """
-    api_key = settings.GEMINI_API_KEY
-    
-    if not api_key:
-        raise ValueError("GEMINI_API_KEY not configured")
-    
-    genai.configure(api_key=api_key)
+    configure_gemini()
     
     try:
         models = genai.list_models()
@@ -38,18 +44,18 @@ def get_model_info(model_name: str = None):
     Returns:
         dict: Model information
     """
-    api_key = settings.GEMINI_API_KEY
-    
-    if not api_key:
-        raise ValueError("GEMINI_API_KEY not configured")
-    
-    genai.configure(api_key=api_key)
+    configure_gemini()
     
     model_name = model_name or settings.GEMINI_MODEL_NAME
     
+    now = time.monotonic()
+    cached = _model_info_cache.get(model_name)
+    if cached is not None and cached[0] > now:
+        return dict(cached[1])
+    
     try:
         model = genai.get_model(model_name)
-        return {
+        info = {
             'name': model.name,
             'display_name': model.display_name,
             'description': model.description,
@@ -59,4 +65,7 @@ def get_model_info(model_name: str = None):
         }
     except Exception as e:
         raise ValueError(f"Failed to get model info for {model_name}: {str(e)}")
-
+    
+    with _model_info_lock:
+        _model_info_cache[model_name] = (now + settings.GEMINI_MODEL_INFO_TTL_SECONDS, info)
+    return dict(info)
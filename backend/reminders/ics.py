@@ -0,0 +1,468 @@
+"""
+Streaming iCalendar (.ics) import and export
+
+Calendar files already carry structured events, so they are mapped straight
+onto Reminder rows instead of going through the meeting parser (no Gemini
+calls). The reader takes an iterable of byte chunks (an upload's
+``chunks()`` or the request body), unfolds content lines and yields one
+VEVENT at a time, so memory stays flat however large the file is. Recurring
+events are expanded with dateutil's rrule up to ICS_EXPAND_DAYS ahead, and
+rows are inserted and scheduled ICS_IMPORT_BATCH_SIZE at a time.
+
+Every occurrence gets a job id derived from the event UID, the occurrence's
+original start and the receiver, so importing the same calendar again adds
+nothing, and a modified or cancelled instance (RECURRENCE-ID) replaces the
+occurrence it overrides.
+"""
+import codecs
+import hashlib
+import re
+from datetime import datetime, timedelta
+
+import pytz
+from dateutil.rrule import rruleset, rrulestr
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .fast_parser import GENERIC_URL, PROVIDER_PATTERNS
+from .models import Reminder
+from .scheduling import schedule_reminder, schedule_reminders
+from .services import _reminder_fields
+
+
+IST = pytz.timezone('Asia/Kolkata')
+PRODID = '-//NexaNote//Reminders//EN'
+# Errors reported back per import; the rest are only counted
+MAX_REPORTED_ERRORS = 20
+
+_PARAM = re.compile(r';([^=;:]+)=("[^"]*"|[^";:]*)')
+_ESCAPED = re.compile(r'\\([\\;,nN])')
+_UNTIL = re.compile(r'(UNTIL=)(\d{8}T\d{6}Z?)', re.I)
+
+
+# Reading
+
+def iter_lines(chunks):
+    """Yield unfolded content lines from an iterable of UTF-8 byte chunks"""
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    pending = ''
+    current = None
+    for chunk in chunks:
+        pending += decoder.decode(chunk)
+        lines = pending.split('\n')
+        pending = lines.pop()
+        for line in lines:
+            line = line.rstrip('\r')
+            if line[:1] in (' ', '\t'):
+                # Folded continuation of the previous line
+                if current is not None:
+                    current += line[1:]
+                continue
+            if current:
+                yield current
+            current = line
+    pending += decoder.decode(b'', final=True)
+    if pending[:1] in (' ', '\t') and current is not None:
+        current += pending.rstrip('\r')[1:]
+        pending = ''
+    if current:
+        yield current
+    if pending.strip():
+        yield pending.rstrip('\r')
+
+
+def parse_line(line: str):
+    """Split a content line into (NAME, {PARAM: value}, value)"""
+    colon = line.find(':')
+    if '"' in line[:colon]:
+        # A quoted parameter value may contain ':'
+        in_quotes = False
+        for index, char in enumerate(line):
+            if char == '"':
+                in_quotes = not in_quotes
+            elif char == ':' and not in_quotes:
+                colon = index
+                break
+    if colon < 0:
+        return line.upper(), {}, ''
+    head, value = line[:colon], line[colon + 1:]
+    semicolon = head.find(';')
+    if semicolon < 0:
+        return head.upper(), {}, value
+    params = {
+        key.upper(): param_value.strip('"')
+        for key, param_value in _PARAM.findall(head[semicolon:])
+    }
+    return head[:semicolon].upper(), params, value
+
+
+def iter_events(lines):
+    """
+    Yield each VEVENT as a dict of property name -> [(params, value), ...]
+
+    Components nested in an event (VALARM) and everything outside events
+    (VTIMEZONE, calendar properties) are skipped.
+    """
+    event = None
+    nested = 0
+    for line in lines:
+        name, params, value = parse_line(line)
+        if name == 'BEGIN':
+            if event is not None:
+                nested += 1
+            elif value.upper() == 'VEVENT':
+                event = {}
+        elif name == 'END':
+            if nested:
+                nested -= 1
+            elif event is not None and value.upper() == 'VEVENT':
+                yield event
+                event = None
+        elif event is not None and not nested:
+            event.setdefault(name, []).append((params, value))
+
+
+def unescape_text(value: str) -> str:
+    return _ESCAPED.sub(lambda m: '\n' if m.group(1) in 'nN' else m.group(1), value)
+
+
+def _first(event: dict, name: str):
+    values = event.get(name)
+    return values[0] if values else (None, None)
+
+
+def _text(event: dict, name: str):
+    value = _first(event, name)[1]
+    if not value:
+        return None
+    return unescape_text(value).strip() or None
+
+
+def _zone(params: dict, value: str):
+    """Time zone of a DATE-TIME value: UTC for 'Z', its TZID, or IST for floating times"""
+    if value.endswith('Z'):
+        return pytz.utc
+    tzid = params.get('TZID')
+    if tzid:
+        try:
+            return pytz.timezone(tzid.lstrip('/'))
+        except pytz.UnknownTimeZoneError:
+            pass
+    # Unknown zones and floating times are read as IST, like naive parsed times
+    return IST
+
+
+def _local(value: str, params: dict, zone):
+    """A DATE or DATE-TIME value as a naive datetime in ``zone``"""
+    value = value.strip()
+    # Sliced by hand: strptime is the slowest step of an import
+    try:
+        if len(value) == 8:
+            # All-day (DATE) values start at midnight
+            return datetime(int(value[:4]), int(value[4:6]), int(value[6:8]))
+        if len(value) < 15 or value[8] != 'T':
+            raise ValueError
+        moment = datetime(
+            int(value[:4]), int(value[4:6]), int(value[6:8]),
+            int(value[9:11]), int(value[11:13]), int(value[13:15]),
+        )
+    except ValueError:
+        raise ValueError(f"invalid date or date-time: {value}")
+    value_zone = _zone(params, value)
+    if value_zone is not zone:
+        moment = value_zone.localize(moment).astimezone(zone).replace(tzinfo=None)
+    return moment
+
+
+def _until_in(zone):
+    """Rewrite an RRULE's UNTIL as a naive time in ``zone`` (the rule is expanded in local time)"""
+    def rewrite(match):
+        until = match.group(2)
+        if until.endswith('Z'):
+            until = _local(until, {}, zone).strftime('%Y%m%dT%H%M%S')
+        return match.group(1) + until
+    return rewrite
+
+
+def occurrences(event: dict, start: datetime, end: datetime, limit: int):
+    """
+    Aware start times of ``event`` between ``start`` and ``end``, at most ``limit``
+
+    Recurrences are expanded in the event's own zone so that occurrences keep
+    their wall-clock time across DST changes.
+    """
+    params, value = _first(event, 'DTSTART')
+    if value is None:
+        raise ValueError('event has no DTSTART')
+    zone = _zone(params, value)
+    first = _local(value, params, zone)
+
+    if 'RRULE' not in event and 'RDATE' not in event:
+        moment = zone.localize(first)
+        if start <= moment <= end:
+            yield moment
+        return
+
+    rules = rruleset()
+    rules.rdate(first)
+    for _, rule in event.get('RRULE', ()):
+        rules.rrule(rrulestr(_UNTIL.sub(_until_in(zone), rule), dtstart=first))
+    for name, add in (('RDATE', rules.rdate), ('EXDATE', rules.exdate)):
+        for params, values in event.get(name, ()):
+            for part in values.split(','):
+                if part and '/' not in part:  # PERIOD values are not supported
+                    add(_local(part, params, zone))
+
+    window_start = start.astimezone(zone).replace(tzinfo=None)
+    window_end = end.astimezone(zone).replace(tzinfo=None)
+    for moment in rules.xafter(window_start, count=limit, inc=True):
+        if moment > window_end:
+            break
+        yield zone.localize(moment)
+
+
+def event_details(event: dict) -> dict:
+    """Meeting fields (everything but the time) in the shape the parsers produce"""
+    location = _text(event, 'LOCATION')
+    text = ' '.join(filter(None, (
+        _text(event, 'URL'),
+        _text(event, 'X-GOOGLE-CONFERENCE'),
+        location,
+        _text(event, 'DESCRIPTION'),
+    )))
+
+    link = applications = None
+    for name, pattern in PROVIDER_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            link, applications = match.group(0).rstrip('.,;)'), name
+            break
+    if link is None:
+        match = GENERIC_URL.search(text)
+        if match:
+            link = match.group(0).rstrip('.,;)')
+
+    return {
+        'name': (_text(event, 'SUMMARY') or 'Meeting')[:255],
+        'mode': 'online' if link else ('offline' if location else None),
+        'applications': applications,
+        'location': location[:255] if location else None,
+        'link': link,
+    }
+
+
+def _instance_job_id(uid: str, original_start: datetime, receiver_email: str) -> str:
+    raw = f"{uid}\x1f{original_start.astimezone(pytz.utc):%Y%m%dT%H%M%SZ}\x1f{receiver_email.lower()}"
+    return f"ics_{hashlib.sha1(raw.encode()).hexdigest()}"
+
+
+def _uid(event: dict) -> str:
+    uid = _first(event, 'UID')[1]
+    if uid:
+        return uid
+    # Without a UID, the title and first start identify the event
+    return f"{_first(event, 'SUMMARY')[1]}\x1f{_first(event, 'DTSTART')[1]}"
+
+
+def _cancelled(event: dict) -> bool:
+    return (_first(event, 'STATUS')[1] or '').upper() == 'CANCELLED'
+
+
+# Import
+
+def _event_reminders(event: dict, receiver_email: str, start: datetime, end: datetime) -> list:
+    """Unsaved Reminder rows for each occurrence of ``event`` in the window"""
+    moments = list(occurrences(event, start, end, settings.ICS_MAX_OCCURRENCES))
+    if not moments:
+        return []
+
+    # Validate once per event; occurrences only differ in their time
+    fields = _reminder_fields({**event_details(event), 'time': moments[0]}, receiver_email)
+    uid = _uid(event)
+    reminders = []
+    for moment in moments:
+        reminders.append(Reminder(
+            **{
+                **fields,
+                'scheduled_time': moment,
+                'json_data': {**fields['json_data'], 'time': moment.isoformat()},
+            },
+            job_id=_instance_job_id(uid, moment, receiver_email),
+        ))
+    return reminders
+
+
+def _flush(batch: list, started: datetime, stats: dict):
+    """Insert a batch (skipping occurrences imported before) and schedule the new rows"""
+    if not batch:
+        return
+    with transaction.atomic():
+        Reminder.objects.bulk_create(batch, ignore_conflicts=True)
+    # ignore_conflicts leaves ids unset; read back only the rows this import created
+    created = list(
+        Reminder.objects.filter(job_id__in=[r.job_id for r in batch], created_at__gte=started)
+        .only('id', 'job_id', 'scheduled_time')
+    )
+    schedule_reminders(created)
+    stats['imported'] += len(created)
+    stats['duplicates'] += len(batch) - len(created)
+
+
+def _apply_override(event: dict, receiver_email: str, start: datetime, end: datetime, stats: dict):
+    """Replace (or, if cancelled, drop) the occurrence a RECURRENCE-ID instance overrides"""
+    params, value = _first(event, 'RECURRENCE-ID')
+    zone = _zone(params, value)
+    original = zone.localize(_local(value, params, zone))
+    job_id = _instance_job_id(_uid(event), original, receiver_email)
+
+    with transaction.atomic():
+        Reminder.objects.filter(job_id=job_id, sent=False).delete()
+        if _cancelled(event):
+            stats['cancelled'] += 1
+            return
+
+        params, value = _first(event, 'DTSTART')
+        zone = _zone(params, value)
+        moment = zone.localize(_local(value, params, zone))
+        if not start <= moment <= end:
+            stats['skipped'] += 1
+            return
+        if Reminder.objects.filter(job_id=job_id).exists():
+            # Sent before this import: the instance has been delivered already
+            stats['duplicates'] += 1
+            return
+
+        fields = _reminder_fields({**event_details(event), 'time': moment}, receiver_email)
+        reminder = Reminder.objects.create(**fields, job_id=job_id)
+    schedule_reminder(reminder)
+    stats['imported'] += 1
+
+
+def import_calendar(chunks, receiver_email: str) -> dict:
+    """
+    Import every upcoming event occurrence of an .ics stream as a reminder
+
+    Occurrences before now or more than ICS_EXPAND_DAYS ahead are skipped.
+    Modified instances (RECURRENCE-ID) are held until the stream ends, so
+    they replace their occurrence whatever order the file lists them in.
+
+    Args:
+        chunks: Iterable of bytes making up the calendar file
+        receiver_email: Who the reminders are sent to
+
+    Returns:
+        dict: Counts of events, imported / duplicate reminders, skipped
+        (nothing upcoming), cancelled and failed events, and the first errors
+    """
+    started = timezone.now()
+    end = started + timedelta(days=settings.ICS_EXPAND_DAYS)
+    stats = {
+        'events': 0, 'imported': 0, 'duplicates': 0, 'skipped': 0,
+        'cancelled': 0, 'failed': 0, 'errors': [],
+    }
+    batch = []
+    overrides = []
+
+    for event in iter_events(iter_lines(chunks)):
+        stats['events'] += 1
+        try:
+            if 'RECURRENCE-ID' in event:
+                overrides.append(event)
+                continue
+            if _cancelled(event):
+                stats['cancelled'] += 1
+                continue
+            reminders = _event_reminders(event, receiver_email, started, end)
+        except (ValueError, TypeError, OverflowError) as e:
+            _failed(stats, event, e)
+            continue
+        if not reminders:
+            stats['skipped'] += 1
+            continue
+        batch.extend(reminders)
+        if len(batch) >= settings.ICS_IMPORT_BATCH_SIZE:
+            _flush(batch, started, stats)
+            batch = []
+    _flush(batch, started, stats)
+
+    for event in overrides:
+        try:
+            _apply_override(event, receiver_email, started, end, stats)
+        except (ValueError, TypeError, OverflowError, IntegrityError) as e:
+            # IntegrityError: a concurrent import of the same calendar created the instance
+            _failed(stats, event, e)
+
+    return stats
+
+
+def _failed(stats: dict, event: dict, error: Exception):
+    stats['failed'] += 1
+    if len(stats['errors']) < MAX_REPORTED_ERRORS:
+        stats['errors'].append({'uid': _first(event, 'UID')[1], 'error': str(error)})
+
+
+# Export
+
+def escape_text(value: str) -> str:
+    return (
+        value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def fold_line(line: str) -> str:
+    """A content line folded at 75 octets (without splitting UTF-8 sequences), with CRLF"""
+    raw = line.encode()
+    if len(raw) <= 75:
+        return line + '\r\n'
+    parts = []
+    start, limit = 0, 75
+    while start < len(raw):
+        stop = min(start + limit, len(raw))
+        while stop < len(raw) and raw[stop] & 0xC0 == 0x80:
+            stop -= 1
+        parts.append(raw[start:stop].decode())
+        # Continuation lines start with a space, which counts toward the 75
+        start, limit = stop, 74
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _utc(moment: datetime) -> str:
+    return moment.astimezone(pytz.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def format_event(row: dict) -> str:
+    """One VEVENT for a reminder ``.values()`` row"""
+    lines = [
+        'BEGIN:VEVENT',
+        f"UID:reminder-{row['id']}@nexanote",
+        f"DTSTAMP:{_utc(row['created_at'])}",
+        f"DTSTART:{_utc(row['scheduled_time'])}",
+        f"SUMMARY:{escape_text(row['name'])}",
+    ]
+    if row['location']:
+        lines.append(f"LOCATION:{escape_text(row['location'])}")
+    if row['link']:
+        lines.append(f"URL:{row['link']}")
+    lines.append('END:VEVENT')
+    return ''.join(fold_line(line) for line in lines)
+
+
+# Reminder fields format_event reads (API names, as for the list endpoint)
+EXPORT_FIELDS = ('id', 'name', 'scheduledTime', 'location', 'link', 'createdAt')
+
+
+def stream_ics(rows):
+    """Yield a VCALENDAR of ``rows`` in chunks of LIST_STREAM_CHUNK_SIZE events"""
+    chunk_size = settings.LIST_STREAM_CHUNK_SIZE
+    yield f"BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:{PRODID}\r\nCALSCALE:GREGORIAN\r\n"
+    chunk = []
+    for row in rows.iterator(chunk_size=chunk_size):
+        chunk.append(format_event(row))
+        if len(chunk) >= chunk_size:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+    yield 'END:VCALENDAR\r\n'
@@ -0,0 +1,141 @@
+"""
+Idempotency keys for the schedule endpoint
+
+A client that may resend a schedule request (retries, double submits) sends
+the same ``Idempotency-Key`` with every copy. The first copy reserves the key
+in the IdempotencyKey table and runs; copies that arrive while it is running
+wait for it, and copies that arrive after it finished get its reminder (or
+parse job) back instead of creating another. A key that was reserved but
+never completed (the request failed, or its process died) is released so the
+client can retry with it.
+"""
+import asyncio
+import hashlib
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import IdempotencyKey
+from .parse_cache import normalize_input
+
+
+# How often a waiting repeat re-reads the key, and how often expired keys are purged
+POLL_SECONDS = 0.1
+PURGE_INTERVAL_SECONDS = 60
+
+_last_purge = 0.0
+
+
+class IdempotencyKeyReused(Exception):
+    """The key was already used for a request with a different body"""
+
+
+class IdempotencyKeyInProgress(Exception):
+    """The request holding the key did not finish within IDEMPOTENCY_WAIT_SECONDS"""
+
+
+def request_hash(user_input: str, receiver_email: str) -> str:
+    raw = f"{normalize_input(user_input)}\x1f{receiver_email.strip().lower()}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _purge_expired(now):
+    global _last_purge
+    if time.monotonic() - _last_purge >= PURGE_INTERVAL_SECONDS:
+        _last_purge = time.monotonic()
+        IdempotencyKey.objects.filter(expires_at__lte=now).delete()
+
+
+def try_reserve(key: str, fingerprint: str):
+    """
+    Reserve ``key`` for this request, or look up whoever holds it
+
+    Returns:
+        tuple: (True, None) if this request now owns the key; (False, record)
+        if another request holds it, where record.completed says whether it
+        has finished
+
+    Raises:
+        IdempotencyKeyReused: The key belongs to a request with a different body
+    """
+    now = timezone.now()
+    _purge_expired(now)
+    # Lapsed replays and abandoned locks free the key
+    IdempotencyKey.objects.filter(key=key, expires_at__lte=now).delete()
+    try:
+        with transaction.atomic():
+            IdempotencyKey.objects.create(
+                key=key,
+                request_hash=fingerprint,
+                expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS),
+            )
+        return True, None
+    except IntegrityError:
+        pass
+
+    record = IdempotencyKey.objects.select_related('reminder', 'parse_job').filter(key=key).first()
+    if record is None:
+        # Released between our insert and the read; take it on the next try
+        return False, None
+    if record.request_hash != fingerprint:
+        raise IdempotencyKeyReused("Idempotency-Key was already used with a different request")
+    return False, record
+
+
+def reserve(key: str, user_input: str, receiver_email: str):
+    """
+    Reserve ``key``, waiting for a running request that holds it
+
+    Returns:
+        IdempotencyKey: The finished earlier request to replay, or None if
+        this request owns the key and should run
+
+    Raises:
+        IdempotencyKeyReused: The key belongs to a request with a different body
+        IdempotencyKeyInProgress: The holder did not finish in time
+    """
+    fingerprint = request_hash(user_input, receiver_email)
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    while True:
+        owned, record = try_reserve(key, fingerprint)
+        if owned:
+            return None
+        if record is not None and record.completed:
+            return record
+        if time.monotonic() >= deadline:
+            raise IdempotencyKeyInProgress("A request with this Idempotency-Key is still in progress")
+        time.sleep(POLL_SECONDS)
+
+
+async def areserve(key: str, user_input: str, receiver_email: str):
+    """Async variant of reserve; waits without holding a thread"""
+    fingerprint = request_hash(user_input, receiver_email)
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    while True:
+        owned, record = await sync_to_async(try_reserve)(key, fingerprint)
+        if owned:
+            return None
+        if record is not None and record.completed:
+            return record
+        if time.monotonic() >= deadline:
+            raise IdempotencyKeyInProgress("A request with this Idempotency-Key is still in progress")
+        await asyncio.sleep(POLL_SECONDS)
+
+
+def complete(key: str, reminder=None, parse_job=None, parser: str = None):
+    """Store the request's outcome and keep it for IDEMPOTENCY_TTL_SECONDS"""
+    IdempotencyKey.objects.filter(key=key).update(
+        reminder=reminder,
+        parse_job=parse_job,
+        parser=parser,
+        expires_at=timezone.now() + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+    )
+
+
+def release(key: str):
+    """Give up a key whose request failed, so the client can retry with it"""
+    IdempotencyKey.objects.filter(key=key, reminder__isnull=True, parse_job__isnull=True).delete()
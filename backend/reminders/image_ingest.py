@@ -0,0 +1,142 @@
+"""
+Preprocessing for uploaded invite screenshots
+
+Full-resolution screenshots cost upload time and image tokens without helping
+the parse, so before an image is sent to Gemini it is converted to grayscale,
+cropped to the region that holds text (dropping the background, window chrome
+and faint panel borders around it), scaled down to IMAGE_MAX_SIDE and
+re-encoded as whichever of PNG or JPEG comes out smaller.
+
+The parse cache is keyed by a digest of those normalized pixels, so the same
+screenshot uploaded again, converted to another lossless format or captured
+with other margins, maps to the same entry. A lossy re-save (JPEG, WebP)
+changes pixel values, so it usually gets an entry of its own. A coarse
+perceptual hash such as a 64-bit dHash is not used: invites from the same
+template that differ in one time digit hash identically, and the cache
+would answer with the wrong meeting.
+
+Decoding and resampling are CPU-bound, so they run in a pool of worker
+processes instead of holding the GIL in request threads.
+"""
+import hashlib
+import io
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from PIL import Image, ImageChops, ImageOps
+
+
+# Pixels differing from the background by more than this count as text
+CONTENT_THRESHOLD = 64
+# Margin kept around the content region, in pixels of the original image
+CROP_MARGIN = 8
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _background(image: Image.Image) -> int:
+    """The most common of the four corner values (the canvas behind the invite)"""
+    width, height = image.size
+    corners = [image.getpixel(xy) for xy in ((0, 0), (width - 1, 0), (0, height - 1), (width - 1, height - 1))]
+    return max(corners, key=corners.count)
+
+
+def _crop_to_content(image: Image.Image) -> Image.Image:
+    background = Image.new('L', image.size, _background(image))
+    mask = ImageChops.difference(image, background).point(
+        [0] * (CONTENT_THRESHOLD + 1) + [255] * (255 - CONTENT_THRESHOLD)
+    )
+    bbox = mask.getbbox()
+    if bbox is None:
+        # Blank image: nothing to crop to
+        return image
+    left, top, right, bottom = bbox
+    return image.crop((
+        max(0, left - CROP_MARGIN),
+        max(0, top - CROP_MARGIN),
+        min(image.width, right + CROP_MARGIN),
+        min(image.height, bottom + CROP_MARGIN),
+    ))
+
+
+def image_digest(image: Image.Image) -> str:
+    """SHA-256 of a grayscale image's size and pixels"""
+    digest = hashlib.sha256(f"{image.width}x{image.height}:".encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def _encode(image: Image.Image, jpeg_quality: int):
+    png = io.BytesIO()
+    image.save(png, format='PNG', optimize=True)
+    jpeg = io.BytesIO()
+    image.save(jpeg, format='JPEG', quality=jpeg_quality, optimize=True)
+    # Flat UI screenshots compress best as PNG, photos of screens as JPEG
+    if png.tell() <= jpeg.tell():
+        return png.getvalue(), 'image/png'
+    return jpeg.getvalue(), 'image/jpeg'
+
+
+def preprocess_image(data: bytes, max_side: int, jpeg_quality: int, max_pixels: int) -> dict:
+    """
+    Normalize an uploaded image for the model
+
+    Runs in a worker process, so it takes its limits as arguments rather
+    than reading Django settings.
+
+    Returns:
+        dict: data (encoded bytes), mime_type, hash (digest of the normalized
+        image), size (width, height)
+
+    Raises:
+        ValueError: The upload isn't a readable image or is too large to decode
+    """
+    try:
+        image = Image.open(io.BytesIO(data))
+        if image.width * image.height > max_pixels:
+            raise ValueError(f"Image is too large ({image.width}x{image.height} pixels)")
+        image = ImageOps.exif_transpose(image).convert('L')
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ValueError(f"Unsupported or corrupt image: {e}")
+
+    image = _crop_to_content(image)
+    image.thumbnail((max_side, max_side), Image.LANCZOS)
+    encoded, mime_type = _encode(image, jpeg_quality)
+
+    return {'data': encoded, 'mime_type': mime_type, 'hash': image_digest(image), 'size': image.size}
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn rather than fork: forking a process with request and scheduler threads can deadlock
+                _pool = ProcessPoolExecutor(
+                    max_workers=settings.IMAGE_WORKERS, mp_context=multiprocessing.get_context('spawn')
+                )
+    return _pool
+
+
+def normalize_image(data: bytes) -> dict:
+    """Run preprocess_image in the worker pool (see preprocess_image for the result)"""
+    global _pool
+    pool = _get_pool()
+    try:
+        return pool.submit(
+            preprocess_image,
+            data,
+            settings.IMAGE_MAX_SIDE,
+            settings.IMAGE_JPEG_QUALITY,
+            settings.IMAGE_MAX_PIXELS,
+        ).result()
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory); start a fresh pool for the next upload
+        with _pool_lock:
+            if _pool is pool:
+                _pool = None
+        raise
@@ -0,0 +1,73 @@
+"""
+Incremental extraction of JSON objects from streamed model output
+"""
+import json
+
+
+class JSONObjectStream:
+    """
+    Finds complete top-level JSON objects in text that arrives in chunks
+
+    Anything outside an object (markdown code fences, a language tag, prose)
+    is skipped. Only brace depth and string/escape state are tracked while
+    scanning, so each character is looked at once; ``json.loads`` runs only
+    on a candidate once its closing brace has arrived.
+    """
+
+    def __init__(self):
+        self._parts = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk: str) -> list:
+        """
+        Scan the next chunk of output
+
+        Returns:
+            list: The objects (dicts) completed by this chunk, in order
+        """
+        completed = []
+        start = 0 if self._depth else chunk.find('{')
+        if start < 0:
+            return completed
+
+        index = start
+        length = len(chunk)
+        while index < length:
+            char = chunk[index]
+            if self._depth == 0:
+                # Between objects: jump to the next opening brace
+                index = chunk.find('{', index)
+                if index < 0:
+                    break
+                start = index
+                self._depth = 1
+            elif self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == '{':
+                self._depth += 1
+            elif char == '}':
+                self._depth -= 1
+                if self._depth == 0:
+                    self._parts.append(chunk[start:index + 1])
+                    candidate = ''.join(self._parts)
+                    self._parts = []
+                    try:
+                        value = json.loads(candidate)
+                    except ValueError:
+                        value = None
+                    if isinstance(value, dict):
+                        completed.append(value)
+            index += 1
+
+        if self._depth:
+            self._parts.append(chunk[start:])
+        return completed
@@ -0,0 +1,214 @@
+"""
+Keyset-paginated reminder listing
+
+Pages are ordered newest first by (created_at, id) and continue from an
+opaque cursor holding the last row's sort key, so fetching page 1000 costs
+the same as page 1 and rows inserted meanwhile never shift later pages.
+Rows are read with ``.values()`` over just the requested fields; streaming
+responses walk the result with ``.iterator()`` so memory stays flat no
+matter how many rows match.
+"""
+import base64
+import json
+from datetime import datetime
+
+import pytz
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from .models import Reminder
+
+
+# API field name -> model field
+LIST_FIELDS = {
+    'id': 'id',
+    'name': 'name',
+    'scheduledTime': 'scheduled_time',
+    'mode': 'mode',
+    'applications': 'applications',
+    'location': 'location',
+    'link': 'link',
+    'receiverEmail': 'receiver_email',
+    'createdAt': 'created_at',
+    'sent': 'sent',
+    'status': 'status',
+    'attempts': 'attempts',
+    'lastError': 'last_error',
+    'nextAttemptAt': 'next_attempt_at',
+    'jsonData': 'json_data',
+}
+STATUSES = {value for value, _ in Reminder.STATUS_CHOICES}
+
+# Always read so the next cursor can be built, even when not returned
+_CURSOR_FIELDS = ('created_at', 'id')
+
+
+def encode_cursor(created_at: datetime, reminder_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), reminder_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str):
+    """Returns (created_at, id) from a cursor made by encode_cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, reminder_id = json.loads(raw)
+        created_at = parse_datetime(created_at)
+        if created_at is None or not isinstance(reminder_id, int):
+            raise ValueError
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    return created_at, reminder_id
+
+
+def _parse_time(name: str, value: str) -> datetime:
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f"{name} must be an ISO 8601 datetime")
+    if parsed.tzinfo is None:
+        # Assume IST if no timezone, as for scheduled times
+        parsed = pytz.timezone('Asia/Kolkata').localize(parsed)
+    return parsed
+
+
+def parse_list_params(params) -> dict:
+    """
+    Validate list query parameters
+
+    Args:
+        params: Query dict with optional cursor, limit, fields, sent, status,
+            receiverEmail, scheduledAfter, scheduledBefore and stream
+
+    Returns:
+        dict: Normalized options for reminder_rows() / serialize_row()
+
+    Raises:
+        ValueError: A parameter is malformed
+    """
+    options = {'stream': params.get('stream', '').lower() == 'true'}
+
+    limit = params.get('limit')
+    if limit:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ValueError("limit must be an integer")
+        if limit < 1:
+            raise ValueError("limit must be positive")
+        options['limit'] = min(limit, settings.LIST_MAX_PAGE_SIZE)
+    else:
+        options['limit'] = None if options['stream'] else settings.LIST_PAGE_SIZE
+
+    fields = params.get('fields')
+    if fields:
+        fields = [f.strip() for f in fields.split(',') if f.strip()]
+        unknown = [f for f in fields if f not in LIST_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        options['fields'] = fields
+    else:
+        options['fields'] = list(LIST_FIELDS)
+
+    options['cursor'] = decode_cursor(params['cursor']) if params.get('cursor') else None
+
+    sent = params.get('sent')
+    if sent:
+        if sent.lower() not in ('true', 'false'):
+            raise ValueError("sent must be true or false")
+        options['sent'] = sent.lower() == 'true'
+    else:
+        options['sent'] = None
+
+    status = params.get('status')
+    if status and status not in STATUSES:
+        raise ValueError(f"status must be one of: {', '.join(sorted(STATUSES))}")
+    options['status'] = status or None
+
+    options['receiver_email'] = params.get('receiverEmail') or None
+    after = params.get('scheduledAfter')
+    before = params.get('scheduledBefore')
+    options['scheduled_after'] = _parse_time('scheduledAfter', after) if after else None
+    options['scheduled_before'] = _parse_time('scheduledBefore', before) if before else None
+
+    return options
+
+
+def reminder_rows(options: dict):
+    """Filtered, keyset-ordered ``.values()`` queryset (unsliced) for parsed list options"""
+    queryset = Reminder.objects.all()
+
+    if options['sent'] is not None:
+        queryset = queryset.filter(sent=options['sent'])
+    if options['status']:
+        queryset = queryset.filter(status=options['status'])
+    if options['receiver_email']:
+        queryset = queryset.filter(receiver_email=options['receiver_email'])
+    if options['scheduled_after']:
+        queryset = queryset.filter(scheduled_time__gte=options['scheduled_after'])
+    if options['scheduled_before']:
+        queryset = queryset.filter(scheduled_time__lt=options['scheduled_before'])
+
+    if options['cursor']:
+        created_at, reminder_id = options['cursor']
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=reminder_id)
+        )
+
+    model_fields = {LIST_FIELDS[f] for f in options['fields']} | set(_CURSOR_FIELDS)
+    return queryset.order_by('-created_at', '-id').values(*model_fields)
+
+
+def serialize_row(row: dict, fields) -> dict:
+    """Turn a ``.values()`` row into the API representation with only ``fields``"""
+    item = {}
+    for name in fields:
+        value = row[LIST_FIELDS[name]]
+        item[name] = value.isoformat() if isinstance(value, datetime) else value
+    return item
+
+
+def next_cursor(rows, limit):
+    """Cursor for the page after ``rows`` (fetched with limit + 1), or None on the last page"""
+    if limit is None or len(rows) <= limit:
+        return None
+    last = rows[limit - 1]
+    return encode_cursor(last['created_at'], last['id'])
+
+
+def _stream_slice(rows, options: dict):
+    return rows[:options['limit']] if options['limit'] else rows
+
+
+def stream_json(rows, options: dict):
+    """Yield ``{"reminders": [...]}`` in chunks of LIST_STREAM_CHUNK_SIZE rows"""
+    chunk_size = settings.LIST_STREAM_CHUNK_SIZE
+    fields = options['fields']
+    yield '{"reminders": ['
+    separator = ''
+    chunk = []
+    for row in _stream_slice(rows, options).iterator(chunk_size=chunk_size):
+        chunk.append(json.dumps(serialize_row(row, fields)))
+        if len(chunk) >= chunk_size:
+            yield separator + ', '.join(chunk)
+            separator, chunk = ', ', []
+    if chunk:
+        yield separator + ', '.join(chunk)
+    yield ']}'
+
+
+async def astream_json(rows, options: dict):
+    """Async variant of stream_json for ASGI"""
+    chunk_size = settings.LIST_STREAM_CHUNK_SIZE
+    fields = options['fields']
+    yield '{"reminders": ['
+    separator = ''
+    chunk = []
+    async for row in _stream_slice(rows, options).aiterator(chunk_size=chunk_size):
+        chunk.append(json.dumps(serialize_row(row, fields)))
+        if len(chunk) >= chunk_size:
+            yield separator + ', '.join(chunk)
+            separator, chunk = ', ', []
+    if chunk:
+        yield separator + ', '.join(chunk)
+    yield ']}'
@@ -0,0 +1,26 @@
+"""
+Clear the Gemini parse-result cache
+"""
+from django.core.management.base import BaseCommand
+
+from reminders.parse_cache import get_parse_cache
+
+
+class Command(BaseCommand):
+    help = "Clear cached Gemini parse results (use after changing MeetingReminderSchema or prompts)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stale-only',
+            action='store_true',
+            help='Only remove expired entries and entries written for an older schema version',
+        )
+
+    def handle(self, *args, **options):
+        cache = get_parse_cache()
+        if cache is None:
+            self.stdout.write("Parse cache is disabled (PARSE_CACHE_ENABLED=false)")
+            return
+
+        deleted = cache.invalidate(stale_only=options['stale_only'])
+        self.stdout.write(self.style.SUCCESS(f"Removed {deleted} cached parse results"))
@@ -0,0 +1,51 @@
+"""
+Run a reminder dispatcher worker
+"""
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from nexanote import metrics
+from reminders.dispatcher import run_dispatcher
+
+
+class Command(BaseCommand):
+    help = "Send due reminders by polling the database (safe to run several side by side)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Reminders claimed per poll (DISPATCHER_BATCH_SIZE)')
+        parser.add_argument('--lease-seconds', type=float, help='How long a claim is held (DISPATCHER_LEASE_SECONDS)')
+        parser.add_argument('--poll-seconds', type=float, help='Wait between idle polls (DISPATCHER_POLL_SECONDS)')
+        parser.add_argument('--once', action='store_true', help='Dispatch one batch and exit')
+        parser.add_argument(
+            '--metrics-port', type=int, default=settings.DISPATCHER_METRICS_PORT,
+            help='Serve Prometheus metrics on this port (DISPATCHER_METRICS_PORT; 0 disables)'
+        )
+
+    def handle(self, *args, **options):
+        stop_event = threading.Event()
+
+        def stop(signum, frame):
+            # Finish the batch in flight, then exit
+            stop_event.set()
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        if options['metrics_port']:
+            # The pending/dead gauges query the database from the scrape's thread
+            metrics.start_http_server(options['metrics_port'], after_scrape=connections.close_all)
+            self.stdout.write(f"Serving metrics on port {options['metrics_port']}")
+
+        self.stdout.write("Reminder dispatcher running")
+        run_dispatcher(
+            stop_event,
+            batch_size=options['batch_size'],
+            lease_seconds=options['lease_seconds'],
+            poll_seconds=options['poll_seconds'],
+            once=options['once'],
+        )
+        self.stdout.write("Reminder dispatcher stopped")
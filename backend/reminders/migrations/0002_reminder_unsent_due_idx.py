@@ -0,0 +1,17 @@
+# Generated by Django 5.0.1 on 2026-10-17 02:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reminders', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reminder',
+            index=models.Index(condition=models.Q(('sent', False)), fields=['scheduled_time'], name='reminder_unsent_due_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.1 on 2026-10-17 02:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reminders', '0003_parsejob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reminder',
+            index=models.Index(fields=['receiver_email', 'scheduled_time'], name='reminder_receiver_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reminder',
+            index=models.Index(fields=['created_at'], name='reminder_created_idx'),
+        ),
+    ]
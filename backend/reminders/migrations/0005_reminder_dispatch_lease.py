@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-17 02:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reminders', '0004_reminder_access_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reminder',
+            name='claim_token',
+            field=models.CharField(blank=True, db_index=True, max_length=32, null=True),
+        ),
+        migrations.AddField(
+            model_name='reminder',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.0.1 on 2026-10-17 02:43
+
+from django.db import migrations, models
+
+
+def mark_sent_reminders(apps, schema_editor):
+    Reminder = apps.get_model('reminders', 'Reminder')
+    Reminder.objects.filter(sent=True).update(status='sent')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reminders', '0005_reminder_dispatch_lease'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reminder',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='reminder',
+            name='last_error',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reminder',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reminder',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('in_flight', 'In flight'), ('sent', 'Sent'), ('retrying', 'Retrying'), ('dead', 'Dead')], default='pending', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='reminder',
+            index=models.Index(condition=models.Q(('status', 'dead')), fields=['created_at'], name='reminder_dead_idx'),
+        ),
+        migrations.RunPython(mark_sent_reminders, migrations.RunPython.noop),
+    ]
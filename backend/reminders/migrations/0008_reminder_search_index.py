@@ -0,0 +1,81 @@
+"""
+Full-text index over reminders (SQLite FTS5)
+
+reminders_reminder_fts holds, per reminder (rowid = reminder id), its name,
+applications, location, link and the other text values in json_data, plus
+its receiver email hex-encoded into a single token (receiver), so filtering
+a search by receiver is one more term of the MATCH instead of a join
+against every match. Triggers keep it in step with every insert, delete and
+update of those columns, including bulk_create and queryset.update().
+
+Django rebuilds a SQLite table for some schema changes (copy, drop, rename),
+which drops its triggers: a migration that alters Reminder that way must
+create the triggers below again.
+"""
+from django.db import migrations
+
+
+# json_data text values that aren't already indexed through their own column
+DETAILS = """(
+    SELECT group_concat(value, ' ') FROM json_tree({row}.json_data)
+    WHERE type = 'text' AND key NOT IN ('name', 'applications', 'location', 'link')
+)"""
+
+INSERT_ROW = f"""
+    INSERT INTO reminders_reminder_fts (rowid, name, applications, location, link, details, receiver)
+    VALUES (new.id, new.name, new.applications, new.location, new.link, {DETAILS.format(row='new')}, hex(new.receiver_email));
+"""
+
+SQL = [
+    """
+    CREATE VIRTUAL TABLE reminders_reminder_fts USING fts5(
+        name, applications, location, link, details, receiver,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    # Column weights for ORDER BY rank: a hit in the name counts most
+    "INSERT INTO reminders_reminder_fts (reminders_reminder_fts, rank) VALUES ('rank', 'bm25(10.0, 4.0, 4.0, 1.0, 2.0, 0.0)')",
+    f"""
+    INSERT INTO reminders_reminder_fts (rowid, name, applications, location, link, details, receiver)
+    SELECT id, name, applications, location, link, {DETAILS.format(row='reminders_reminder')}, hex(receiver_email)
+    FROM reminders_reminder
+    """,
+    f"""
+    CREATE TRIGGER reminders_reminder_fts_insert AFTER INSERT ON reminders_reminder BEGIN
+    {INSERT_ROW}
+    END
+    """,
+    """
+    CREATE TRIGGER reminders_reminder_fts_delete AFTER DELETE ON reminders_reminder BEGIN
+        DELETE FROM reminders_reminder_fts WHERE rowid = old.id;
+    END
+    """,
+    # Only updates that touch indexed columns re-index the row, so delivery
+    # state changes (status, leases, attempts) don't
+    f"""
+    CREATE TRIGGER reminders_reminder_fts_update
+    AFTER UPDATE OF name, applications, location, link, json_data, receiver_email ON reminders_reminder BEGIN
+        DELETE FROM reminders_reminder_fts WHERE rowid = old.id;
+    {INSERT_ROW}
+    END
+    """,
+]
+
+REVERSE_SQL = [
+    "DROP TRIGGER IF EXISTS reminders_reminder_fts_update",
+    "DROP TRIGGER IF EXISTS reminders_reminder_fts_delete",
+    "DROP TRIGGER IF EXISTS reminders_reminder_fts_insert",
+    "DROP TABLE IF EXISTS reminders_reminder_fts",
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reminders', '0007_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.RunSQL(SQL, REVERSE_SQL),
+    ]
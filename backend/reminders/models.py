@@ -1,9 +1,81 @@
+import uuid
+
 from django.db import models
 from django.utils import timezone
 
 
+class ReminderQuerySet(models.QuerySet):
+    """Query paths for the scheduler and list endpoints, each backed by an index on Reminder"""
+    
+    def unsent(self):
+        """Reminders still to be delivered (dead-lettered ones are excluded until requeued)"""
+        return self.filter(sent=False).exclude(status=Reminder.STATUS_DEAD)
+    
+    def due_between(self, start=None, end=None):
+        """
+        Unsent reminders with ``start <= scheduled_time <= end``, earliest first
+        
+        Either bound may be None. Served by reminder_unsent_due_idx.
+        """
+        queryset = self.unsent()
+        if start is not None:
+            queryset = queryset.filter(scheduled_time__gte=start)
+        if end is not None:
+            queryset = queryset.filter(scheduled_time__lte=end)
+        return queryset.order_by('scheduled_time')
+    
+    def ready_by(self, now, due_by=None):
+        """
+        Unsent reminders due by ``now`` whose retry backoff (if any) has also passed
+        
+        ``due_by`` moves the due cutoff past ``now`` (digest look-ahead);
+        backoffs are still checked against ``now``.
+        """
+        return self.due_between(end=due_by or now).filter(
+            models.Q(next_attempt_at__isnull=True) | models.Q(next_attempt_at__lte=now)
+        )
+    
+    def claimable(self, now, due_by=None):
+        """Reminders ready by ``now`` (or ``due_by``) that no dispatcher holds an unexpired lease on"""
+        return self.ready_by(now, due_by).filter(
+            models.Q(lease_expires_at__isnull=True) | models.Q(lease_expires_at__lt=now)
+        )
+    
+    def dead(self):
+        return self.filter(status=Reminder.STATUS_DEAD)
+    
+    def pending_for(self, receiver_email: str, after=None):
+        """
+        Unsent reminders for one receiver, earliest first
+        
+        Only reminders scheduled at or after ``after`` (default: now) are
+        included. Served by reminder_receiver_time_idx.
+        """
+        return self.filter(
+            receiver_email=receiver_email,
+            scheduled_time__gte=after or timezone.now(),
+            sent=False,
+        ).order_by('scheduled_time')
+
+
 class Reminder(models.Model):
     """Model to store scheduled reminders"""
+    # Delivery state machine:
+    # pending -> in_flight -> sent, or -> retrying -> in_flight ... until
+    # REMINDER_MAX_ATTEMPTS is reached -> dead (until requeued -> pending)
+    STATUS_PENDING = 'pending'
+    STATUS_IN_FLIGHT = 'in_flight'
+    STATUS_SENT = 'sent'
+    STATUS_RETRYING = 'retrying'
+    STATUS_DEAD = 'dead'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_IN_FLIGHT, 'In flight'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_RETRYING, 'Retrying'),
+        (STATUS_DEAD, 'Dead'),
+    ]
+    
     name = models.CharField(max_length=255)
     scheduled_time = models.DateTimeField()
     mode = models.CharField(max_length=50, blank=True, null=True)  # online/offline
@@ -15,10 +87,90 @@ class Reminder(models.Model):
     json_data = models.JSONField(default=dict)  # Store the full Pydantic JSON
     job_id = models.CharField(max_length=255, unique=True, blank=True, null=True)
     sent = models.BooleanField(default=False)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, null=True)
+    next_attempt_at = models.DateTimeField(blank=True, null=True)
+    # Set while a dispatcher process holds the row (see reminders/dispatcher.py)
+    claim_token = models.CharField(max_length=32, blank=True, null=True, db_index=True)
+    lease_expires_at = models.DateTimeField(blank=True, null=True)
+    
+    objects = ReminderQuerySet.as_manager()
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Startup rehydration and batch dispatch scan unsent reminders in scheduled_time order
+            models.Index(
+                fields=['scheduled_time'],
+                condition=models.Q(sent=False),
+                name='reminder_unsent_due_idx',
+            ),
+            # Per-receiver lookups ("what did this user schedule") in time order
+            models.Index(fields=['receiver_email', 'scheduled_time'], name='reminder_receiver_time_idx'),
+            # Default ordering and the list endpoint's keyset pagination (id is the rowid tie-break)
+            models.Index(fields=['created_at'], name='reminder_created_idx'),
+            # Dead-letter listing, newest first
+            models.Index(fields=['created_at'], condition=models.Q(status='dead'), name='reminder_dead_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.scheduled_time}"
 
+
+class ParseJob(models.Model):
+    """A schedule request accepted with 202 and parsed by the background worker pool"""
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user_input = models.TextField()
+    receiver_email = models.EmailField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    parser = models.CharField(max_length=20, blank=True, null=True)  # rules/gemini
+    reminder = models.ForeignKey(Reminder, on_delete=models.SET_NULL, blank=True, null=True)
+    error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Startup recovery looks for jobs that never finished
+            models.Index(fields=['status', 'created_at'], name='parsejob_status_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.id} - {self.status}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    A schedule request sent with an Idempotency-Key, and what it produced
+    
+    While the first request runs, ``expires_at`` is a short lock; once it
+    has finished it moves out to the replay TTL. Repeats are answered with
+    the stored reminder (or parse job) until then.
+    """
+    key = models.CharField(max_length=255, primary_key=True)
+    request_hash = models.CharField(max_length=64)
+    reminder = models.ForeignKey(Reminder, on_delete=models.CASCADE, blank=True, null=True)
+    parse_job = models.ForeignKey(ParseJob, on_delete=models.CASCADE, blank=True, null=True)
+    parser = models.CharField(max_length=20, blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+    
+    @property
+    def completed(self) -> bool:
+        return self.reminder_id is not None or self.parse_job_id is not None
+    
+    def __str__(self):
+        return self.key
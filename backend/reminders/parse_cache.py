@@ -0,0 +1,206 @@
+"""
+Two-tier cache for Gemini parse results
+
+Tier 1 is an in-process LRU with a TTL; tier 2 is a small SQLite file that
+survives restarts and is shared by every process on the host. Keys cover the
+normalized input text, the model that answered and its temperature, the
+schema version and the IST date the input was parsed on (relative inputs
+like "tomorrow 10am" must not be served from another day's entry). Inputs
+relative to the current time ("in 30 minutes") are never cached.
+"""
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import pytz
+from django.conf import settings
+
+from .schemas import MeetingReminderSchema
+
+
+logger = logging.getLogger(__name__)
+
+
+def _compute_schema_version() -> str:
+    schema = MeetingReminderSchema.model_json_schema()
+    return hashlib.sha256(json.dumps(schema, sort_keys=True).encode()).hexdigest()[:12]
+
+
+# Changes whenever MeetingReminderSchema changes, which retires every older entry
+SCHEMA_VERSION = _compute_schema_version()
+
+
+# Times counted from the moment of parsing, which a per-day key can't pin down
+_RELATIVE_TIME = re.compile(
+    r'\b(?:in|after|within)\s+(?:\d+|an?|one|two|three|four|five|ten|fifteen|twenty|thirty|half|a few|few|couple of)'
+    r'\b.{0,12}?\b(?:sec|secs|seconds?|mins?|minutes?|hrs?|hours?)\b'
+    r'|\bhalf an? hour\b|\bfrom now\b|\bright now\b|\bnow\b|\bsoon\b|\blater\b',
+    re.I
+)
+
+
+def normalize_input(user_input: str) -> str:
+    """Collapse whitespace so re-pasted invites with different line breaks share an entry"""
+    return ' '.join(user_input.split())
+
+
+def is_cacheable(user_input: str) -> bool:
+    """False for inputs whose time depends on when they are parsed ("in 30 minutes")"""
+    return _RELATIVE_TIME.search(user_input) is None
+
+
+class ParseCache:
+    """
+    LRU + SQLite cache of validated parse results
+
+    Args:
+        path: SQLite file for the persistent tier (None disables it)
+        max_entries: Size of the in-process LRU
+        ttl_seconds: Lifetime of an entry in both tiers
+    """
+
+    def __init__(self, path, max_entries: int = 1024, ttl_seconds: float = 86400):
+        self.path = str(path) if path else None
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._memory = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+
+    def make_key(self, user_input: str, model_name: str, temperature: float) -> str:
+        anchor_date = datetime.now(pytz.timezone('Asia/Kolkata')).date().isoformat()
+        raw = '\x1f'.join([
+            SCHEMA_VERSION, model_name, repr(temperature), anchor_date, normalize_input(user_input)
+        ])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _db(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS parse_cache ('
+                'key TEXT PRIMARY KEY, schema_version TEXT NOT NULL, '
+                'value TEXT NOT NULL, expires_at REAL NOT NULL)'
+            )
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS parse_cache_schema_version '
+                'ON parse_cache (schema_version)'
+            )
+            self._local.conn = conn
+        return conn
+
+    def _count(self, counter: str):
+        with self._lock:
+            self._counters[counter] += 1
+
+    def _remember(self, key: str, expires_at: float, value: dict):
+        with self._lock:
+            self._memory[key] = (expires_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key: str):
+        """Return the cached parse result for ``key`` or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self._counters['memory_hits'] += 1
+                    return dict(entry[1])
+                del self._memory[key]
+
+        if self.path:
+            try:
+                row = self._db().execute(
+                    'SELECT value, expires_at FROM parse_cache WHERE key = ? AND expires_at > ?',
+                    (key, now)
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.warning("Parse cache read failed: %s", e)
+                row = None
+            if row is not None:
+                value = MeetingReminderSchema.model_validate_json(row[0]).model_dump()
+                self._remember(key, row[1], value)
+                self._count('disk_hits')
+                return dict(value)
+
+        self._count('misses')
+        return None
+
+    def set(self, key: str, value: dict):
+        """Store a validated parse result in both tiers"""
+        expires_at = time.time() + self.ttl_seconds
+        self._remember(key, expires_at, dict(value))
+        if self.path:
+            try:
+                self._db().execute(
+                    'INSERT OR REPLACE INTO parse_cache (key, schema_version, value, expires_at) '
+                    'VALUES (?, ?, ?, ?)',
+                    (key, SCHEMA_VERSION, MeetingReminderSchema(**value).model_dump_json(), expires_at)
+                )
+            except sqlite3.Error as e:
+                logger.warning("Parse cache write failed: %s", e)
+
+    def invalidate(self, stale_only: bool = False) -> int:
+        """
+        Drop cached entries. With ``stale_only`` only entries written for an
+        older schema version or already expired are removed.
+
+        Returns:
+            int: Number of persistent rows deleted
+        """
+        if not stale_only:
+            with self._lock:
+                self._memory.clear()
+        if not self.path:
+            return 0
+        if stale_only:
+            cursor = self._db().execute(
+                'DELETE FROM parse_cache WHERE schema_version != ? OR expires_at <= ?',
+                (SCHEMA_VERSION, time.time())
+            )
+        else:
+            cursor = self._db().execute('DELETE FROM parse_cache')
+        return cursor.rowcount
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats['memory_entries'] = len(self._memory)
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_ratio'] = round((stats['memory_hits'] + stats['disk_hits']) / lookups, 4) if lookups else 0.0
+        stats['schema_version'] = SCHEMA_VERSION
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_parse_cache():
+    """Process-wide parse cache, or None when PARSE_CACHE_ENABLED is off"""
+    global _cache
+    if not settings.PARSE_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ParseCache(
+                    settings.PARSE_CACHE_PATH,
+                    max_entries=settings.PARSE_CACHE_MAX_ENTRIES,
+                    ttl_seconds=settings.PARSE_CACHE_TTL_SECONDS,
+                )
+    return _cache
@@ -0,0 +1,134 @@
+"""
+Background worker pool for accepted-but-not-yet-parsed schedule requests
+
+The schedule endpoint can record a ParseJob and return 202 straight away;
+parsing (possibly a slow Gemini call) and scheduling then run here, so web
+workers are never held for the LLM latency.
+
+Every serving process sweeps for jobs abandoned by a process that died:
+pending or running rows untouched for ``PARSE_JOB_LEASE_SECONDS``. Each one
+is reclaimed with an UPDATE conditional on the timestamp it was read with,
+so only one process picks it up.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .models import ParseJob
+from .services import create_scheduled_reminder
+
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+_recovery_thread = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.PARSE_WORKERS,
+                    thread_name_prefix='parse-worker'
+                )
+    return _executor
+
+
+def submit_parse_job(user_input: str, receiver_email: str) -> ParseJob:
+    """Record a pending parse job and hand it to the worker pool"""
+    job = ParseJob.objects.create(user_input=user_input, receiver_email=receiver_email)
+    _get_executor().submit(run_parse_job, job.id)
+    return job
+
+
+def run_parse_job(job_id):
+    """Worker entry point: parse and schedule one job, recording the outcome on its row"""
+    close_old_connections()
+    try:
+        # Claim the job so a resumed copy never runs twice
+        claimed = ParseJob.objects.filter(pk=job_id, status=ParseJob.STATUS_PENDING).update(
+            status=ParseJob.STATUS_RUNNING, updated_at=timezone.now()
+        )
+        if not claimed:
+            return
+        job = ParseJob.objects.get(pk=job_id)
+        
+        try:
+            reminder, parser = create_scheduled_reminder(job.user_input, job.receiver_email)
+        except Exception as e:
+            ParseJob.objects.filter(pk=job_id).update(
+                status=ParseJob.STATUS_FAILED, error=str(e), updated_at=timezone.now()
+            )
+            return
+        
+        ParseJob.objects.filter(pk=job_id).update(
+            status=ParseJob.STATUS_DONE, reminder=reminder, parser=parser, updated_at=timezone.now()
+        )
+    except Exception:
+        logger.exception("Error running parse job %s", job_id)
+    finally:
+        close_old_connections()
+
+
+def resume_parse_jobs() -> int:
+    """
+    Requeue jobs abandoned by a process that stopped
+    
+    Jobs still pending or running after ``PARSE_JOB_LEASE_SECONDS`` without
+    an update are reset to pending and run again. Jobs of live processes
+    are left alone as long as each parse finishes within the lease.
+    
+    Returns:
+        int: Number of jobs requeued
+    """
+    now = timezone.now()
+    stale = list(
+        ParseJob.objects.filter(
+            status__in=[ParseJob.STATUS_PENDING, ParseJob.STATUS_RUNNING],
+            updated_at__lt=now - timedelta(seconds=settings.PARSE_JOB_LEASE_SECONDS),
+        )
+        .order_by('created_at')
+        .values_list('id', 'updated_at')
+    )
+    executor = _get_executor()
+    resumed = 0
+    for job_id, updated_at in stale:
+        # Another process sweeping at the same time changes updated_at first
+        claimed = ParseJob.objects.filter(pk=job_id, updated_at=updated_at).update(
+            status=ParseJob.STATUS_PENDING, updated_at=now
+        )
+        if claimed:
+            executor.submit(run_parse_job, job_id)
+            resumed += 1
+    return resumed
+
+
+def _sweep_forever():
+    while True:
+        try:
+            resumed = resume_parse_jobs()
+            if resumed:
+                logger.info("Resumed %d abandoned parse jobs", resumed)
+        except Exception:
+            logger.exception("Could not resume parse jobs")
+        finally:
+            close_old_connections()
+        time.sleep(settings.PARSE_JOB_LEASE_SECONDS / 2)
+
+
+def start_parse_job_recovery():
+    """Start the thread that requeues abandoned jobs (once per process; no queries run here)"""
+    global _recovery_thread
+    with _executor_lock:
+        if _recovery_thread is None:
+            _recovery_thread = threading.Thread(target=_sweep_forever, name='parse-job-recovery', daemon=True)
+            _recovery_thread.start()
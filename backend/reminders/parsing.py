@@ -0,0 +1,128 @@
+"""
+Meeting input parsing pipeline
+
+Inputs go to the rule-based fast parser first and only reach Gemini when the
+rules can't resolve them with enough confidence. Concurrent Gemini parses of
+the same (whitespace-normalized) input share one in-flight call, so retry
+storms and double submits cost one LLM request. If every Gemini model on the
+fallback ladder is unavailable, the rule-based parser's best guess is used
+whatever its confidence (GEMINI_RULES_FALLBACK).
+
+Uploaded screenshots are normalized in a worker process (image_ingest) and
+always go to Gemini; identical uploads share a call the same way, keyed by
+a digest of the normalized image.
+"""
+from django.conf import settings
+from nexanote import metrics
+from nexanote.single_flight import AsyncSingleFlight, SingleFlight
+
+from .fast_parser import fast_parse
+from .gemini_service import GeminiUnavailable, parse_meeting_input, aparse_meeting_input, parse_meeting_image
+from .image_ingest import normalize_image
+from .parse_cache import normalize_input
+
+
+PARSER_RULES = 'rules'
+PARSER_GEMINI = 'gemini'
+
+PARSE_TOTAL = metrics.counter('nexanote_parse_total', 'Meeting inputs parsed, by parser', ('parser',))
+_rules_count = PARSE_TOTAL.labels(PARSER_RULES)
+_gemini_count = PARSE_TOTAL.labels(PARSER_GEMINI)
+_rules_fallback_count = PARSE_TOTAL.labels('rules_fallback')
+COALESCED_TOTAL = metrics.counter(
+    'nexanote_parse_coalesced_total', 'Gemini parses that shared an identical in-flight call'
+)
+
+_gemini_flight = SingleFlight()
+_agemini_flight = AsyncSingleFlight()
+
+
+def _fast_path(user_input: str):
+    if settings.FAST_PARSER_ENABLED:
+        result = fast_parse(user_input)
+        if result.data is not None and result.confidence >= settings.FAST_PARSER_MIN_CONFIDENCE:
+            return result.data
+    return None
+
+
+def _rules_fallback(user_input: str, error: GeminiUnavailable) -> dict:
+    """Last ladder step: the rule-based parse at any confidence, or re-raise ``error``"""
+    result = fast_parse(user_input) if settings.GEMINI_RULES_FALLBACK else None
+    if result is None or result.data is None:
+        raise error
+    _rules_fallback_count.inc()
+    return result.data
+
+
+def parse_user_input(user_input: str):
+    """
+    Parse user input into meeting data
+    
+    Args:
+        user_input: Text description or meeting link
+        
+    Returns:
+        tuple: (dict matching MeetingReminderSchema, name of the parser that handled it)
+    """
+    data = _fast_path(user_input)
+    if data is not None:
+        _rules_count.inc()
+        return data, PARSER_RULES
+    
+    try:
+        data, shared = _gemini_flight.do(normalize_input(user_input), parse_meeting_input, user_input)
+    except GeminiUnavailable as e:
+        return _rules_fallback(user_input, e), PARSER_RULES
+    if shared:
+        COALESCED_TOTAL.inc()
+    else:
+        _gemini_count.inc()
+    return data, PARSER_GEMINI
+
+
+async def aparse_user_input(user_input: str):
+    """Async variant of parse_user_input; the Gemini fallback is awaited natively"""
+    data = _fast_path(user_input)
+    if data is not None:
+        _rules_count.inc()
+        return data, PARSER_RULES
+    
+    try:
+        data, shared = await _agemini_flight.do(normalize_input(user_input), aparse_meeting_input, user_input)
+    except GeminiUnavailable as e:
+        return _rules_fallback(user_input, e), PARSER_RULES
+    if shared:
+        COALESCED_TOTAL.inc()
+    else:
+        _gemini_count.inc()
+    return data, PARSER_GEMINI
+
+
+def parse_image_input(image_data: bytes, note: str = ''):
+    """
+    Parse an uploaded invite screenshot into meeting data
+    
+    Args:
+        image_data: The uploaded image file's bytes
+        note: Optional text sent along with the image
+        
+    Returns:
+        tuple: (dict matching MeetingReminderSchema, name of the parser that handled it)
+    """
+    image = normalize_image(image_data)
+    note = normalize_input(note)
+    
+    try:
+        data, shared = _gemini_flight.do(
+            ('image', image['hash'], note),
+            parse_meeting_image, image['data'], image['mime_type'], image['hash'], note,
+        )
+    except GeminiUnavailable as e:
+        if not note:
+            raise
+        return _rules_fallback(note, e), PARSER_RULES
+    if shared:
+        COALESCED_TOTAL.inc()
+    else:
+        _gemini_count.inc()
+    return data, PARSER_GEMINI
@@ -0,0 +1,325 @@
+"""
+Reminder job scheduling backed by the Reminder table
+
+Used when ``SCHEDULER_MODE`` is ``embedded``; in ``dispatcher`` mode the
+web processes register nothing and reminders are sent by
+``manage.py run_dispatcher`` (see dispatcher.py).
+
+Two dispatch modes are supported (``REMINDER_DISPATCH_MODE``):
+
+- ``single``: one APScheduler date job per reminder.
+- ``batch``: reminders are bucketed into ``REMINDER_BATCH_WINDOW_SECONDS``
+  windows with one job per window. When a window fires, every unsent reminder
+  due by its end is rendered and sent over one SMTP session and marked sent
+  with a single UPDATE. With ``DIGEST_ENABLED`` each receiver gets one
+  digest email per window.
+"""
+import logging
+import math
+import threading
+from datetime import datetime, timedelta
+
+from apscheduler.job import Job
+from apscheduler.triggers.date import DateTrigger
+from apscheduler.util import datetime_to_utc_timestamp
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+import pytz
+
+from nexanote.scheduler import scheduler, jobstores, job_defaults
+from .models import Reminder
+from .delivery import DELIVERY_FIELDS, deliver, digest_cutoff, mark_sent, mark_failed
+from .email_service import send_reminder_email
+
+
+logger = logging.getLogger(__name__)
+
+
+# Batch windows run one at a time so two overlapping windows never pick up the same rows
+_batch_lock = threading.Lock()
+
+
+def reminder_job_id(reminder_id, job_id=None) -> str:
+    """Scheduler job id for a reminder (rows created before job ids existed get a stable fallback)"""
+    return job_id or f"reminder_{reminder_id}"
+
+
+def batch_window_end(scheduled_time: datetime) -> float:
+    """UTC timestamp of the end of the dispatch window containing ``scheduled_time``"""
+    window = settings.REMINDER_BATCH_WINDOW_SECONDS
+    return math.ceil(scheduled_time.timestamp() / window) * window
+
+
+def batch_job_id(window_end: float) -> str:
+    return f"reminder_batch_{int(window_end)}"
+
+
+def send_reminder_job(reminder_id: int):
+    """
+    Scheduler entry point: send one reminder and record the outcome.
+
+    Jobs only carry the reminder id, so the row is re-read at fire time and a
+    reminder that was already sent, dead-lettered or deleted is skipped. A
+    failed send is scheduled again after its backoff. The outcome is written
+    in one transaction with those of jobs finishing at the same time.
+    """
+    close_old_connections()
+    try:
+        reminder = Reminder.objects.unsent().filter(pk=reminder_id).first()
+        if reminder is None:
+            return
+
+        try:
+            send_reminder_email(
+                receiver_email=reminder.receiver_email,
+                reminder_name=reminder.name,
+                scheduled_time=reminder.scheduled_time,
+                meeting_link=reminder.link,
+                created_at=reminder.created_at
+            )
+        except Exception as e:
+            logger.warning("Error sending reminder email for %s: %s", reminder_id, e)
+            retry_at = mark_failed(reminder, e, coalesce=True)
+            if retry_at is not None:
+                _schedule_single(reminder, retry_at)
+            return
+        mark_sent([reminder], coalesce=True)
+    except Exception:
+        logger.exception("Error sending reminder email for %s", reminder_id)
+    finally:
+        close_old_connections()
+
+
+def send_reminder_batch(window_end: float):
+    """
+    Scheduler entry point for batch mode: send everything due by ``window_end``.
+
+    Picks up at most ``REMINDER_BATCH_MAX_SIZE`` of the oldest unsent reminders
+    due by the end of the window, including any left over from earlier
+    windows. If the cap was hit, the current window is scheduled again so a
+    backlog drains one capped batch per window. Failed sends get a window
+    at their retry time.
+    """
+    close_old_connections()
+    try:
+        with _batch_lock:
+            cutoff = datetime.fromtimestamp(window_end, tz=pytz.UTC)
+            limit = settings.REMINDER_BATCH_MAX_SIZE
+            reminders = list(
+                Reminder.objects
+                .ready_by(cutoff)
+                .only(*DELIVERY_FIELDS)
+                [:limit]
+            )
+            if not reminders:
+                return
+            due = len(reminders)
+
+            if settings.DIGEST_ENABLED:
+                # Pull the same receivers' upcoming reminders into their digests;
+                # their own windows find them sent and skip them
+                reminders += list(
+                    Reminder.objects
+                    .ready_by(timezone.now(), due_by=digest_cutoff(cutoff))
+                    .filter(receiver_email__in={r.receiver_email for r in reminders})
+                    .exclude(pk__in=[r.pk for r in reminders])
+                    .only(*DELIVERY_FIELDS)
+                )
+
+            # Render every message first, then send them all over one session
+            retries = deliver(reminders)['retries']
+
+        if due == limit:
+            _schedule_batch_window(batch_window_end(timezone.now()))
+        if retries:
+            _schedule_batch_window(batch_window_end(min(retries)))
+    except Exception:
+        logger.exception("Error sending reminder batch ending %s", window_end)
+    finally:
+        close_old_connections()
+
+
+def _schedule_batch_window(window_end: float):
+    return scheduler.add_job(
+        send_reminder_batch,
+        'date',
+        run_date=datetime.fromtimestamp(window_end, tz=pytz.UTC),
+        args=[window_end],
+        id=batch_job_id(window_end),
+        replace_existing=True
+    )
+
+
+def _dispatcher_mode() -> bool:
+    # Dispatcher processes find due rows themselves; nothing is registered in-process
+    return settings.SCHEDULER_MODE == 'dispatcher'
+
+
+def schedule_reminder(reminder: Reminder):
+    """Register a single reminder with the running scheduler"""
+    if _dispatcher_mode():
+        return None
+    
+    if settings.REMINDER_DISPATCH_MODE == 'batch':
+        return _schedule_batch_window(batch_window_end(reminder.scheduled_time))
+
+    return _schedule_single(reminder, reminder.scheduled_time)
+
+
+def _schedule_single(reminder: Reminder, run_date):
+    return scheduler.add_job(
+        send_reminder_job,
+        'date',
+        run_date=run_date,
+        args=[reminder.id],
+        id=reminder_job_id(reminder.id, reminder.job_id),
+        replace_existing=True
+    )
+
+
+def schedule_reminders(reminders):
+    """
+    Register many reminders with the scheduler in one job store update
+
+    Jobs are built up front and added with a single sort of the job store
+    instead of one add_job() call (and scheduler wakeup) per reminder.
+    """
+    if not reminders or _dispatcher_mode():
+        return
+
+    if settings.REMINDER_DISPATCH_MODE == 'batch':
+        for window_end in sorted({batch_window_end(r.scheduled_time) for r in reminders}):
+            _schedule_batch_window(window_end)
+        return
+
+    entries = []
+    template = None
+    for reminder in reminders:
+        job_id = reminder_job_id(reminder.id, reminder.job_id)
+        if template is None:
+            job = template = _build_job(send_reminder_job, job_id, (reminder.id,), reminder.scheduled_time)
+        else:
+            job = _clone_job(template, job_id, (reminder.id,), reminder.scheduled_time)
+        entries.append((job, datetime_to_utc_timestamp(job.next_run_time)))
+
+    # add_job() takes the same (private) lock; APScheduler is pinned for it
+    with scheduler._jobstores_lock:
+        jobstores['default'].add_jobs(entries)
+    if scheduler.running:
+        scheduler.wakeup()
+
+
+def _build_job(func, job_id: str, args: tuple, run_date) -> Job:
+    """Build a date job the way add_job() would, without waking the scheduler"""
+    job = Job(
+        scheduler,
+        id=job_id,
+        func=func,
+        trigger=DateTrigger(run_date=run_date, timezone=scheduler.timezone),
+        executor='default',
+        args=args,
+        kwargs={},
+        name=job_id,
+        next_run_time=run_date,
+        **job_defaults
+    )
+    job._jobstore_alias = 'default'
+    return job
+
+
+# Attributes shared by every reminder job; copied from a validated template job
+_SHARED_JOB_SLOTS = (
+    '_scheduler', '_jobstore_alias', 'executor', 'func', 'func_ref', 'kwargs',
+    'misfire_grace_time', 'coalesce', 'max_instances',
+)
+
+
+def _clone_job(template: Job, job_id: str, args: tuple, run_date) -> Job:
+    """
+    Copy a template job with a new id, arguments and run time.
+
+    Job() re-validates the callable signature with inspect on every
+    construction, which dominates startup with hundreds of thousands of rows.
+    Every rehydrated job shares the same callable and options, so they are
+    validated once on the template and copied here.
+    """
+    run_date = run_date.astimezone(scheduler.timezone)
+    trigger = DateTrigger.__new__(DateTrigger)
+    trigger.run_date = run_date
+
+    job = Job.__new__(Job)
+    for slot in _SHARED_JOB_SLOTS:
+        setattr(job, slot, getattr(template, slot))
+    job.id = job_id
+    job.name = job_id
+    job.args = args
+    job.trigger = trigger
+    job.next_run_time = run_date
+    return job
+
+
+def rehydrate_scheduler() -> dict:
+    """
+    Load every unsent reminder back into the scheduler before it starts.
+
+    Pending rows are streamed in ``scheduled_time`` order with one query over
+    the unsent-reminder index and handed to the job store in a single bulk
+    add. Reminders whose time passed while the process was down are replayed
+    immediately: in single mode they are spaced out to
+    ``SCHEDULER_CATCHUP_PER_SECOND``, in batch mode the first window sweeps
+    them up ``REMINDER_BATCH_MAX_SIZE`` at a time.
+
+    Returns:
+        dict: Counts of future and caught-up reminders that were registered
+    """
+    if scheduler.running:
+        raise RuntimeError("rehydrate_scheduler() must run before the scheduler starts")
+
+    now = timezone.now()
+    batch_mode = settings.REMINDER_DISPATCH_MODE == 'batch'
+    catchup_interval = 1.0 / max(settings.SCHEDULER_CATCHUP_PER_SECOND, 0.001)
+
+    pending = (
+        Reminder.objects
+        .due_between()
+        .values_list('id', 'job_id', 'scheduled_time', 'next_attempt_at')
+        .iterator(chunk_size=settings.SCHEDULER_REHYDRATE_CHUNK_SIZE)
+    )
+
+    entries = []
+    scheduled = 0
+    caught_up = 0
+    template = None
+    windows = set()
+    for reminder_id, job_id, scheduled_time, next_attempt_at in pending:
+        if next_attempt_at is not None:
+            # Reminders waiting out a retry backoff resume at their retry time
+            scheduled_time = max(scheduled_time, next_attempt_at)
+        if scheduled_time <= now:
+            run_date = now + timedelta(seconds=caught_up * catchup_interval)
+            caught_up += 1
+        else:
+            run_date = scheduled_time
+            scheduled += 1
+
+        if batch_mode:
+            # One job per window; retry times can put rows in windows out of order
+            window_end = batch_window_end(max(scheduled_time, now))
+            if window_end in windows:
+                continue
+            windows.add(window_end)
+            func, job_id, args = send_reminder_batch, batch_job_id(window_end), (window_end,)
+            run_date = datetime.fromtimestamp(window_end, tz=pytz.UTC)
+        else:
+            func, job_id, args = send_reminder_job, reminder_job_id(reminder_id, job_id), (reminder_id,)
+
+        if template is None:
+            job = template = _build_job(func, job_id, args, run_date)
+        else:
+            job = _clone_job(template, job_id, args, run_date)
+        entries.append((job, datetime_to_utc_timestamp(job.next_run_time)))
+
+    jobstores['default'].add_jobs(entries)
+
+    return {'scheduled': scheduled, 'caught_up': caught_up}
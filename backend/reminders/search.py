@@ -0,0 +1,189 @@
+"""
+Ranked full-text search over reminders
+
+Backed by the reminders_reminder_fts FTS5 table (migration 0008), which
+triggers keep in step with Reminder. Free text from the user becomes a query
+of quoted terms that must all match; a term ending in * matches as a prefix.
+Matches come back best first with a highlighted snippet of the best matching
+field.
+
+BM25 has to score every row it orders, so a word found in a tenth of a
+million reminders would take hundreds of milliseconds to rank in full.
+Instead matches are ranked SEARCH_RANK_WINDOW at a time, newest window
+first, with hits in the name weighted highest. The cursor carries the rowid
+range of the current window, so later pages rank the same rows even as
+reminders are added; once a window is used up, paging continues with the
+next-older one.
+"""
+import base64
+import html
+import json
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from .listing import LIST_FIELDS, parse_list_params, serialize_row
+from .models import Reminder
+
+
+FTS_TABLE = 'reminders_reminder_fts'
+# Columns free text is matched against; receiver only serves the receiverEmail filter
+TEXT_COLUMNS = ('name', 'applications', 'location', 'link', 'details')
+# Terms beyond this are ignored, so a pasted paragraph can't make a huge query
+MAX_TERMS = 16
+# Snippet highlight markers; replaced with <mark> tags once the snippet is HTML-escaped
+_OPEN, _CLOSE = '\x02', '\x03'
+_TERM = re.compile(r'(\w+)(\*?)')
+
+
+def fts_query(text: str) -> str:
+    """
+    FTS5 MATCH expression for free text: every word must match, words ending in * as prefixes
+
+    Raises:
+        ValueError: The text has no words
+    """
+    terms = _TERM.findall(text)
+    if not terms:
+        raise ValueError("q must contain at least one word")
+    words = ' '.join(f'"{word}"{star}' for word, star in terms[:MAX_TERMS])
+    return f"{{{' '.join(TEXT_COLUMNS)}}} : ({words})"
+
+
+def receiver_term(receiver_email: str) -> str:
+    """FTS5 term matching the reminders of one receiver (see migration 0008)"""
+    return f'receiver : "{receiver_email.encode().hex()}"'
+
+
+def matching_ids(text: str) -> RawSQL:
+    """Subquery of the ids of reminders matching ``text``, for ``filter(id__in=...)``"""
+    return RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (fts_query(text),))
+
+
+def encode_cursor(low: int, high: int, offset: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([low, high, offset]).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str):
+    """
+    Returns:
+        tuple: (lowest rowid, highest rowid, offset) of the ranked window
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        low, high, offset = json.loads(raw)
+        if not all(isinstance(value, int) and value >= 0 for value in (low, high, offset)):
+            raise ValueError
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    return low, high, offset
+
+
+def parse_search_params(params) -> dict:
+    """
+    Validate search query parameters
+
+    Takes q and cursor plus the list endpoint's limit, fields and filters
+    (see listing.parse_list_params).
+
+    Raises:
+        ValueError: A parameter is malformed
+    """
+    rest = params.copy()
+    rest.pop('cursor', None)
+    rest.pop('stream', None)
+    options = parse_list_params(rest)
+    options['query'] = fts_query(params.get('q', ''))
+    options['window'] = decode_cursor(params['cursor']) if params.get('cursor') else None
+    return options
+
+
+def _snippet(text: str) -> str:
+    return html.escape(text or '').replace(_OPEN, '<mark>').replace(_CLOSE, '</mark>')
+
+
+def _match_clause(options: dict):
+    """FROM/WHERE shared by the window and page queries, and its parameters"""
+    ops = connection.ops
+    query = options['query']
+    if options['receiver_email'] is not None:
+        query = f"{query} AND {receiver_term(options['receiver_email'])}"
+    conditions = [f"{FTS_TABLE} MATCH %s"]
+    values = [query]
+    filters = (
+        ('sent', 'r.sent = %s', bool),
+        ('status', 'r.status = %s', str),
+        ('scheduled_after', 'r.scheduled_time >= %s', ops.adapt_datetimefield_value),
+        ('scheduled_before', 'r.scheduled_time < %s', ops.adapt_datetimefield_value),
+    )
+    for option, condition, adapt in filters:
+        if options[option] is not None:
+            conditions.append(condition)
+            values.append(adapt(options[option]))
+    # Only join when filtering: otherwise the query never leaves the index
+    joins = f"JOIN reminders_reminder r ON r.id = {FTS_TABLE}.rowid" if len(conditions) > 1 else ''
+    return f"FROM {FTS_TABLE} {joins} WHERE {' AND '.join(conditions)}", values
+
+
+def _window(cursor, clause: str, values: list, below: int = None):
+    """Rowid range of the newest SEARCH_RANK_WINDOW matches (older than ``below``), or (None, None)"""
+    if below is not None:
+        clause, values = f"{clause} AND {FTS_TABLE}.rowid < %s", [*values, below]
+    # Walking the matches newest first stops after the window, however common the words are
+    cursor.execute(
+        f"SELECT min(rowid), max(rowid) FROM ("
+        f"SELECT {FTS_TABLE}.rowid AS rowid {clause} ORDER BY {FTS_TABLE}.rowid DESC LIMIT %s)",
+        [*values, settings.SEARCH_RANK_WINDOW],
+    )
+    return cursor.fetchone()
+
+
+def search_page(options: dict):
+    """
+    One page of ranked matches
+
+    Returns:
+        tuple: (list of serialized reminders, each with a "snippet" of HTML-escaped
+        text with matches in <mark> tags; cursor for the next page or None)
+    """
+    clause, values = _match_clause(options)
+    limit = options['limit']
+
+    with connection.cursor() as cursor:
+        if options['window'] is None:
+            low, high = _window(cursor, clause, values)
+            if low is None:
+                return [], None
+            offset = 0
+        else:
+            low, high, offset = options['window']
+
+        cursor.execute(
+            f"SELECT {FTS_TABLE}.rowid, snippet({FTS_TABLE}, -1, char(2), char(3), '…', 12) "
+            f"{clause} AND {FTS_TABLE}.rowid BETWEEN %s AND %s ORDER BY rank LIMIT %s OFFSET %s",
+            [*values, low, high, limit + 1, offset],
+        )
+        matches = cursor.fetchall()
+
+        if len(matches) > limit:
+            next_cursor = encode_cursor(low, high, offset + limit)
+        else:
+            older_low, older_high = _window(cursor, clause, values, below=low)
+            next_cursor = encode_cursor(older_low, older_high, 0) if older_low is not None else None
+
+    page = matches[:limit]
+    fields = options['fields']
+    model_fields = {LIST_FIELDS[f] for f in fields} | {'id'}
+    rows = {
+        row['id']: row
+        for row in Reminder.objects.filter(id__in=[reminder_id for reminder_id, _ in page]).values(*model_fields)
+    }
+    items = []
+    for reminder_id, snippet in page:
+        row = rows.get(reminder_id)
+        if row is not None:
+            items.append({**serialize_row(row, fields), 'snippet': _snippet(snippet)})
+
+    return items, next_cursor
@@ -0,0 +1,182 @@
+"""
+Reminder creation shared by the views and the background parse workers
+"""
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytz
+from django.conf import settings
+
+from .models import Reminder
+from .parsing import parse_user_input, aparse_user_input, parse_image_input
+from .schemas import MeetingReminderSchema
+from .scheduling import schedule_reminder, schedule_reminders
+
+
+def scheduled_time_from(validated_dict: dict) -> datetime:
+    """Timezone-aware scheduled time from validated meeting data (naive times are IST)"""
+    scheduled_time = validated_dict['time']
+    
+    if isinstance(scheduled_time, str):
+        scheduled_time = datetime.fromisoformat(scheduled_time.replace('Z', '+00:00'))
+    
+    if scheduled_time.tzinfo is None:
+        # Assume IST if no timezone
+        ist = pytz.timezone('Asia/Kolkata')
+        scheduled_time = ist.localize(scheduled_time)
+    
+    return scheduled_time
+
+
+def _reminder_fields(parsed_data: dict, receiver_email: str) -> dict:
+    """Validate parsed meeting data and map it onto Reminder fields"""
+    # Validate with Pydantic schema
+    validated_data = MeetingReminderSchema(**parsed_data)
+    validated_dict = validated_data.model_dump()
+    
+    return {
+        'name': validated_dict['name'],
+        'scheduled_time': scheduled_time_from(validated_dict),
+        'mode': validated_dict.get('mode'),
+        'applications': validated_dict.get('applications'),
+        'location': validated_dict.get('location'),
+        'link': validated_dict.get('link'),
+        'receiver_email': receiver_email,
+        'json_data': validated_data.model_dump(mode='json'),
+    }
+
+
+def _new_job_id(reminder: Reminder) -> str:
+    return f"reminder_{reminder.id}_{uuid.uuid4().hex[:8]}"
+
+
+def create_scheduled_reminder(user_input: str, receiver_email: str):
+    """
+    Parse user input, store the reminder and schedule its email
+    
+    Returns:
+        tuple: (Reminder, name of the parser that handled the input)
+    """
+    # Parse with the rule-based fast path, falling back to Gemini LLM
+    parsed_data, parser = parse_user_input(user_input)
+    
+    # Create reminder record
+    reminder = Reminder.objects.create(**_reminder_fields(parsed_data, receiver_email))
+    
+    # Generate unique job ID
+    reminder.job_id = _new_job_id(reminder)
+    reminder.save(update_fields=['job_id'])
+    
+    # Schedule email using APScheduler
+    schedule_reminder(reminder)
+    
+    return reminder, parser
+
+
+async def acreate_scheduled_reminder(user_input: str, receiver_email: str):
+    """Async variant of create_scheduled_reminder using async parsing and ORM calls"""
+    parsed_data, parser = await aparse_user_input(user_input)
+    
+    reminder = await Reminder.objects.acreate(**_reminder_fields(parsed_data, receiver_email))
+    
+    reminder.job_id = _new_job_id(reminder)
+    await reminder.asave(update_fields=['job_id'])
+    
+    # add_job only takes the scheduler's in-memory lock, so it is safe to call here
+    schedule_reminder(reminder)
+    
+    return reminder, parser
+
+
+def create_scheduled_reminder_from_image(image_data: bytes, receiver_email: str, note: str = ''):
+    """
+    Parse an invite screenshot, store the reminder and schedule its email
+    
+    Returns:
+        tuple: (Reminder, name of the parser that handled the input)
+    """
+    parsed_data, parser = parse_image_input(image_data, note)
+    
+    reminder = Reminder.objects.create(**_reminder_fields(parsed_data, receiver_email))
+    reminder.job_id = _new_job_id(reminder)
+    reminder.save(update_fields=['job_id'])
+    
+    schedule_reminder(reminder)
+    
+    return reminder, parser
+
+
+# One long-lived pool, so the parse-cache connection each thread opens is reused, not leaked per request
+_bulk_pool = None
+_bulk_pool_lock = threading.Lock()
+
+
+def _get_bulk_pool() -> ThreadPoolExecutor:
+    global _bulk_pool
+    if _bulk_pool is None:
+        with _bulk_pool_lock:
+            if _bulk_pool is None:
+                _bulk_pool = ThreadPoolExecutor(
+                    max_workers=max(1, settings.BULK_PARSE_CONCURRENCY),
+                    thread_name_prefix='bulk-parse'
+                )
+    return _bulk_pool
+
+
+def _parse_item(item):
+    user_input, receiver_email = item
+    try:
+        parsed_data, parser = parse_user_input(user_input)
+        return _reminder_fields(parsed_data, receiver_email), parser, None
+    except Exception as e:
+        return None, None, str(e)
+
+
+def create_scheduled_reminders(items):
+    """
+    Parse, store and schedule many reminders at once
+    
+    Items are parsed in parallel on a shared pool of BULK_PARSE_CONCURRENCY threads,
+    every valid one is inserted with a single bulk_create that already
+    carries its job id, and all jobs are registered in one scheduler update.
+    An item that fails to parse or validate does not affect the others.
+    
+    Args:
+        items: List of (user_input, receiver_email) pairs
+        
+    Returns:
+        list: One (reminder, parser, error) tuple per item, in input order;
+        reminder and parser are None when error is set
+    """
+    if not items:
+        return []
+    
+    parsed = list(_get_bulk_pool().map(_parse_item, items))
+    
+    # Row ids are not known before the insert, so bulk job ids are random rather than id-based
+    reminders = [
+        Reminder(job_id=f"reminder_{uuid.uuid4().hex}", **fields)
+        for fields, _, error in parsed if error is None
+    ]
+    Reminder.objects.bulk_create(reminders)
+    schedule_reminders(reminders)
+    
+    created = iter(reminders)
+    return [
+        (None, None, error) if error is not None else (next(created), parser, None)
+        for _, parser, error in parsed
+    ]
+
+
+def reminder_summary(reminder: Reminder) -> dict:
+    """Reminder fields returned by the schedule endpoints"""
+    return {
+        'id': reminder.id,
+        'name': reminder.name,
+        'scheduledTime': reminder.scheduled_time.isoformat(),
+        'createdAt': reminder.created_at.isoformat(),
+        'jsonData': reminder.json_data,
+    }
+
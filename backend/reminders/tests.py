@@ -0,0 +1,520 @@
+import asyncio
+import smtplib
+import threading
+import time
+from urllib.request import urlopen
+from datetime import datetime, timedelta
+from unittest import mock
+
+from apscheduler.util import datetime_to_utc_timestamp
+from django.http import HttpResponse, QueryDict
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+import pytz
+
+from nexanote import metrics
+from nexanote.middleware import REQUEST_SECONDS, RequestMetricsMiddleware
+from nexanote.scheduler import ReminderJobStore, scheduler
+from nexanote.smtp_pool import PooledSMTPConnection, SMTPConnectionPool, SMTPDataInterrupted, _DataTracking
+from .fast_parser import IST, fast_parse
+from .delivery import deliver
+from .dispatcher import dispatch_batch
+from .gemini_service import (
+    GeminiUnavailable, _BadResponse, _aread_stream, _generate_single, _read_stream, get_breaker,
+    parse_meeting_input,
+)
+from .ics import import_calendar
+from .views import import_ics
+from .listing import parse_list_params, reminder_rows
+from .models import ParseJob, Reminder
+from .parse_cache import ParseCache
+from .search import parse_search_params, search_page
+from .parse_jobs import resume_parse_jobs
+from .scheduling import _build_job, _clone_job, send_reminder_job
+
+
+class ReminderJobStoreTests(SimpleTestCase):
+    """ReminderJobStore and the job cloning rely on APScheduler internals"""
+
+    def setUp(self):
+        self.store = ReminderJobStore()
+        self.start = datetime(2030, 1, 1, 9, 0, tzinfo=pytz.UTC)
+        self.template = _build_job(send_reminder_job, 'reminder_0', (0,), self.start)
+
+    def entry(self, job_id, minutes):
+        run_date = self.start + timedelta(minutes=minutes)
+        job = _clone_job(self.template, job_id, (job_id,), run_date)
+        return job, datetime_to_utc_timestamp(job.next_run_time)
+
+    def test_add_jobs_orders_by_run_time(self):
+        self.store.add_jobs([self.entry('b', 2), self.entry('a', 1), self.entry('c', 3)])
+        self.assertEqual([job.id for job in self.store.get_all_jobs()], ['a', 'b', 'c'])
+
+    def test_duplicate_ids_within_a_batch_keep_the_last(self):
+        self.store.add_jobs([self.entry('a', 1), self.entry('b', 2), self.entry('a', 5)])
+        jobs = self.store.get_all_jobs()
+        self.assertEqual([job.id for job in jobs], ['b', 'a'])
+        self.assertEqual(self.store.lookup_job('a').next_run_time, self.start + timedelta(minutes=5))
+
+    def test_add_jobs_replaces_stored_jobs(self):
+        self.store.add_jobs([self.entry('a', 1), self.entry('b', 2)])
+        self.store.add_jobs([self.entry('a', 3), self.entry('a', 4)])
+        self.assertEqual([job.id for job in self.store.get_all_jobs()], ['b', 'a'])
+        self.store.remove_job('a')
+        self.store.remove_job('b')
+        self.assertEqual(self.store.get_all_jobs(), [])
+
+    def test_due_jobs_and_removal_see_bulk_added_jobs(self):
+        self.store.add_jobs([self.entry('a', 1), self.entry('b', 10)])
+        due = self.store.get_due_jobs(self.start + timedelta(minutes=5))
+        self.assertEqual([job.id for job in due], ['a'])
+        self.store.remove_job('a')
+        self.assertEqual(self.store.get_next_run_time(), self.start + timedelta(minutes=10))
+
+    def test_cloned_job_matches_a_built_job(self):
+        run_date = self.start + timedelta(minutes=7)
+        built = _build_job(send_reminder_job, 'reminder_7', (7,), run_date).__getstate__()
+        cloned = _clone_job(self.template, 'reminder_7', (7,), run_date).__getstate__()
+        self.assertEqual(built.pop('trigger').run_date, cloned.pop('trigger').run_date)
+        self.assertEqual(built, cloned)
+
+    def test_scheduler_jobstore_lock_exists(self):
+        with scheduler._jobstores_lock:
+            pass
+
+
+class FastParseConfidenceTests(SimpleTestCase):
+    now = IST.localize(datetime(2026, 10, 17, 9, 0))
+
+    def assertConfident(self, text, expected_time):
+        result = fast_parse(text, self.now)
+        self.assertGreaterEqual(result.confidence, 0.8, text)
+        self.assertEqual(result.data['time'], IST.localize(expected_time))
+
+    def test_structured_inputs_are_confident(self):
+        self.assertConfident('Standup today 10:30 am', datetime(2026, 10, 17, 10, 30))
+        self.assertConfident('Team sync on Friday at 4pm via Zoom', datetime(2026, 10, 23, 16, 0))
+        self.assertConfident('Demo 12 Nov 3pm', datetime(2026, 11, 12, 15, 0))
+        self.assertConfident('Interview at 14:30 IST tomorrow', datetime(2026, 10, 18, 14, 30))
+
+    def test_unread_parts_lower_confidence(self):
+        for text in (
+            'Meeting on 12/11 at 3pm',
+            'Sprint planning 10am next week',
+            'Meeting at 5pm PST tomorrow',
+            'Pay rent 5pm 1st of every month',
+            'Cancelled: standup 10am',
+            'Standup 10am daily',
+        ):
+            with self.subTest(text=text):
+                self.assertLess(fast_parse(text, self.now).confidence, 0.8)
+
+    def test_times_already_gone_today(self):
+        monday = IST.localize(datetime(2026, 10, 19, 11, 0))
+        for text, expected in (
+            ('Standup monday 10am', datetime(2026, 10, 26, 10, 0)),
+            ('Team sync on monday at 9:30', datetime(2026, 10, 26, 9, 30)),
+            ('Standup monday 4pm', datetime(2026, 10, 19, 16, 0)),
+        ):
+            with self.subTest(text=text):
+                result = fast_parse(text, monday)
+                self.assertGreaterEqual(result.confidence, 0.8)
+                self.assertEqual(result.data['time'], IST.localize(expected))
+        for text in ('Standup today 10am', 'Standup tonight 9am', 'Review 19 Oct 10am'):
+            with self.subTest(text=text):
+                self.assertLess(fast_parse(text, monday).confidence, 0.8)
+
+    def test_ist_is_not_part_of_the_name(self):
+        result = fast_parse('Call at 10am IST', self.now)
+        self.assertEqual(result.data['name'], 'Call')
+        self.assertEqual(result.data['time'], IST.localize(datetime(2026, 10, 17, 10, 0)))
+
+
+@override_settings(GEMINI_MODEL_NAME='primary', GEMINI_BATCH_MAX_SIZE=1)
+class ParseCacheTests(SimpleTestCase):
+    result = {'name': 'Standup', 'time': '2030-01-01T10:00:00+05:30'}
+
+    def parse_twice(self, text, answered_by='primary'):
+        with mock.patch('reminders.gemini_service.get_parse_cache', return_value=ParseCache(None)), \
+                mock.patch('reminders.gemini_service._generate_single', return_value=(self.result, answered_by)) as generate:
+            parse_meeting_input(text)
+            parse_meeting_input(text)
+        return generate.call_count
+
+    def test_repeated_input_is_served_from_cache(self):
+        self.assertEqual(self.parse_twice('Standup tomorrow 10am'), 1)
+
+    def test_inputs_relative_to_now_are_not_cached(self):
+        for text in ('Standup in 30 minutes', 'Call back in an hour', 'Review half an hour from now'):
+            with self.subTest(text=text):
+                self.assertEqual(self.parse_twice(text), 2)
+
+    def test_fallback_answers_are_not_served_for_the_primary_model(self):
+        self.assertEqual(self.parse_twice('Standup tomorrow 10am', answered_by='fallback'), 2)
+
+
+class ResumeParseJobsTests(TestCase):
+
+    def job(self, status, age_seconds):
+        job = ParseJob.objects.create(user_input='Standup at 10am', receiver_email='a@example.com', status=status)
+        ParseJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(seconds=age_seconds))
+        return job
+
+    def resume(self):
+        with mock.patch('reminders.parse_jobs._get_executor') as executor:
+            resumed = resume_parse_jobs()
+        return resumed, [call.args[1] for call in executor.return_value.submit.call_args_list]
+
+    def test_only_jobs_past_the_lease_are_requeued(self):
+        with self.settings(PARSE_JOB_LEASE_SECONDS=60):
+            running = self.job(ParseJob.STATUS_RUNNING, 120)
+            pending = self.job(ParseJob.STATUS_PENDING, 120)
+            self.job(ParseJob.STATUS_RUNNING, 10)
+            self.job(ParseJob.STATUS_PENDING, 10)
+            self.job(ParseJob.STATUS_DONE, 120)
+            resumed, submitted = self.resume()
+
+        self.assertEqual(resumed, 2)
+        self.assertEqual(set(submitted), {running.pk, pending.pk})
+        running.refresh_from_db()
+        self.assertEqual(running.status, ParseJob.STATUS_PENDING)
+
+    def test_a_reclaimed_job_is_not_reclaimed_again(self):
+        with self.settings(PARSE_JOB_LEASE_SECONDS=60):
+            self.job(ParseJob.STATUS_RUNNING, 120)
+            self.assertEqual(self.resume()[0], 1)
+            self.assertEqual(self.resume()[0], 0)
+
+
+class IcsReimportTests(TestCase):
+    receiver = 'a@example.com'
+
+    def setUp(self):
+        start = timezone.now() + timedelta(days=1)
+        moved = start + timedelta(days=1, hours=2)
+        fmt = '%Y%m%dT%H%M%SZ'
+        self.calendar = '\r\n'.join([
+            'BEGIN:VCALENDAR',
+            'BEGIN:VEVENT', 'UID:standup-1', 'SUMMARY:Standup',
+            f"DTSTART:{start.astimezone(pytz.utc):{fmt}}", 'RRULE:FREQ=DAILY;COUNT=3',
+            'END:VEVENT',
+            'BEGIN:VEVENT', 'UID:standup-1', 'SUMMARY:Standup (moved)',
+            f"RECURRENCE-ID:{(start + timedelta(days=1)).astimezone(pytz.utc):{fmt}}",
+            f"DTSTART:{moved.astimezone(pytz.utc):{fmt}}",
+            'END:VEVENT',
+            'END:VCALENDAR',
+        ]).encode()
+        patcher = mock.patch.multiple('reminders.ics', schedule_reminder=mock.DEFAULT, schedule_reminders=mock.DEFAULT)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def import_calendar(self):
+        return import_calendar([self.calendar], self.receiver)
+
+    def test_override_replaces_its_occurrence(self):
+        stats = self.import_calendar()
+        self.assertEqual(stats['imported'], 4)
+        self.assertEqual(stats['failed'], 0)
+        self.assertEqual(Reminder.objects.count(), 3)
+        self.assertTrue(Reminder.objects.filter(name='Standup (moved)').exists())
+
+    def test_reimport_adds_nothing(self):
+        self.import_calendar()
+        stats = self.import_calendar()
+        self.assertEqual(stats['failed'], 0)
+        self.assertEqual(Reminder.objects.count(), 3)
+
+    def test_reimport_after_the_moved_instance_was_sent(self):
+        self.import_calendar()
+        Reminder.objects.filter(name='Standup (moved)').update(sent=True)
+
+        stats = self.import_calendar()
+        self.assertEqual(stats['failed'], 0)
+        self.assertEqual(stats['imported'], 0)
+        self.assertEqual(Reminder.objects.filter(name='Standup (moved)').count(), 1)
+
+    def test_size_limit_holds_without_a_content_length(self):
+        request = RequestFactory().post(
+            f'/api/reminders/import/ics?receiverEmail={self.receiver}', self.calendar, content_type='text/calendar'
+        )
+        del request.META['CONTENT_LENGTH']
+        with self.settings(ICS_IMPORT_MAX_BYTES=len(self.calendar) - 1):
+            response = import_ics(request)
+        self.assertEqual(response.status_code, 413)
+
+
+class QueryPlanTests(TestCase):
+    """The scheduler and list query paths must stay on their indexes"""
+
+    def assertUsesIndex(self, queryset, index):
+        plan = queryset.explain()
+        self.assertIn(f'USING INDEX {index}', plan)
+        self.assertNotIn('USE TEMP B-TREE FOR ORDER BY', plan)
+
+    def test_due_queries_use_the_unsent_index(self):
+        now = timezone.now()
+        self.assertUsesIndex(Reminder.objects.due_between(), 'reminder_unsent_due_idx')
+        self.assertUsesIndex(Reminder.objects.due_between(now, now + timedelta(hours=1)), 'reminder_unsent_due_idx')
+        self.assertUsesIndex(Reminder.objects.claimable(now), 'reminder_unsent_due_idx')
+
+    def test_receiver_queries_use_the_receiver_index(self):
+        self.assertUsesIndex(Reminder.objects.pending_for('a@example.com'), 'reminder_receiver_time_idx')
+
+    def test_list_pages_use_the_created_index(self):
+        first_page = reminder_rows(parse_list_params(QueryDict()))
+        self.assertUsesIndex(first_page, 'reminder_created_idx')
+        # Keyset cursor of a later page: (created_at, id) of the last row seen
+        options = parse_list_params(QueryDict())
+        options['cursor'] = (timezone.now(), 100)
+        self.assertUsesIndex(reminder_rows(options), 'reminder_created_idx')
+
+    def test_dead_letter_listing_uses_the_dead_index(self):
+        self.assertUsesIndex(Reminder.objects.dead().order_by('-created_at'), 'reminder_dead_idx')
+
+
+@override_settings(EMAIL_SENDER='sender@example.com', EMAIL_PASSWORD='secret', DIGEST_ENABLED=False)
+class DispatcherLeaseTests(TestCase):
+
+    def setUp(self):
+        due = timezone.now() - timedelta(minutes=1)
+        for index in range(5):
+            Reminder.objects.create(name=f'R{index}', scheduled_time=due, receiver_email='a@example.com')
+
+    def test_claim_is_sent_in_chunks_with_a_renewed_lease(self):
+        leases = []
+
+        def deliver(chunk, claim_token):
+            rows = Reminder.objects.filter(id__in=[r.pk for r in chunk])
+            leases.append(max(rows.values_list('lease_expires_at', flat=True)))
+            self.assertTrue(all(token == claim_token for token in rows.values_list('claim_token', flat=True)))
+            Reminder.objects.filter(id__in=[r.pk for r in chunk]).update(
+                sent=True, status=Reminder.STATUS_SENT, claim_token=None, lease_expires_at=None
+            )
+            return {'sent': len(chunk), 'failed': 0, 'dead': 0, 'emails': len(chunk)}
+
+        # 60 emails a minute and an 8 second lease: two emails per chunk
+        with self.settings(SMTP_RATE_PER_MINUTE=60), \
+                mock.patch('reminders.dispatcher.deliver', side_effect=deliver) as patched:
+            counts = dispatch_batch(batch_size=10, lease_seconds=8)
+
+        self.assertEqual([len(call.args[0]) for call in patched.call_args_list], [2, 2, 1])
+        self.assertEqual(counts['sent'], 5)
+        self.assertEqual(leases, sorted(leases))
+        self.assertLess(leases[0], leases[-1])
+
+    def test_unthrottled_claim_is_sent_in_one_chunk(self):
+        sent = {'sent': 5, 'failed': 0, 'dead': 0, 'emails': 5}
+        with self.settings(SMTP_RATE_PER_MINUTE=0), \
+                mock.patch('reminders.dispatcher.deliver', return_value=sent) as patched, \
+                mock.patch('reminders.dispatcher.renew_lease') as renew:
+            dispatch_batch(batch_size=10, lease_seconds=8)
+        self.assertEqual([len(call.args[0]) for call in patched.call_args_list], [5])
+        renew.assert_not_called()
+
+    def test_claim_is_released_when_sending_fails(self):
+        with mock.patch('reminders.dispatcher.deliver', side_effect=RuntimeError('smtp down')):
+            with self.assertRaises(RuntimeError):
+                dispatch_batch(batch_size=10)
+        self.assertFalse(Reminder.objects.filter(status=Reminder.STATUS_IN_FLIGHT).exists())
+        self.assertFalse(Reminder.objects.exclude(claim_token=None).exists())
+        self.assertEqual(Reminder.objects.claimable(timezone.now()).count(), 5)
+
+    def test_released_retries_keep_their_status(self):
+        Reminder.objects.filter(name='R0').update(status=Reminder.STATUS_RETRYING, attempts=2)
+        with mock.patch('reminders.dispatcher.deliver', side_effect=RuntimeError('smtp down')):
+            with self.assertRaises(RuntimeError):
+                dispatch_batch(batch_size=10)
+        retried = Reminder.objects.get(name='R0')
+        self.assertEqual((retried.status, retried.attempts), (Reminder.STATUS_RETRYING, 2))
+        self.assertEqual(Reminder.objects.filter(status=Reminder.STATUS_PENDING).count(), 4)
+
+    def test_nothing_is_claimed_without_email_configuration(self):
+        with self.settings(EMAIL_PASSWORD=''), mock.patch('reminders.dispatcher.deliver') as patched:
+            with self.assertRaises(ValueError):
+                dispatch_batch(batch_size=10)
+        patched.assert_not_called()
+        self.assertEqual(Reminder.objects.filter(status=Reminder.STATUS_PENDING).count(), 5)
+
+
+@override_settings(SEARCH_RANK_WINDOW=3)
+class SearchPaginationTests(TestCase):
+
+    def setUp(self):
+        when = timezone.now() + timedelta(days=1)
+        self.matching = [
+            Reminder.objects.create(name=f'Standup {index}', scheduled_time=when, receiver_email='a@example.com').pk
+            for index in range(8)
+        ]
+        Reminder.objects.create(name='Retro', scheduled_time=when, receiver_email='a@example.com')
+
+    def pages(self, query):
+        pages = []
+        cursor = None
+        while True:
+            params = QueryDict(mutable=True)
+            params.update({'q': query, 'limit': '2', 'fields': 'id'})
+            if cursor:
+                params['cursor'] = cursor
+            items, cursor = search_page(parse_search_params(params))
+            pages.append([item['id'] for item in items])
+            if cursor is None:
+                return pages
+
+    def test_pages_continue_into_older_windows(self):
+        pages = self.pages('standup')
+        found = [reminder_id for page in pages for reminder_id in page]
+        self.assertEqual(sorted(found), self.matching)
+        # Newest window first
+        self.assertEqual(set(pages[0] + pages[1]), set(self.matching[-3:]))
+
+    def test_no_cursor_after_the_last_match(self):
+        self.assertEqual(self.pages('retro'), [[self.matching[-1] + 1]])
+        self.assertEqual(self.pages('planning'), [[]])
+
+
+class _DroppingServer:
+    """Stands in for smtplib.SMTP: the connection drops before or during DATA"""
+
+    def __init__(self, drop_in_data):
+        self.drop_in_data = drop_in_data
+
+    def send_message(self, message):
+        if not self.drop_in_data:
+            raise smtplib.SMTPServerDisconnected('lost during RCPT')
+        self.data(message)
+
+    def data(self, msg):
+        raise smtplib.SMTPServerDisconnected('lost during DATA')
+
+    def close(self):
+        pass
+
+    quit = close
+
+
+class _TrackedDroppingServer(_DataTracking, _DroppingServer):
+    pass
+
+
+class SMTPRetryTests(SimpleTestCase):
+
+    def send(self, drop_in_data):
+        pool = SMTPConnectionPool('localhost', 2525, 'user', 'password')
+        server = _TrackedDroppingServer(drop_in_data)
+        with mock.patch.object(pool, '_connect', return_value=PooledSMTPConnection(server)) as connect:
+            try:
+                pool.send_message(object())
+            except Exception as e:
+                return connect.call_count, e
+
+    def test_disconnect_before_data_is_retried(self):
+        attempts, error = self.send(drop_in_data=False)
+        self.assertEqual(attempts, 2)
+        self.assertIsInstance(error, smtplib.SMTPServerDisconnected)
+
+    def test_disconnect_during_data_is_not_retried(self):
+        attempts, error = self.send(drop_in_data=True)
+        self.assertEqual(attempts, 1)
+        self.assertIsInstance(error, SMTPDataInterrupted)
+
+
+class UncertainDeliveryTests(TestCase):
+
+    def test_send_interrupted_in_data_is_not_retried(self):
+        reminder = Reminder.objects.create(
+            name='Standup', scheduled_time=timezone.now(), receiver_email='a@example.com'
+        )
+        error = SMTPDataInterrupted('connection dropped during DATA')
+        with mock.patch('reminders.delivery.send_messages', return_value={0: error}):
+            counts = deliver([reminder])
+        self.assertEqual((counts['dead'], counts['retries']), (1, []))
+        reminder.refresh_from_db()
+        self.assertEqual(reminder.status, Reminder.STATUS_DEAD)
+        self.assertIsNone(reminder.next_attempt_at)
+
+
+class MetricsTests(SimpleTestCase):
+
+    def test_unknown_methods_share_one_label(self):
+        request = RequestFactory().generic('BREW', '/api/unknown')
+        RequestMetricsMiddleware._observe(request, HttpResponse(status=405), time.perf_counter())
+        self.assertIn(('unmatched', 'other', '405'), REQUEST_SECONDS._children)
+        self.assertNotIn(('unmatched', 'BREW', '405'), REQUEST_SECONDS._children)
+
+    def test_after_scrape_runs_on_the_scrape_thread(self):
+        threads = []
+        server = metrics.start_http_server(0, '127.0.0.1', after_scrape=lambda: threads.append(threading.get_ident()))
+        try:
+            with urlopen(f'http://127.0.0.1:{server.server_address[1]}/metrics') as response:
+                self.assertEqual(response.status, 200)
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], threading.get_ident())
+
+
+class GeminiStreamTests(SimpleTestCase):
+    answer = ['```json\n{"name": "Standup", ', '"time": "2030-01-01T10:00:00+05:30"}', '\n```', ' trailing']
+
+    def chunks(self, closed):
+        try:
+            for text in self.answer:
+                yield mock.Mock(text=text)
+        finally:
+            closed.append(True)
+
+    def test_stream_is_closed_after_the_first_object(self):
+        closed = []
+        stream = self.chunks(closed)
+        result, _ = _read_stream(stream)
+        self.assertEqual(result['name'], 'Standup')
+        self.assertEqual(closed, [True])
+
+    def test_grpc_call_is_cancelled(self):
+        response = mock.MagicMock()
+        response.__iter__.return_value = iter([mock.Mock(text=text) for text in self.answer])
+        _read_stream(response)
+        response._iterator.cancel.assert_called_once_with()
+
+    def test_async_stream_is_closed_after_the_first_object(self):
+        closed = []
+
+        async def chunks():
+            try:
+                for text in self.answer:
+                    yield mock.Mock(text=text)
+            finally:
+                closed.append(True)
+
+        async def read():
+            stream = chunks()
+            result, _ = await _aread_stream(stream)
+            return result, list(closed)
+
+        result, closed_on_return = asyncio.run(read())
+        self.assertEqual(result['name'], 'Standup')
+        self.assertEqual(closed_on_return, [True])
+
+
+@override_settings(GEMINI_BREAKER_FAILURES=1, GEMINI_HEDGE_ENABLED=False)
+class GeminiLadderTests(SimpleTestCase):
+
+    def generate(self, models, error):
+        with self.settings(GEMINI_MODEL_NAME=models[0], GEMINI_FALLBACK_MODELS=models[1:]), \
+                mock.patch('reminders.gemini_service._call_model', side_effect=error):
+            _generate_single('prompt')
+
+    def test_invalid_answers_are_a_bad_request(self):
+        models = ['invalid-primary', 'invalid-fallback']
+        with self.assertRaises(ValueError) as raised:
+            self.generate(models, _BadResponse('not a meeting'))
+        self.assertNotIsInstance(raised.exception, GeminiUnavailable)
+        # Bad answers don't count toward the breakers
+        self.assertTrue(all(get_breaker(model).allow() for model in models))
+
+    def test_outages_are_unavailable(self):
+        models = ['down-primary', 'down-fallback']
+        with self.assertRaises(GeminiUnavailable):
+            self.generate(models, TimeoutError('slow'))
+        self.assertFalse(any(get_breaker(model).allow() for model in models))
@@ -1,13 +1,29 @@
 """
 URL routing for reminders app
 """
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# Under ASGI the same routes are served by native async views
+if settings.ASYNC_VIEWS:
+    schedule_view, list_view, gemini_info_view = views.aparse_and_schedule, views.alist_reminders, views.agemini_info
+else:
+    schedule_view, list_view, gemini_info_view = views.parse_and_schedule, views.list_reminders, views.gemini_info
+
 urlpatterns = [
     path('health', views.health, name='health'),
-    path('reminders/schedule', views.parse_and_schedule, name='schedule_reminder'),
-    path('reminders/list', views.list_reminders, name='list_reminders'),
-    path('gemini/info', views.gemini_info, name='gemini_info'),
+    path('metrics', views.metrics, name='metrics'),
+    path('reminders/schedule', schedule_view, name='schedule_reminder'),
+    path('reminders/schedule/image', views.parse_and_schedule_image, name='schedule_reminder_image'),
+    path('reminders/schedule/bulk', views.parse_and_schedule_bulk, name='schedule_reminders_bulk'),
+    path('reminders/jobs/<uuid:job_id>', views.parse_job_status, name='parse_job_status'),
+    path('reminders/list', list_view, name='list_reminders'),
+    path('reminders/search', views.search_reminders, name='search_reminders'),
+    path('reminders/import/ics', views.import_ics, name='import_ics'),
+    path('reminders/export/ics', views.export_ics, name='export_ics'),
+    path('reminders/dead', views.list_dead_reminders, name='list_dead_reminders'),
+    path('reminders/dead/requeue', views.requeue_dead_reminders, name='requeue_dead_reminders'),
+    path('gemini/info', gemini_info_view, name='gemini_info'),
 ]
 
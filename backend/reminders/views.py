@@ -1,20 +1,48 @@
 """
 Django API views for reminder scheduling
 """
-import uuid
-from datetime import datetime
-from django.http import JsonResponse
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import RequestDataTooBig
+from django.http import HttpResponse, Http404, JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
-from django.utils import timezone
 import json as json_lib
-import pytz
 
-from .models import Reminder
-from .gemini_service import parse_meeting_input
-from .email_service import send_reminder_email
-from .schemas import MeetingReminderSchema
-from nexanote.scheduler import scheduler
+from nexanote import metrics as metrics_registry
+
+from . import idempotency
+from .delivery import requeue_dead
+from .gemini_service import GeminiUnavailable
+from .ics import EXPORT_FIELDS, import_calendar, stream_ics
+from .listing import (
+    parse_list_params,
+    reminder_rows,
+    serialize_row,
+    next_cursor,
+    stream_json,
+    astream_json,
+)
+from .models import Reminder, ParseJob
+from .parse_jobs import submit_parse_job
+from .scheduling import schedule_reminders
+from .search import parse_search_params, search_page
+from .services import (
+    create_scheduled_reminder,
+    create_scheduled_reminder_from_image,
+    create_scheduled_reminders,
+    acreate_scheduled_reminder,
+    reminder_summary,
+)
+
+
+def _wants_async(request, data: dict) -> bool:
+    """Async mode is chosen per request ("async": true or Prefer: respond-async) or by default"""
+    if 'async' in data:
+        return bool(data['async'])
+    if 'respond-async' in request.headers.get('Prefer', ''):
+        return True
+    return settings.SCHEDULE_ASYNC_DEFAULT
 
 
 @csrf_exempt
@@ -25,90 +53,215 @@ def parse_and_schedule(request):
     POST /api/reminders/schedule
     Body: {
         "userInput": "text or link",
-        "receiverEmail": "user@example.com"
+        "receiverEmail": "user@example.com",
+        "async": false
     }
+    
+    In async mode the request is recorded as a parse job and answered with
+    202 and a job id; poll GET /api/reminders/jobs/<jobId> for the result.
+    
+    Send an Idempotency-Key header (or "idempotencyKey" in the body) to make
+    retries safe: repeats within IDEMPOTENCY_TTL_SECONDS return the original
+    reminder or job instead of scheduling another.
     """
     try:
-        data = json_lib.loads(request.body)
-        user_input = data.get('userInput', '').strip()
-        receiver_email = data.get('receiverEmail', '').strip()
+        data, error = _read_schedule_request(request)
+        if error:
+            return error
+        
+        key = _idempotency_key(request, data)
+        if key is None:
+            return _schedule(request, data)[0]
         
-        if not user_input:
-            return JsonResponse({'error': 'userInput is required'}, status=400)
+        original = idempotency.reserve(key, data['userInput'], data['receiverEmail'])
+        if original is not None:
+            return _replayed(original)
+        try:
+            response, outcome = _schedule(request, data)
+        except Exception:
+            idempotency.release(key)
+            raise
+        idempotency.complete(key, **outcome)
+        return response
+        
+    except idempotency.IdempotencyKeyReused as e:
+        return JsonResponse({'error': str(e)}, status=422)
+    except idempotency.IdempotencyKeyInProgress as e:
+        return JsonResponse({'error': str(e)}, status=409)
+    except GeminiUnavailable as e:
+        return JsonResponse({'error': str(e)}, status=503)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+def _schedule(request, data: dict):
+    """Run a schedule request; returns (response, outcome to store for its idempotency key)"""
+    if _wants_async(request, data):
+        job = submit_parse_job(data['userInput'], data['receiverEmail'])
+        return _accepted(job), {'parse_job': job}
+    
+    reminder, parser = create_scheduled_reminder(data['userInput'], data['receiverEmail'])
+    return _scheduled(reminder, parser), {'reminder': reminder, 'parser': parser}
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+async def aparse_and_schedule(request):
+    """
+    Async variant of parse_and_schedule, served when ASYNC_VIEWS is on (ASGI)
+    POST /api/reminders/schedule
+    
+    Gemini is awaited natively and the ORM is used through its async API, so
+    one process can keep many LLM calls in flight.
+    """
+    try:
+        data, error = _read_schedule_request(request)
+        if error:
+            return error
+        
+        key = _idempotency_key(request, data)
+        if key is None:
+            return (await _aschedule(request, data))[0]
+        
+        original = await idempotency.areserve(key, data['userInput'], data['receiverEmail'])
+        if original is not None:
+            return _replayed(original)
+        try:
+            response, outcome = await _aschedule(request, data)
+        except Exception:
+            await sync_to_async(idempotency.release)(key)
+            raise
+        await sync_to_async(idempotency.complete)(key, **outcome)
+        return response
+        
+    except idempotency.IdempotencyKeyReused as e:
+        return JsonResponse({'error': str(e)}, status=422)
+    except idempotency.IdempotencyKeyInProgress as e:
+        return JsonResponse({'error': str(e)}, status=409)
+    except GeminiUnavailable as e:
+        return JsonResponse({'error': str(e)}, status=503)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+async def _aschedule(request, data: dict):
+    if _wants_async(request, data):
+        job = await sync_to_async(submit_parse_job)(data['userInput'], data['receiverEmail'])
+        return _accepted(job), {'parse_job': job}
+    
+    reminder, parser = await acreate_scheduled_reminder(data['userInput'], data['receiverEmail'])
+    return _scheduled(reminder, parser), {'reminder': reminder, 'parser': parser}
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def parse_and_schedule_image(request):
+    """
+    Parse a screenshot of a meeting invite and schedule its reminder
+    POST /api/reminders/schedule/image
+    Body (multipart/form-data):
+        image: the screenshot (PNG, JPEG, WebP, ...)
+        receiverEmail: user@example.com
+        userInput: optional text sent along with the image
+    
+    The image is downscaled, cropped and re-encoded before it reaches Gemini,
+    and the parse is cached under a digest of the normalized image.
+    """
+    try:
+        upload = request.FILES.get('image')
+        receiver_email = (request.POST.get('receiverEmail') or '').strip()
+        
+        if upload is None:
+            return JsonResponse({'error': 'image is required'}, status=400)
         
         if not receiver_email:
             return JsonResponse({'error': 'receiverEmail is required'}, status=400)
         
-        # Parse using Gemini LLM
-        parsed_data = parse_meeting_input(user_input)
-        
-        # Validate with Pydantic schema
-        validated_data = MeetingReminderSchema(**parsed_data)
-        validated_dict = validated_data.model_dump()
-        
-        # Get scheduled time
-        scheduled_time = validated_dict['time']
-        
-        # Ensure timezone-aware datetime
-        if isinstance(scheduled_time, str):
-            scheduled_time = datetime.fromisoformat(scheduled_time.replace('Z', '+00:00'))
-        
-        if scheduled_time.tzinfo is None:
-            # Assume IST if no timezone
-            ist = pytz.timezone('Asia/Kolkata')
-            scheduled_time = ist.localize(scheduled_time)
-        
-        # Create reminder record
-        reminder = Reminder.objects.create(
-            name=validated_dict['name'],
-            scheduled_time=scheduled_time,
-            mode=validated_dict.get('mode'),
-            applications=validated_dict.get('applications'),
-            location=validated_dict.get('location'),
-            link=validated_dict.get('link'),
-            receiver_email=receiver_email,
-            json_data=validated_dict
-        )
+        if upload.size > settings.IMAGE_UPLOAD_MAX_BYTES:
+            return JsonResponse(
+                {'error': f'image must be at most {settings.IMAGE_UPLOAD_MAX_BYTES} bytes'}, status=413
+            )
         
-        # Generate unique job ID
-        job_id = f"reminder_{reminder.id}_{uuid.uuid4().hex[:8]}"
-        reminder.job_id = job_id
-        reminder.save()
-        
-        # Schedule email using APScheduler
-        def send_email_job():
-            try:
-                send_reminder_email(
-                    receiver_email=reminder.receiver_email,
-                    reminder_name=reminder.name,
-                    scheduled_time=reminder.scheduled_time,
-                    meeting_link=reminder.link,
-                    created_at=reminder.created_at
-                )
-                reminder.sent = True
-                reminder.save()
-            except Exception as e:
-                print(f"Error sending reminder email for {reminder.id}: {e}")
-        
-        # Schedule the job
-        scheduler.add_job(
-            send_email_job,
-            'date',
-            run_date=scheduled_time,
-            id=job_id,
-            replace_existing=True
+        reminder, parser = create_scheduled_reminder_from_image(
+            upload.read(), receiver_email, (request.POST.get('userInput') or '').strip()
         )
+        return _scheduled(reminder, parser)
         
+    except GeminiUnavailable as e:
+        return JsonResponse({'error': str(e)}, status=503)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def parse_and_schedule_bulk(request):
+    """
+    Parse and schedule many reminders in one request
+    POST /api/reminders/schedule/bulk
+    Body: {
+        "receiverEmail": "team@example.com",
+        "items": [
+            {"userInput": "text or link", "receiverEmail": "optional override"}
+        ]
+    }
+    
+    Items are handled independently: the response lists a result per item in
+    request order and a failed item does not stop the rest.
+    """
+    try:
+        data = json_lib.loads(request.body)
+        items = data.get('items')
+        default_email = (data.get('receiverEmail') or '').strip()
+        
+        if not isinstance(items, list) or not items:
+            return JsonResponse({'error': 'items must be a non-empty list'}, status=400)
+        
+        if len(items) > settings.BULK_MAX_ITEMS:
+            return JsonResponse(
+                {'error': f'At most {settings.BULK_MAX_ITEMS} items per request'}, status=400
+            )
+        
+        results = [None] * len(items)
+        to_parse = []
+        indexes = []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                results[index] = {'index': index, 'status': 'failed', 'error': 'item must be an object'}
+                continue
+            user_input = (item.get('userInput') or '').strip()
+            receiver_email = (item.get('receiverEmail') or '').strip() or default_email
+            if not user_input:
+                results[index] = {'index': index, 'status': 'failed', 'error': 'userInput is required'}
+            elif not receiver_email:
+                results[index] = {'index': index, 'status': 'failed', 'error': 'receiverEmail is required'}
+            else:
+                to_parse.append((user_input, receiver_email))
+                indexes.append(index)
+        
+        for index, (reminder, parser, error) in zip(indexes, create_scheduled_reminders(to_parse)):
+            if error is not None:
+                results[index] = {'index': index, 'status': 'failed', 'error': error}
+            else:
+                results[index] = {
+                    'index': index,
+                    'status': 'scheduled',
+                    'parser': parser,
+                    'reminder': reminder_summary(reminder)
+                }
+        
+        scheduled = sum(1 for result in results if result['status'] == 'scheduled')
         return JsonResponse({
-            'status': 'scheduled',
-            'reminder': {
-                'id': reminder.id,
-                'name': reminder.name,
-                'scheduledTime': reminder.scheduled_time.isoformat(),
-                'createdAt': reminder.created_at.isoformat(),
-                'jsonData': reminder.json_data,
-            }
-        }, status=201)
+            'scheduled': scheduled,
+            'failed': len(results) - scheduled,
+            'results': results
+        })
         
     except ValueError as e:
         return JsonResponse({'error': str(e)}, status=400)
@@ -116,28 +269,283 @@ def parse_and_schedule(request):
         return JsonResponse({'error': str(e)}, status=500)
 
 
+def _read_schedule_request(request):
+    """Parse and check the schedule request body; returns (data, error response or None)"""
+    data = json_lib.loads(request.body)
+    data['userInput'] = data.get('userInput', '').strip()
+    data['receiverEmail'] = data.get('receiverEmail', '').strip()
+    
+    if not data['userInput']:
+        return data, JsonResponse({'error': 'userInput is required'}, status=400)
+    
+    if not data['receiverEmail']:
+        return data, JsonResponse({'error': 'receiverEmail is required'}, status=400)
+    
+    return data, None
+
+
+def _idempotency_key(request, data: dict):
+    key = request.headers.get('Idempotency-Key') or data.get('idempotencyKey')
+    if key is None:
+        return None
+    key = str(key).strip()
+    if not key or len(key) > 255:
+        raise ValueError('Idempotency-Key must be 1 to 255 characters')
+    return key
+
+
+def _replayed(record) -> JsonResponse:
+    """Answer a repeated request with what the original produced"""
+    if record.reminder is not None:
+        response = _scheduled(record.reminder, record.parser)
+    else:
+        response = _accepted(record.parse_job)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _accepted(job: ParseJob) -> JsonResponse:
+    status_url = f"/api/reminders/jobs/{job.id}"
+    response = JsonResponse({
+        'status': job.status,
+        'jobId': str(job.id),
+        'statusUrl': status_url,
+    }, status=202)
+    response['Location'] = status_url
+    return response
+
+
+def _scheduled(reminder: Reminder, parser: str) -> JsonResponse:
+    return JsonResponse({
+        'status': 'scheduled',
+        'parser': parser,
+        'reminder': reminder_summary(reminder)
+    }, status=201)
+
+
+def _read_limited(stream, limit: int, chunk_size: int = 64 * 1024):
+    """
+    Read ``stream`` in chunks, stopping once more than ``limit`` bytes have arrived
+
+    Raises:
+        RequestDataTooBig: The stream is longer than ``limit``
+    """
+    total = 0
+    for chunk in iter(lambda: stream.read(chunk_size), b''):
+        total += len(chunk)
+        if total > limit:
+            raise RequestDataTooBig(f'calendar must be at most {limit} bytes')
+        yield chunk
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def import_ics(request):
+    """
+    Import the upcoming events of an iCalendar file as reminders
+    POST /api/reminders/import/ics?receiverEmail=user@example.com
+    Body: the .ics file (Content-Type: text/calendar), or multipart/form-data
+    with a "calendar" file and a "receiverEmail" field
+    
+    Events are mapped directly onto reminders without calling Gemini, and
+    the file is read event by event so large calendars import in constant
+    memory. Recurring events are expanded up to ICS_EXPAND_DAYS ahead.
+    """
+    try:
+        if request.content_type == 'multipart/form-data':
+            upload = request.FILES.get('calendar')
+            if upload is None:
+                return JsonResponse({'error': 'calendar is required'}, status=400)
+            size = upload.size
+            chunks = upload.chunks()
+            receiver_email = request.POST.get('receiverEmail') or request.GET.get('receiverEmail')
+        else:
+            # Read the body as a stream rather than loading request.body. The
+            # declared length may be missing or wrong, so the limit is also
+            # enforced on the bytes actually read
+            size = int(request.META.get('CONTENT_LENGTH') or 0)
+            chunks = _read_limited(request, settings.ICS_IMPORT_MAX_BYTES)
+            receiver_email = request.GET.get('receiverEmail')
+        
+        receiver_email = (receiver_email or '').strip()
+        if not receiver_email:
+            return JsonResponse({'error': 'receiverEmail is required'}, status=400)
+        
+        if size > settings.ICS_IMPORT_MAX_BYTES:
+            return JsonResponse(
+                {'error': f'calendar must be at most {settings.ICS_IMPORT_MAX_BYTES} bytes'}, status=413
+            )
+        
+        return JsonResponse(import_calendar(chunks, receiver_email))
+        
+    except RequestDataTooBig as e:
+        # Events read before the limit stay imported; a retry skips them as duplicates
+        return JsonResponse({'error': str(e)}, status=413)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+@csrf_exempt
+@require_http_methods(["GET"])
+def export_ics(request):
+    """
+    Stream reminders as an iCalendar file
+    GET /api/reminders/export/ics
+    Query: the list endpoint's filters (sent, status, receiverEmail,
+    scheduledAfter, scheduledBefore) and an optional limit
+    """
+    params = request.GET.copy()
+    params['stream'] = 'true'
+    params['fields'] = ','.join(EXPORT_FIELDS)
+    params.pop('cursor', None)
+    try:
+        options = parse_list_params(params)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    response = StreamingHttpResponse(stream_ics(reminder_rows(options)), content_type='text/calendar; charset=utf-8')
+    response['Content-Disposition'] = 'attachment; filename="reminders.ics"'
+    return response
+
+
+@csrf_exempt
+@require_http_methods(["GET"])
+def parse_job_status(request, job_id):
+    """
+    Progress of an asynchronous schedule request
+    GET /api/reminders/jobs/<jobId>
+    """
+    job = ParseJob.objects.select_related('reminder').filter(pk=job_id).first()
+    if job is None:
+        return JsonResponse({'error': 'Parse job not found'}, status=404)
+    
+    return JsonResponse({
+        'jobId': str(job.id),
+        'status': job.status,
+        'parser': job.parser,
+        'error': job.error,
+        'createdAt': job.created_at.isoformat(),
+        'updatedAt': job.updated_at.isoformat(),
+        'reminder': reminder_summary(job.reminder) if job.reminder else None,
+    })
+
+
 @csrf_exempt
 @require_http_methods(["GET"])
 def list_reminders(request):
-    """List all reminders"""
-    reminders = Reminder.objects.all()
+    """
+    List reminders, newest first, one page at a time
+    GET /api/reminders/list
+    Query: limit, cursor (nextCursor of the previous page), fields (comma
+    separated), sent, receiverEmail, scheduledAfter, scheduledBefore,
+    stream=true (every matching row as one chunked response)
+    """
+    try:
+        options = parse_list_params(request.GET)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    rows = reminder_rows(options)
+    if options['stream']:
+        return StreamingHttpResponse(stream_json(rows, options), content_type='application/json')
+    
+    page = list(rows[:options['limit'] + 1])
+    return _reminder_page(page, options)
+
+
+@csrf_exempt
+@require_http_methods(["GET"])
+async def alist_reminders(request):
+    """Async variant of list_reminders"""
+    try:
+        options = parse_list_params(request.GET)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    rows = reminder_rows(options)
+    if options['stream']:
+        return StreamingHttpResponse(astream_json(rows, options), content_type='application/json')
+    
+    page = [row async for row in rows[:options['limit'] + 1]]
+    return _reminder_page(page, options)
+
+
+@csrf_exempt
+@require_http_methods(["GET"])
+def search_reminders(request):
+    """
+    Full-text search over reminders, best match first
+    GET /api/reminders/search?q=standup
+    Query: q (words to match; end one with * to match a prefix), limit, cursor
+    (nextCursor of the previous page), fields, and the list endpoint's
+    filters (sent, status, receiverEmail, scheduledAfter, scheduledBefore)
+    """
+    try:
+        options = parse_search_params(request.GET)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    items, cursor = search_page(options)
+    return JsonResponse({'reminders': items, 'nextCursor': cursor})
+
+
+@csrf_exempt
+@require_http_methods(["GET"])
+def list_dead_reminders(request):
+    """
+    List dead-lettered reminders (sends that used up every retry)
+    GET /api/reminders/dead
+    Query: same as /api/reminders/list; status is always dead
+    """
+    params = request.GET.copy()
+    params['status'] = Reminder.STATUS_DEAD
+    try:
+        options = parse_list_params(params)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    page = list(reminder_rows(options)[:options['limit'] + 1])
+    return _reminder_page(page, options)
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def requeue_dead_reminders(request):
+    """
+    Requeue dead-lettered reminders with a fresh attempt budget
+    POST /api/reminders/dead/requeue
+    Body: {"ids": [1, 2, 3]} (omit ids to requeue every dead reminder)
+    """
+    try:
+        data = json_lib.loads(request.body or b'{}')
+        ids = data.get('ids')
+        if ids is not None and (
+            not isinstance(ids, list) or not all(isinstance(i, int) for i in ids)
+        ):
+            return JsonResponse({'error': 'ids must be a list of reminder ids'}, status=400)
+        
+        requeued = requeue_dead(ids)
+        # Overdue reminders go out on the next dispatch
+        schedule_reminders(requeued)
+        
+        return JsonResponse({
+            'status': 'requeued',
+            'requeued': [r.id for r in requeued]
+        })
+        
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+def _reminder_page(page: list, options: dict) -> JsonResponse:
+    """Response for one page fetched with limit + 1 rows"""
     return JsonResponse({
-        'reminders': [
-            {
-                'id': r.id,
-                'name': r.name,
-                'scheduledTime': r.scheduled_time.isoformat(),
-                'mode': r.mode,
-                'applications': r.applications,
-                'location': r.location,
-                'link': r.link,
-                'receiverEmail': r.receiver_email,
-                'createdAt': r.created_at.isoformat(),
-                'sent': r.sent,
-                'jsonData': r.json_data,
-            }
-            for r in reminders
-        ]
+        'reminders': [serialize_row(row, options['fields']) for row in page[:options['limit']]],
+        'nextCursor': next_cursor(page, options['limit'])
     })
 
 
@@ -148,24 +556,54 @@ def health(request):
     return JsonResponse({'status': 'ok'})
 
 
+@csrf_exempt
+@require_http_methods(["GET"])
+def metrics(request):
+    """
+    Prometheus metrics for this process
+    GET /api/metrics
+    """
+    if not settings.METRICS_ENABLED:
+        raise Http404("Metrics are disabled")
+    return HttpResponse(metrics_registry.render(), content_type=metrics_registry.CONTENT_TYPE)
+
+
+def _gemini_info_payload(model_info: dict) -> dict:
+    from .parse_cache import get_parse_cache
+    
+    cache = get_parse_cache()
+    return {
+        'status': 'ok',
+        'model': {
+            'name': settings.GEMINI_MODEL_NAME,
+            'temperature': settings.GEMINI_TEMPERATURE,
+            'max_tokens': settings.GEMINI_MAX_TOKENS,
+            'info': model_info
+        },
+        'cache': cache.stats() if cache is not None else None
+    }
+
+
 @csrf_exempt
 @require_http_methods(["GET"])
 def gemini_info(request):
     """Get Gemini model information"""
     try:
         from .gemini_utils import get_model_info
-        from django.conf import settings
         
-        model_info = get_model_info()
-        return JsonResponse({
-            'status': 'ok',
-            'model': {
-                'name': settings.GEMINI_MODEL_NAME,
-                'temperature': settings.GEMINI_TEMPERATURE,
-                'max_tokens': settings.GEMINI_MAX_TOKENS,
-                'info': model_info
-            }
-        })
+        return JsonResponse(_gemini_info_payload(get_model_info()))
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
+
+@csrf_exempt
+@require_http_methods(["GET"])
+async def agemini_info(request):
+    """Async variant of gemini_info; the (TTL-cached) SDK lookup runs in a worker thread"""
+    try:
+        from .gemini_utils import get_model_info
+        
+        model_info = await sync_to_async(get_model_info, thread_sensitive=False)()
+        return JsonResponse(_gemini_info_payload(model_info))
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)